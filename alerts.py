@@ -0,0 +1,327 @@
+"""
+관심 종목 알림 (Watchlist Alerts)
+
+새 스냅샷이 나올 때마다 사용자 정의 트리거를 직전 스냅샷과 비교해서 평가한다.
+트리거마다 전 종목에 대한 불리언 마스크 한 번으로 계산하고 관심 종목 마스크와 AND 하므로
+관심 종목 수와 관계없이 비용이 같다.
+
+    python alerts.py                        # 최근 스냅샷 두 개로 평가 (alerts.json)
+    python alerts.py --dry-run              # 기록 / 전송 없이 출력만
+    python alerts.py --prev a.csv --curr b.csv
+
+alerts.json
+    {
+      "watchlist": ["005930", "000660"],          # 생략하면 전 종목
+      "webhook": "https://hooks.slack.com/...",   # 생략 가능 (환경 변수 QUILTY_ALERT_WEBHOOK)
+      "triggers": [
+        {"name": "상위 10% 진입", "type": "enter_top", "column": "Quality_Score", "pct": 10},
+        {"name": "상위 10% 이탈", "type": "leave_top", "column": "Quality_Score", "pct": 10},
+        {"name": "자본구조 급락", "type": "drop", "column": "Capital_Score", "by": 0.5},
+        {"name": "이자보상배율 1.5 미만", "type": "below", "column": "Interest_Coverage", "value": 1.5,
+         "cooldown_days": 5}
+      ]
+    }
+
+트리거 종류
+    above / below          : value 를 넘거나(아래로) 새로 지나간 경우 (직전에도 조건을 만족했으면 알림 없음)
+    rise / drop            : 직전 대비 by 이상 오르거나 내린 경우
+    enter_top / leave_top  : 유니버스 내 순위 상위 pct% 에 새로 들거나 빠진 경우 (유니버스 이탈 포함)
+
+같은 (트리거, 종목) 알림은 cooldown_days (기본 0 = 같은 날짜만) 안에 다시 보내지 않는다.
+알림은 history/alerts/alerts.jsonl 에 누적되고, 날짜별 webhook 형식 JSON
+(history/alerts/alerts_YYYYMMDD.json) 으로도 저장된다.
+"""
+
+import argparse
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from factor_store import HISTORY_DIR, list_snapshots, load_latest_snapshot, load_snapshot, normalize_codes
+from profiling import profiled
+
+ALERTS_CONFIG = os.environ.get('QUILTY_ALERTS', 'alerts.json')
+ALERT_DIR = os.path.join(HISTORY_DIR, 'alerts')
+ALERT_LOG = os.path.join(ALERT_DIR, 'alerts.jsonl')
+ALERT_STATE = os.path.join(ALERT_DIR, 'state.json')
+
+# 트리거 종류 -> 필요한 설정 키
+TRIGGER_TYPES = {
+    'above': 'value',
+    'below': 'value',
+    'rise': 'by',
+    'drop': 'by',
+    'enter_top': 'pct',
+    'leave_top': 'pct',
+}
+
+Trigger = namedtuple('Trigger', ['name', 'type', 'column', 'threshold', 'cooldown_days'])
+
+
+def parse_triggers(specs):
+    """alerts.json 의 triggers 목록 -> [Trigger, ...] (잘못된 설정은 ValueError)"""
+    triggers = []
+    for i, spec in enumerate(specs):
+        kind = spec.get('type')
+        if kind not in TRIGGER_TYPES:
+            raise ValueError(f"트리거 {i}: 알 수 없는 type {kind!r} (사용 가능: {', '.join(TRIGGER_TYPES)})")
+        key = TRIGGER_TYPES[kind]
+        if 'column' not in spec or key not in spec:
+            raise ValueError(f"트리거 {i} ({kind}): column 과 {key} 가 필요합니다")
+        name = spec.get('name') or f"{spec['column']} {kind} {spec[key]}"
+        triggers.append(Trigger(name, kind, spec['column'], float(spec[key]), int(spec.get('cooldown_days', 0))))
+    names = [t.name for t in triggers]
+    if len(set(names)) != len(names):
+        raise ValueError("트리거 name 이 중복됩니다")
+    return triggers
+
+
+def load_config(path=ALERTS_CONFIG):
+    """(트리거 목록, 관심 종목 코드 배열 또는 None, webhook URL) - 파일이 없으면 None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    watchlist = config.get('watchlist')
+    if watchlist is not None:
+        watchlist = normalize_codes(pd.Series(watchlist, dtype=str)).to_numpy()
+    webhook = config.get('webhook') or os.environ.get('QUILTY_ALERT_WEBHOOK')
+    return parse_triggers(config.get('triggers', [])), watchlist, webhook
+
+
+# ---------------------------------------------------------
+# 평가 (트리거마다 전 종목 마스크 한 번)
+# ---------------------------------------------------------
+def _frame(df):
+    return df.assign(Code=normalize_codes(df['Code'])).drop_duplicates(subset=['Code']).set_index('Code')
+
+
+def _column(frame, column, codes):
+    """codes 순서의 float 배열 (컬럼이 없거나 종목이 없으면 NaN)"""
+    if column not in frame.columns:
+        return np.full(len(codes), np.nan)
+    return pd.to_numeric(frame[column], errors='coerce').reindex(codes).to_numpy(dtype=float)
+
+
+def _top(values, pct):
+    """값이 있는 종목 중 상위 pct% 여부 (동점은 같은 순위)"""
+    rank = pd.Series(values).rank(pct=True, ascending=True).to_numpy()
+    return rank > 1 - pct / 100
+
+
+def trigger_mask(trigger, prev_values, curr_values):
+    """트리거 하나의 전 종목 불리언 마스크"""
+    with np.errstate(invalid='ignore'):
+        if trigger.type == 'above':
+            return (curr_values > trigger.threshold) & ~(prev_values > trigger.threshold)
+        if trigger.type == 'below':
+            return (curr_values < trigger.threshold) & ~(prev_values < trigger.threshold)
+        if trigger.type == 'rise':
+            return curr_values - prev_values >= trigger.threshold
+        if trigger.type == 'drop':
+            return prev_values - curr_values >= trigger.threshold
+        was_top, is_top = _top(prev_values, trigger.threshold), _top(curr_values, trigger.threshold)
+        return is_top & ~was_top if trigger.type == 'enter_top' else was_top & ~is_top
+
+
+def _message(trigger, name, code, prev, curr):
+    fmt = lambda v: '-' if np.isnan(v) else f'{v:,.2f}'
+    detail = {
+        'above': f'{trigger.threshold:g} 초과',
+        'below': f'{trigger.threshold:g} 미만',
+        'rise': f'{trigger.threshold:g} 이상 상승',
+        'drop': f'{trigger.threshold:g} 이상 하락',
+        'enter_top': f'상위 {trigger.threshold:g}% 진입',
+        'leave_top': f'상위 {trigger.threshold:g}% 이탈',
+    }[trigger.type]
+    return f"[{trigger.name}] {name}({code}) {trigger.column} {fmt(prev)} -> {fmt(curr)} ({detail})"
+
+
+@profiled('alerts')
+def evaluate(prev, curr, triggers, watchlist=None, date=None):
+    """
+    직전 / 오늘 스냅샷으로 트리거 평가
+
+    Args:
+        prev, curr: 스냅샷 데이터프레임 (Code 컬럼 필수, Name 은 있으면 사용)
+        triggers: [Trigger, ...]
+        watchlist: 관심 종목 코드 배열 (None 이면 전 종목)
+        date: 알림 날짜 (기본: 오늘)
+
+    Returns:
+        알림 목록 [{'date', 'trigger', 'type', 'code', 'name', 'column', 'prev', 'curr', 'threshold', 'message'}, ...]
+    """
+    date = pd.Timestamp(date or datetime.now().date()).strftime('%Y-%m-%d')
+    prev, curr = _frame(prev), _frame(curr)
+    # 유니버스에서 빠진 종목도 leave_top / 값 변화 대상이므로 합집합
+    codes = curr.index.append(prev.index.difference(curr.index))
+    watched = np.ones(len(codes), dtype=bool) if watchlist is None else codes.isin(watchlist)
+    names = pd.Series(codes, index=codes)
+    for frame in (prev, curr):
+        if 'Name' in frame.columns:
+            names.update(frame['Name'].astype(str))
+    names = names.to_numpy()
+
+    columns = {}
+    events = []
+    for trigger in triggers:
+        if trigger.column not in columns:
+            columns[trigger.column] = (_column(prev, trigger.column, codes), _column(curr, trigger.column, codes))
+        prev_values, curr_values = columns[trigger.column]
+        for i in np.flatnonzero(trigger_mask(trigger, prev_values, curr_values) & watched):
+            code, p, c = codes[i], prev_values[i], curr_values[i]
+            events.append({'date': date, 'trigger': trigger.name, 'type': trigger.type, 'code': code,
+                           'name': names[i], 'column': trigger.column,
+                           'prev': None if np.isnan(p) else round(float(p), 4),
+                           'curr': None if np.isnan(c) else round(float(c), 4),
+                           'threshold': trigger.threshold, 'message': _message(trigger, names[i], code, p, c)})
+    return events
+
+
+# ---------------------------------------------------------
+# 중복 제거 / 기록 / 전송
+# ---------------------------------------------------------
+def _load_state(path=ALERT_STATE):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def deduplicate(events, triggers, state):
+    """
+    cooldown 안에 이미 보낸 (트리거, 종목) 알림 제거 후 state 갱신
+
+    Args:
+        state: {'트리거|종목코드': 마지막 알림 날짜} (제자리에서 갱신)
+    """
+    cooldown = {t.name: t.cooldown_days for t in triggers}
+    fresh = []
+    for event in events:
+        key = f"{event['trigger']}|{event['code']}"
+        last = state.get(key)
+        if last is not None:
+            days = (pd.Timestamp(event['date']) - pd.Timestamp(last)).days
+            if 0 <= days <= cooldown.get(event['trigger'], 0):
+                continue
+        state[key] = event['date']
+        fresh.append(event)
+    return fresh
+
+
+def webhook_payload(events, date):
+    """Slack / Discord 형식 호환 (text) + 원본 알림 목록 (alerts)"""
+    lines = [f"QuiltyStock 알림 {date} ({len(events)}건)"] + [event['message'] for event in events]
+    return {'text': '\n'.join(lines), 'date': date, 'count': len(events), 'alerts': events}
+
+
+def alert_path(date):
+    return os.path.join(ALERT_DIR, f"alerts_{pd.Timestamp(date).strftime('%Y%m%d')}.json")
+
+
+def write_events(events, date, webhook=None):
+    """알림 로그(jsonl) 추가, 날짜별 webhook JSON 갱신, webhook URL 이 있으면 새 알림만 전송"""
+    os.makedirs(ALERT_DIR, exist_ok=True)
+    with open(ALERT_LOG, 'a', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    # 같은 날 여러 번 실행하면 그날 알림을 합쳐서 보관
+    path = alert_path(date)
+    day_events = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            day_events = json.load(f).get('alerts', [])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(webhook_payload(day_events + events, date), f, ensure_ascii=False, indent=1)
+
+    if webhook:
+        import urllib.request
+
+        request = urllib.request.Request(webhook, data=json.dumps(webhook_payload(events, date), ensure_ascii=False).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+        except Exception as e:
+            print(f"⚠ webhook 전송 실패: {e}")
+    return path
+
+
+def run_alerts(prev, curr, config=None, date=None, save=True):
+    """
+    트리거 평가 -> 중복 제거 -> 기록 / 전송
+
+    Args:
+        config: load_config() 결과 (None 이면 ALERTS_CONFIG 읽기, 파일이 없으면 아무것도 안 함)
+        save: False 면 상태 / 로그 / 전송 없이 평가 결과만 반환
+
+    Returns:
+        새 알림 목록 (설정 파일이 없으면 None)
+    """
+    config = config or load_config()
+    if config is None:
+        return None
+    triggers, watchlist, webhook = config
+    date = pd.Timestamp(date or datetime.now().date()).strftime('%Y-%m-%d')
+    events = evaluate(prev, curr, triggers, watchlist, date)
+    state = _load_state()
+    events = deduplicate(events, triggers, state)
+    if save and events:
+        write_events(events, date, webhook)
+        tmp_path = ALERT_STATE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, ALERT_STATE)
+    return events
+
+
+def alert_against_latest(curr, save=True):
+    """오늘 결과를 오늘 이전 최근 스냅샷과 비교해서 알림 (설정 파일이나 스냅샷이 없으면 None)"""
+    config = load_config()
+    if config is None:
+        return None
+    _, prev = load_latest_snapshot(before=pd.Timestamp(datetime.now().date()))
+    if prev is None:
+        return None
+    return run_alerts(prev, curr, config, save=save)
+
+
+def print_events(events):
+    if not events:
+        print("  새 알림 없음")
+        return
+    for event in events:
+        print(f"  {event['message']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='관심 종목 알림')
+    parser.add_argument('--config', default=ALERTS_CONFIG, help='트리거 설정 JSON')
+    parser.add_argument('--prev', help='직전 결과 CSV (기본: 두 번째로 최근 스냅샷)')
+    parser.add_argument('--curr', help='오늘 결과 CSV (기본: 가장 최근 스냅샷)')
+    parser.add_argument('--dry-run', action='store_true', help='기록 / 전송 없이 출력만')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    if config is None:
+        parser.error(f"설정 파일이 없습니다: {args.config}")
+    snapshots = list_snapshots()
+    if not args.curr and not snapshots or not args.prev and len(snapshots) < 2:
+        parser.error("비교할 스냅샷이 두 개 이상 필요합니다 (--prev / --curr 지정 가능)")
+    curr = load_snapshot(args.curr or snapshots[-1][1])
+    date = snapshots[-1][0] if not args.curr else None
+    prev = load_snapshot(args.prev or snapshots[-2][1])
+
+    events = run_alerts(prev, curr, config, date, save=not args.dry_run)
+    print(f"[관심 종목 알림] 트리거 {len(config[0])}개, 새 알림 {len(events)}건")
+    print_events(events)
+    return events
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,889 @@
+"""
+성능 벤치마크
+
+네트워크 없이 합성 데이터로 파이프라인 각 단계의 소요 시간을 측정한다.
+
+사용법:
+    python benchmark.py                 # 전체
+    python benchmark.py reports         # 리포트 출력 (2,600 / 20,000행)
+    python benchmark.py startup         # CLI 시작 시간 / 모듈 import 시간
+    python benchmark.py quality         # 데이터 품질 게이트 (2,600 / 20,000행)
+    python benchmark.py sheets          # 구글 시트 게시 (가짜 Sheets 서버, 왕복 수 / 전송량)
+    python benchmark.py server          # 점수 조회 서버 (인덱스 질의 / 부하 생성)
+    python benchmark.py peers           # 유사 종목 검색 (2,600 / 20,000종목)
+    python benchmark.py diff            # 실행 간 점수 변화 분석 (2,600 / 20,000종목)
+    python benchmark.py sources         # OpenDART 일괄 파일 변환 / 전 종목 지표 계산
+    python benchmark.py scheduler       # 적응형 요청 스케줄러 (지연 / 오류 주입 가짜 FnGuide)
+    python benchmark.py profiling       # 프로파일링 훅 비용 (꺼짐 / 모드별 켜짐)
+    python benchmark.py replay          # 실행 기록 / 재생 (가짜 FnGuide, 재생 결과 일치 확인)
+    python benchmark.py alerts          # 관심 종목 알림 평가 (관심 종목 수별, 2,600 / 20,000종목)
+    python benchmark.py smoothing       # 평활 점수 증분 갱신 시간 / 상위 10% 교체율 (원 점수 vs 평활)
+    python benchmark.py scenarios       # 시나리오 일괄 재계산 (48개, 2,600 / 20,000종목)
+    python benchmark.py universes       # 유니버스 프로필 (합집합 한 번 수집 vs 프로필별 수집, 페이지 수)
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_scored_frame(n, seed=0):
+    """21개 지표 + 점수 컬럼을 가진 합성 데이터프레임 (n개 종목)"""
+    from scoring import DESCRIPTOR_COLS, calculate_scores
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, len(DESCRIPTOR_COLS))) * 10, columns=DESCRIPTOR_COLS)
+    # 데이터 품질 게이트(data_quality.py)를 통과하는 범위 / 정합성으로 조정
+    stability = [c for c in DESCRIPTOR_COLS if c.endswith('_Stability')]
+    df[stability] = rng.uniform(0, 10, size=(n, len(stability)))
+    df[['Accruals', 'Earnings_Smoothness', 'Current_Ratio']] = df[['Accruals', 'Earnings_Smoothness', 'Current_Ratio']].abs()
+    df['Net_Operating_Assets'] /= 10
+    df['Gross_Margin'] = df['Gross_Margin'].clip(upper=100)
+    df['Operating_Margin'] = df['Operating_Margin'].clip(upper=100)
+    df['Debt_Ratio'] = rng.uniform(10, 300, size=n)
+    df['Equity_Ratio'] = 100 / (1 + df['Debt_Ratio'] / 100)
+    df['ROA'] = df['ROE'] * df['Equity_Ratio'] / 100
+    df.insert(0, 'Code', [f'{i:06d}' for i in range(n)])
+    df.insert(1, 'Name', [f'종목{i:06d}' + ('홀딩스우' if i % 7 == 0 else '') for i in range(n)])
+    df['Is_Financial'] = np.arange(n) % 20 == 0
+    return calculate_scores(df)
+
+
+def _timeit(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _print_rows(title, rows):
+    print(f"\n[{title}]")
+    print("-" * 60)
+    for label, seconds in rows:
+        print(f"{label:<40} | {seconds * 1000:>10.1f} ms")
+
+
+# ---------------------------------------------------------
+# 리포트 출력 (iterrows vs 컬럼 단위 스트리밍)
+# ---------------------------------------------------------
+def _legacy_full_list(df_sorted, path):
+    """기존 generate_final_table.py 의 iterrows 출력 (비교 기준)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, (_, row) in enumerate(df_sorted.iterrows()):
+            name = row['Name'][:13] + '..' if len(str(row['Name'])) > 13 else str(row['Name'])
+            f.write(f"{i+1:<4} | {name:<15} | {row['Code']:<8} | {row['Quality_Score']:>6.1f} | {row['Profitability_Score']:>5.1f} | {row['Stability_Score']:>5.1f} | {row['Capital_Score']:>5.1f} | {row['Improvement_Score']:>5.1f} | {row['Accounting_Score']:>5.1f}\n")
+
+
+def bench_reports(sizes=(2600, 20000)):
+    from report_writer import write_report
+    from generate_final_table import FULL_LIST_COLUMNS
+
+    for n in sizes:
+        df = synthetic_scored_frame(n).sort_values('Quality_Score', ascending=False)
+        df['Rank'] = range(1, n + 1)
+        columns = [col for col in FULL_LIST_COLUMNS if col.name in df.columns]
+        rows = []
+        with tempfile.TemporaryDirectory() as tmp:
+            rows.append(('iterrows (legacy text)', _timeit(lambda: _legacy_full_list(df, os.path.join(tmp, 'legacy.txt')))))
+            for fmt, ext in [('text', 'txt'), ('markdown', 'md'), ('html', 'html')]:
+                path = os.path.join(tmp, f'out.{ext}')
+                rows.append((f'report_writer {fmt}', _timeit(lambda: write_report(df, columns, path, fmt=fmt))))
+            try:
+                import openpyxl  # noqa: F401
+                path = os.path.join(tmp, 'out.xlsx')
+                rows.append(('report_writer xlsx', _timeit(lambda: write_report(df, columns, path, fmt='xlsx'), repeat=1)))
+            except ImportError:
+                pass
+        _print_rows(f"리포트 출력 - {n:,}행", rows)
+
+
+# ---------------------------------------------------------
+# 시작 시간 (lazy import 확인)
+# ---------------------------------------------------------
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CLI = os.path.join(ROOT, 'quiltystock.py')
+IMPORT_MODULES = ['quiltystock', 'scoring', 'report_writer', 'data_cache',
+                  'generate_final_table', 'screen_strategies', 'upload_to_sheets', 'quality_analysis_ttm']
+
+
+def _run(argv, cwd=None, repeat=3):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    return _timeit(lambda: subprocess.run(argv, cwd=cwd, env=env, check=True,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), repeat)
+
+
+def import_time(module):
+    """python -X importtime 으로 측정한 모듈 누적 import 시간 (초)"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    # 마지막 줄: "import time: self | cumulative | module"
+    cumulative = proc.stderr.strip().splitlines()[-1].split('|')[1]
+    return int(cumulative) / 1e6
+
+
+def bench_startup():
+    rows = [('python (빈 인터프리터)', _run([sys.executable, '-c', 'pass'])),
+            ('quiltystock --help', _run([sys.executable, CLI, '--help'])),
+            ('quiltystock table --help', _run([sys.executable, CLI, 'table', '--help']))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic_scored_frame(2600).to_csv(os.path.join(tmp, 'quality_analysis_all.csv'), index=False)
+        rows.append(('quiltystock score (캐시 CSV, 2,600종목)', _run([sys.executable, CLI, 'score'], cwd=tmp)))
+        rows.append(('quiltystock table (캐시 CSV, 2,600종목)', _run([sys.executable, CLI, 'table', '-o', 'out.txt'], cwd=tmp)))
+        rows.append(('quiltystock screen (캐시 CSV, 2,600종목)', _run([sys.executable, CLI, 'screen', '-o', 'out.txt'], cwd=tmp)))
+    _print_rows("CLI 실행 시간 (프로세스 시작 포함)", rows)
+
+    rows = []
+    for module in IMPORT_MODULES:
+        seconds = import_time(module)
+        if seconds is not None:
+            rows.append((f'import {module}', seconds))
+        else:
+            print(f"⚠ import {module} 실패 (의존성 미설치)")
+    _print_rows("모듈 import 시간", rows)
+
+
+# ---------------------------------------------------------
+# 데이터 품질 게이트
+# ---------------------------------------------------------
+def bench_quality(sizes=(2600, 20000)):
+    from data_quality import validate
+
+    rng = np.random.default_rng(1)
+    for n in sizes:
+        previous = synthetic_scored_frame(n)
+        df = previous.copy()
+        # 1% 종목은 범위 이탈, 1% 종목은 일간 급변
+        broken = rng.choice(n, size=n // 50, replace=False)
+        df.loc[broken[:n // 100], 'Revenue_Stability'] = -1
+        df.loc[broken[n // 100:], ['ROE', 'ROIC', 'Operating_Margin', 'Gross_Margin']] += 1000
+        result = validate(df, previous)
+        rows = [('validate (직전 스냅샷 없음)', _timeit(lambda: validate(df))),
+                ('validate (직전 스냅샷 비교)', _timeit(lambda: validate(df, previous)))]
+        _print_rows(f"데이터 품질 게이트 - {n:,}행 (격리 {len(result.quarantine)}개)", rows)
+
+
+# ---------------------------------------------------------
+# 구글 시트 게시 (탭별 clear + update vs batchUpdate 일괄)
+# ---------------------------------------------------------
+def _legacy_upload(service, spreadsheet_id, df, sheet_name):
+    """기존 upload_to_sheets() 의 호출 순서 (메타데이터 조회 -> clear -> values.update)"""
+    service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+    service.spreadsheets().values().clear(spreadsheetId=spreadsheet_id, range=f"{sheet_name}!A1:ZZ100000", body={}).execute()
+    df_clean = df.replace([np.inf, -np.inf, np.nan], None)
+    values = [df_clean.columns.tolist()] + df_clean.values.tolist()
+    service.spreadsheets().values().update(spreadsheetId=spreadsheet_id, range=f"{sheet_name}!A1",
+                                           valueInputOption='RAW', body={'values': values}).execute()
+
+
+def bench_sheets(n=2600):
+    try:
+        import httplib2
+        from googleapiclient.discovery import build_from_document
+    except ImportError:
+        print("⚠ google-api-python-client 미설치 - sheets 벤치마크 생략")
+        return
+    from fake_servers import FakeSheetsServer
+    from sheets_publisher import get_service, load_discovery, publish_tabs
+
+    df = synthetic_scored_frame(n)
+    tabs = {'Analysis': df, 'Compounders': df.head(150), 'Turnaround': df.tail(80),
+            'Hidden Gems': df.iloc[:60], 'History': df[['Code', 'Quality_Score']],
+            'No Matches': df.iloc[:0]}  # 조건에 맞는 종목이 없는 스크리닝 탭
+    tabs = {title: frame.round(2) for title, frame in tabs.items()}
+    doc = load_discovery()
+
+    rows, traffic = [], []
+    with FakeSheetsServer(tabs=tuple(tabs)) as server:
+        def legacy():
+            for title, frame in tabs.items():
+                # 기존 코드는 호출마다 build('sheets', 'v4') 로 서비스 생성
+                service = build_from_document(doc, http=httplib2.Http(), client_options={'api_endpoint': server.url})
+                _legacy_upload(service, server.spreadsheet_id, frame, title)
+
+        server.reset_log()
+        rows.append(('탭별 get + clear + update (legacy)', _timeit(legacy, repeat=1)))
+        traffic.append(('legacy', server.round_trips, server.request_bytes))
+
+        service = get_service(endpoint=server.url, http=httplib2.Http())
+        server.reset_log()
+        rows.append(('publish_tabs (batchUpdate)', _timeit(lambda: publish_tabs(service, server.spreadsheet_id, tabs), repeat=1)))
+        traffic.append(('publish_tabs', server.round_trips, server.request_bytes))
+
+        # 쓴 값이 그대로 읽히는지 확인
+        written = server.values('Analysis')
+        assert len(written) == n + 1 and written[0] == list(df.columns), "가짜 서버에 쓴 값이 다름"
+
+    _print_rows(f"구글 시트 게시 - 탭 {len(tabs)}개, {n:,}종목", rows)
+    for label, round_trips, request_bytes in traffic:
+        print(f"{label:<40} | 왕복 {round_trips:>3}회 | 요청 {request_bytes / 1024:>8.0f} KB")
+
+
+# ---------------------------------------------------------
+# 점수 조회 서버 (인덱스 질의 시간 + keep-alive 연결 부하 생성)
+# ---------------------------------------------------------
+SERVER_QUERIES = [
+    ('종목 조회', '/stock/000123'),
+    ('종목명 접두어 검색', '/search?prefix=%EC%A2%85%EB%AA%A90001&limit=10'),  # 종목0001
+    ('종합점수 top 20', '/top?by=Quality_Score&n=20'),
+    ('업종 내 자본구조 top 50', '/top?by=Capital_Score&n=50&sector=S3'),
+    ('스크리닝 (ROIC, 부채비율)', '/screen?min_ROIC=15&max_Debt_Ratio=100&sort=Profitability_Score&limit=20'),
+]
+
+
+async def _load_client(port, queries, n_requests, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for i in range(n_requests):
+            path = queries[i % len(queries)]
+            t0 = time.perf_counter()
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n'.encode())
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+def load_test(port, queries, connections=16, requests_per_connection=500):
+    """keep-alive 연결 connections 개로 요청을 보내서 (초당 요청 수, 지연 시간 배열) 반환"""
+    latencies = []
+
+    async def run():
+        await asyncio.gather(*[_load_client(port, queries, requests_per_connection, latencies)
+                               for _ in range(connections)])
+
+    t0 = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - t0
+    return len(latencies) / elapsed, np.array(latencies)
+
+
+def bench_server(n=2600):
+    from score_server import ScoreIndex, route
+
+    df = synthetic_scored_frame(n)
+    df['Sector'] = [f'S{i % 25}' for i in range(n)]
+    t0 = time.perf_counter()
+    index = ScoreIndex(df, source='synthetic')
+    print(f"\n[점수 조회 서버 - {n:,}종목]")
+    print("-" * 60)
+    print(f"{'인덱스 생성':<40} | {(time.perf_counter() - t0) * 1000:>10.1f} ms")
+    for label, path in SERVER_QUERIES:
+        status, _ = route(index, path)
+        assert status == 200, path
+        seconds = _timeit(lambda: [route(index, path) for _ in range(1000)]) / 1000
+        print(f"{label:<40} | {seconds * 1e6:>10.1f} us")
+
+    # 서버는 별도 프로세스로 띄워서 부하 생성기와 GIL 을 나눠 쓰지 않게 한다
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'scores.csv')
+        df.to_csv(csv_path, index=False)
+        env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+        proc = subprocess.Popen([sys.executable, '-u', os.path.join(ROOT, 'score_server.py'), '--csv', csv_path,
+                                 '--port', '0', '--reload-interval', '0'],
+                                env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            line = proc.stdout.readline()
+            port = int(line.split('http://')[1].split('/')[0].rsplit(':', 1)[1])
+            queries = [path for _, path in SERVER_QUERIES]
+            print(f"\n[점수 조회 서버 - HTTP 부하 (keep-alive, 질의 {len(queries)}종 순환)]")
+            print("-" * 60)
+            for connections in (1, 16, 64):
+                rps, latencies = load_test(port, queries, connections, max(200, 8000 // connections))
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+                print(f"{f'연결 {connections}개':<40} | {rps:>8,.0f} req/s | p50 {p50:.2f} ms | p99 {p99:.2f} ms")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+# ---------------------------------------------------------
+# 유사 종목 검색 (정규화 행렬 top-k)
+# ---------------------------------------------------------
+def bench_peers(sizes=(2600, 20000)):
+    from peers import PeerIndex
+
+    for n in sizes:
+        df = synthetic_scored_frame(n)
+        rows = [('인덱스 생성', _timeit(lambda: PeerIndex.from_frame(df)))]
+        index = PeerIndex.from_frame(df)
+        code = index.codes[n // 2]
+        for label, kwargs in [('종목 기준 top 10 (cosine)', {'code': code}),
+                              ('종목 기준 top 10 (euclidean)', {'code': code, 'metric': 'euclidean'}),
+                              ('프로필 기준 top 10', {'profile': {'ROE': 20, 'Debt_Ratio': 50, 'Score_Accruals': 1}})]:
+            rows.append((label, _timeit(lambda: [index.query(**kwargs) for _ in range(1000)]) / 1000))
+
+        # 전체 쌍 거리 정렬 (brute force) 과 결과 비교
+        top, _ = index.query(code=code, k=10)
+        sim = index.unit @ index.unit[n // 2]
+        sim[n // 2] = -np.inf
+        assert set(top) == set(np.argsort(-sim)[:10]), "top-k 결과 불일치"
+        print(f"\n[유사 종목 검색 - {n:,}종목]")
+        print("-" * 60)
+        for label, seconds in rows:
+            print(f"{label:<40} | {seconds * 1e6:>10.1f} us")
+
+
+
+# ---------------------------------------------------------
+# 실행 간 점수 변화 분석 (업로드 게이트)
+# ---------------------------------------------------------
+def bench_diff(sizes=(2600, 20000)):
+    from score_diff import descriptor_attribution, diff_scores, movers
+
+    for n in sizes:
+        prev = synthetic_scored_frame(n, seed=1)
+        rng = np.random.default_rng(2)
+        # 분기 실적 반영 (일부 종목 지표 변화) + 유니버스 1% 교체
+        curr = prev.iloc[n // 100:].copy()
+        changed = rng.random(len(curr)) < 0.1
+        curr.loc[changed, 'ROE'] += rng.normal(0, 10, changed.sum())
+        extra = synthetic_scored_frame(n // 100, seed=3).assign(Code=[f'9{i:05d}' for i in range(n // 100)])
+        curr = pd.concat([curr, extra], ignore_index=True)
+
+        diff = diff_scores(prev, curr)
+        frame = diff.frame
+        gap = np.abs(frame['Delta_Total'] - frame['Raw_Effect'] - frame['Restd_Effect']).max()
+        assert gap < 1e-9, f"기여도 합 불일치: {gap}"
+
+        rows = [('정렬 + 분해 (diff_scores)', _timeit(lambda: diff_scores(prev, curr))),
+                ('급변 종목 top 20', _timeit(lambda: movers(diff, 20))),
+                ('종목별 디스크립터 기여도', _timeit(lambda: descriptor_attribution(diff, frame['Code'].iloc[0])))]
+        print(f"\n[점수 변화 분석 - {n:,}종목, 신규 {len(diff.entries)} / 제외 {len(diff.exits)}]")
+        print("-" * 60)
+        for label, seconds in rows:
+            print(f"{label:<40} | {seconds * 1000:>10.2f} ms")
+
+
+
+# ---------------------------------------------------------
+# 데이터 소스 (OpenDART 일괄 파일 -> 표준 스키마 -> 21개 지표)
+# ---------------------------------------------------------
+def synthetic_dart_report(n, period='2025/06', filler_items=80, seed=0):
+    """OpenDART 반기보고서 일괄 파일 형식의 탭 구분 텍스트 {파일명: cp949 바이트} (n개 종목)"""
+    from dart_bulk import DART_ITEMS
+
+    rng = np.random.default_rng(seed)
+    codes = [f'{i:06d}' for i in range(n)]
+    statements = {
+        '재무상태표': ('재무상태표, 유동/비유동법-연결재무제표', ['당기 반기말', '전기말', '전전기말'],
+                  ['Assets', 'Equity', 'Liabilities', 'CurrentAssets', 'CurrentLiabilities', 'CashAndCashEquivalents']),
+        '손익계산서': ('손익계산서, 기능별 분류 - 연결재무제표',
+                  ['당기 반기 3개월', '당기 반기 누적', '전기 반기 3개월', '전기 반기 누적', '전기', '전전기'],
+                  ['Revenue', 'CostOfSales', 'OperatingIncomeLoss', 'ProfitLoss', 'FinanceCosts', 'BasicEarningsLossPerShare']),
+        '현금흐름표': ('현금흐름표, 간접법 - 연결재무제표', ['당기 반기', '전기 반기', '전기', '전전기'],
+                  ['CashFlowsFromUsedInOperatingActivities', 'DividendsPaidClassifiedAsFinancingActivities']),
+    }
+    files = {}
+    for title, (kind, value_cols, items) in statements.items():
+        assert set(items) <= set(DART_ITEMS)
+        # 실제 파일처럼 쓰지 않는 항목(filler)이 대부분
+        item_codes = [f'ifrs-full_{item}' for item in items] + [f'entity_Other{j}' for j in range(filler_items)]
+        frame = pd.DataFrame({
+            '재무제표종류': kind,
+            '종목코드': np.repeat([f'[{c}]' for c in codes], len(item_codes)),
+            '회사명': np.repeat([f'회사{c}' for c in codes], len(item_codes)),
+            '시장구분': '유가증권시장상장법인', '업종': '', '업종명': '', '결산월': '12',
+            '결산기준일': period.replace('/', '-') + '-30', '보고서종류': '반기보고서', '통화': 'KRW',
+            '항목코드': np.tile(item_codes, n), '항목명': np.tile(item_codes, n),
+        })
+        values = rng.uniform(1e9, 1e12, size=(len(frame), len(value_cols)))
+        for j, col in enumerate(value_cols):
+            frame[col] = [f'{v:,.0f}' for v in values[:, j]]
+        files[f'2025_반기보고서_{title}_연결.txt'] = frame.to_csv(sep='\t', index=False).encode('cp949')
+    return files
+
+
+def bench_sources(n=2600):
+    import zipfile
+
+    from dart_bulk import DartBulkSource, ingest
+    from quality_analysis_ttm import compute_factors
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, '2025_2Q.zip')
+        files = synthetic_dart_report(n)
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name, data in files.items():
+                z.writestr(name, data)
+        n_rows = sum(data.count(b'\n') - 1 for data in files.values())
+        facts, statements = os.path.join(tmp, 'facts.csv.gz'), os.path.join(tmp, 'statements.csv.gz')
+
+        start = time.perf_counter()
+        ingest([archive], facts, statements)
+        ingest_seconds = time.perf_counter() - start
+
+        source = None
+
+        def load():
+            nonlocal source
+            source = DartBulkSource(statements)
+
+        rows = [(f'일괄 파일 변환 ({n_rows:,}행, zip {os.path.getsize(archive) / 1e6:.1f} MB)', ingest_seconds),
+                ('표준 스키마 로드 (파일 1개)', _timeit(load, repeat=1)),
+                (f'전 종목 Statements + 21개 지표 ({n:,}종목)',
+                 _timeit(lambda: [compute_factors(source.statements(code)) for code in source.codes()], repeat=1))]
+    print(f"\n[데이터 소스 - OpenDART 일괄 파일, {n:,}종목]")
+    print("-" * 60)
+    for label, seconds in rows:
+        print(f"{label:<44} | {seconds:>8.2f} s")
+    print(f"{'(참고) FnGuide 종목별 수집: 요청 간격 0.2초 x 종목 수':<44} | {n * 0.2:>8.0f} s 이상")
+
+
+
+# ---------------------------------------------------------
+# 요청 속도 조절 (가짜 FnGuide: 처리 용량 / 오류 / 429 주입)
+# ---------------------------------------------------------
+def _fetch_all(codes, scheduler, workers):
+    """페이지를 workers 개 스레드로 받고 (소요 시간, 실패 수) 반환 (캐시 사용 안 함)"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from data_cache import fetch_page
+
+    def fetch(code):
+        try:
+            fetch_page('finance', code, use_cache=False, scheduler=scheduler)
+            return 0
+        except Exception:
+            return 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        failures = sum(executor.map(fetch, codes))
+    return time.perf_counter() - start, failures
+
+
+def bench_scheduler(n=300, legacy_sample=40):
+    import data_cache
+    from fake_servers import FakeFnGuideServer
+    from fetch_scheduler import AdaptiveScheduler
+
+    codes = [f'{i:06d}' for i in range(n)]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp, FakeFnGuideServer(capacity=4, latency=0.05, error_rate=0.005) as server:
+        data_cache.PAGE_DIR = os.path.join(tmp, 'pages')
+        data_cache.FNGUIDE_HOST = server.url
+        limits_path = os.path.join(tmp, 'scheduler.json')
+
+        def run(label, scheduler, workers, sample=None):
+            server.reset_log()
+            if sample:
+                # 순차 + 고정 간격은 앞 sample 개만 재고 n 개로 환산
+                start = time.perf_counter()
+                failures = 0
+                for code in codes[:sample]:
+                    failures += _fetch_all([code], None, 1)[1]
+                    time.sleep(0.2)
+                seconds = (time.perf_counter() - start) * n / sample
+                label += f' ({sample}개 측정 후 환산)'
+            else:
+                seconds, failures = _fetch_all(codes, scheduler, workers)
+            limit = f'{int(scheduler.limit)}' if scheduler else '-'
+            rows.append((label, seconds, failures, server.statuses.get(429, 0), server.peak_in_flight, limit))
+
+        run('순차 + 0.2초 간격 (기존)', None, 1, sample=legacy_sample)
+        run('고정 동시 16개 (조절 없음)', None, 16)
+        scheduler = AdaptiveScheduler.load('fake', limits_path=limits_path, max_limit=16)
+        run('적응형 (1개부터 시작)', scheduler, 16)
+        scheduler.save()
+        run('적응형 (저장된 값으로 재시작)', AdaptiveScheduler.load('fake', limits_path=limits_path, max_limit=16), 16)
+
+        # 실행 도중 서버 처리 용량이 4 -> 1 로 줄어드는 경우
+        scheduler = AdaptiveScheduler.load('fake', limits_path=limits_path, max_limit=16)
+        timer = threading.Timer(1.0, lambda: setattr(server, 'capacity', 1))
+        timer.start()
+        run('적응형 (1초 뒤 서버 용량 4 -> 1)', scheduler, 16)
+        timer.cancel()
+        server.capacity = 4
+
+    print(f"\n[요청 속도 조절 - 가짜 FnGuide, 페이지 {n}개, 용량 4, 지연 50ms, 503 0.5%]")
+    print("-" * 100)
+    print(f"{'방식':<44} | {'시간':>7} | {'실패':>4} | {'429':>4} | {'최대 동시':>6} | {'최종 한도':>6}")
+    for label, seconds, failures, throttled, peak, limit in rows:
+        print(f"{label:<44} | {seconds:>6.1f}s | {failures:>4} | {throttled:>4} | {peak:>9} | {limit:>9}")
+    print(f"용량 감소 실행의 동시 요청 한도 변화: {[int(limit) for _, limit in scheduler.history]}")
+
+
+
+# ---------------------------------------------------------
+# 프로파일링 훅 (꺼져 있을 때 호출당 비용, 켰을 때 모드별 비용)
+# ---------------------------------------------------------
+def bench_profiling(n=2600, calls=1_000_000):
+    import profiling
+    from data_quality import gate
+    from scoring import DESCRIPTOR_COLS, calculate_scores
+
+    def plain(x):
+        return x
+
+    hooked = profiling.profiled('noop')(plain)
+    per_call = []
+    for label, func in [('일반 함수', plain), ('@profiled (꺼짐)', hooked)]:
+        seconds = _timeit(lambda: [func(i) for i in range(calls)])
+        per_call.append((label, seconds / calls * 1e9))
+
+    df = synthetic_scored_frame(n)
+    raw = df[['Code', 'Name', 'Is_Financial'] + DESCRIPTOR_COLS]
+
+    def pipeline():
+        calculate_scores(gate(raw.copy(), previous=None, save=False))
+
+    rows = [('꺼짐', _timeit(pipeline))]
+    with tempfile.TemporaryDirectory() as tmp:
+        for modes in ['sample', 'cprofile', 'memory', 'all']:
+            profiling.enable(modes, os.path.join(tmp, modes))
+            try:
+                rows.append((f'켜짐 ({modes})', _timeit(pipeline)))
+            finally:
+                profiling.disable()
+
+    print(f"\n[프로파일링 훅 - 호출당 비용 ({calls:,}회 평균)]")
+    print("-" * 60)
+    for label, ns in per_call:
+        print(f"{label:<40} | {ns:>8.0f} ns")
+    _print_rows(f"품질 게이트 + 점수 계산 ({n:,}종목)", rows)
+
+
+
+# ---------------------------------------------------------
+# 실행 기록 / 재생 (가짜 FnGuide 로 기록 -> 네트워크 없이 재생 -> 결과 비교)
+# ---------------------------------------------------------
+_FNGUIDE_ANNUAL = ['2021/12', '2022/12', '2023/12', '2024/12', '2025/09']  # 마지막은 누적(YTD) 컬럼
+_FNGUIDE_QUARTERS = ['2024/09', '2024/12', '2025/03', '2025/06', '2025/09']
+_FNGUIDE_RATIOS = ['ROIC', '이자보상배율', 'EPS증가율', '영업이익증가율', '매출액증가율', '주당배당금']
+
+
+def synthetic_fnguide_page(kind, code):
+    """FnGuide 재무제표 / 재무비율 페이지 구조를 흉내 낸 HTML (종목코드로 값 고정, 계정 간 관계는 현실적으로)"""
+    rng = np.random.default_rng(int(code))
+
+    def statements(n_periods, months):
+        revenue = rng.uniform(500, 50000) * months / 3 * np.cumprod(rng.uniform(0.95, 1.1, n_periods))
+        op_profit = revenue * rng.uniform(0.02, 0.2, n_periods)
+        net_income = op_profit * rng.uniform(0.6, 0.9, n_periods)
+        assets = revenue * 12 / months * rng.uniform(0.8, 1.5, n_periods)
+        equity = assets * rng.uniform(0.3, 0.7, n_periods)
+        liabilities = assets - equity
+        return [
+            {'매출액': revenue, '매출원가': revenue * rng.uniform(0.5, 0.85, n_periods), '영업이익': op_profit,
+             '이자비용': op_profit * rng.uniform(0.02, 0.2, n_periods), '금융원가': op_profit * rng.uniform(0.05, 0.3, n_periods),
+             '당기순이익': net_income, 'EPS': net_income * rng.uniform(8, 12)},
+            {'자산': assets, '유동자산': assets * 0.4, '현금및현금성자산': assets * rng.uniform(0.05, 0.2, n_periods),
+             '부채': liabilities, '유동부채': liabilities * 0.5, '자본': equity},
+            {'영업활동으로인한현금흐름': net_income * rng.uniform(0.7, 1.4, n_periods), '투자활동으로인한현금흐름': -net_income * 0.5},
+        ]
+
+    def table(rows, columns):
+        frame = pd.DataFrame({col: [values[i] for values in rows.values()] for i, col in enumerate(columns)}).round(1)
+        frame.insert(0, 'IFRS(연결)', list(rows))
+        return frame.to_html(index=False)
+
+    if kind == 'ratio':
+        ratios = {'ROIC': rng.uniform(2, 20, 5), '이자보상배율': rng.uniform(1, 30, 5), 'EPS증가율': rng.normal(5, 20, 5),
+                  '영업이익증가율': rng.normal(5, 20, 5), '매출액증가율': rng.normal(5, 10, 5),
+                  '주당배당금': np.cumsum(rng.uniform(0, 200, 5))}
+        return '<html><body>' + table(ratios, _FNGUIDE_ANNUAL) + '</body></html>'
+    tables = []
+    for annual, quarterly in zip(statements(5, 12), statements(5, 3)):
+        tables += [table(annual, _FNGUIDE_ANNUAL), table(quarterly, _FNGUIDE_QUARTERS)]
+    return '<html><body>' + ''.join(tables) + '</body></html>'
+
+
+def bench_replay(n=300):
+    import data_cache
+    from fake_servers import FakeFnGuideServer
+    from run_archive import record_run, replay_run
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeFnGuideServer(capacity=8, latency=0.02, page=synthetic_fnguide_page) as server:
+        # 캐시 / 히스토리 / 원장은 모두 현재 폴더 기준 상대 경로
+        os.chdir(tmp)
+        try:
+            data_cache.FNGUIDE_HOST = server.url
+            os.makedirs('cache')
+            rng = np.random.default_rng(0)
+            for market, offset, count in [('KOSPI', 0, n * 2 // 3), ('KOSDAQ', 100000, n - n * 2 // 3)]:
+                pd.DataFrame({'Code': [f'{offset + i:06d}' for i in range(count)],
+                              'Name': [f'{market}{i}' for i in range(count)],
+                              'Marcap': rng.uniform(1e10, 1e13, size=count)}).to_csv(data_cache.listing_path(market), index=False)
+
+            import contextlib
+            import io
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                path, _ = record_run('recorded.csv', max_concurrency=8, path='runs/run.zip')
+            record_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                replay_run(path, 'replay.csv')
+            replay_seconds = time.perf_counter() - start
+
+            with open('recorded.csv', 'rb') as a, open('replay.csv', 'rb') as b:
+                identical = a.read() == b.read()
+            size = os.path.getsize(path)
+            scored = len(pd.read_csv('replay.csv'))
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n[실행 기록 / 재생 - 가짜 FnGuide, {n}종목, 페이지 {server.round_trips}개]")
+    print("-" * 60)
+    print(f"{'기록 (수집 + 점수 산출)':<40} | {record_seconds:>8.2f} s")
+    print(f"{'재생 (네트워크 없음)':<40} | {replay_seconds:>8.2f} s")
+    print(f"{'기록 파일 크기':<40} | {size / 1e6:>8.2f} MB")
+    print(f"{'재생 결과 = 기록 결과 (CSV 바이트 비교)':<40} | {'일치' if identical else '불일치'} ({scored}종목)")
+
+
+# ---------------------------------------------------------
+# 관심 종목 알림 (트리거당 전 종목 마스크 한 번)
+# ---------------------------------------------------------
+def bench_alerts(sizes=(2600, 20000), watch_sizes=(10, 300, None)):
+    from alerts import evaluate, parse_triggers
+    from scoring import calculate_scores
+
+    triggers = parse_triggers([
+        {'name': '상위 10% 진입', 'type': 'enter_top', 'column': 'Quality_Score', 'pct': 10},
+        {'name': '상위 10% 이탈', 'type': 'leave_top', 'column': 'Quality_Score', 'pct': 10},
+        {'name': '자본구조 급락', 'type': 'drop', 'column': 'Capital_Score', 'by': 0.5},
+        {'name': '이자보상배율 1.5 미만', 'type': 'below', 'column': 'Interest_Coverage', 'value': 1.5},
+    ])
+    for n in sizes:
+        prev = synthetic_scored_frame(n, seed=1)
+        # 다음 실행: 일부 종목 지표 변화 후 재표준화
+        rng = np.random.default_rng(2)
+        curr = prev.copy()
+        changed = rng.random(n) < 0.1
+        curr.loc[changed, 'ROE'] += rng.normal(0, 10, changed.sum())
+        curr.loc[changed, 'Interest_Coverage'] += rng.normal(0, 10, changed.sum())
+        curr = calculate_scores(curr)
+        rows = []
+        for size in watch_sizes:
+            watchlist = None if size is None else prev['Code'].sample(size, random_state=0).to_numpy()
+            events = evaluate(prev, curr, triggers, watchlist)
+            label = f"관심 {'전 종목' if size is None else f'{size:,}종목'} ({len(events):,}건)"
+            rows.append((label, _timeit(lambda: evaluate(prev, curr, triggers, watchlist))))
+        print(f"\n[관심 종목 알림 - {n:,}종목, 트리거 {len(triggers)}개]")
+        print("-" * 60)
+        for label, seconds in rows:
+            print(f"{label:<40} | {seconds * 1000:>10.2f} ms")
+
+
+# ---------------------------------------------------------
+# 평활 점수 (상태 파일 하나로 증분 갱신)
+# ---------------------------------------------------------
+def bench_smoothing(sizes=(2600, 20000), runs=60, span=5):
+    from score_smoothing import SmoothingState
+    from scoring import CATEGORY_COLS, weight_vector
+
+    k = len(CATEGORY_COLS)
+    weights = weight_vector()
+    for n in sizes:
+        rng = np.random.default_rng(0)
+        codes = np.array([f'{i:06d}' for i in range(n)])
+        # 종목 고유 퀄리티 + 매일 재표준화 / 유니버스 교체로 생기는 잡음
+        signal = rng.normal(size=(n, k))
+        states = {mode: SmoothingState(mode, span) for mode in ('ewma', 'mean')}
+        top = {'raw': None, 'ewma': None, 'mean': None}
+        turnover = {name: [] for name in top}
+        for t in range(runs):
+            today = rng.random(n) > 0.02  # 매일 2% 는 격리 / 제외
+            scores = signal[today] + rng.normal(scale=0.7, size=(today.sum(), k))
+            totals = {'raw': scores @ weights}
+            for mode, state in states.items():
+                states[mode] = state.update(codes[today], scores)
+                totals[mode] = np.nan_to_num(states[mode].smoothed(today.sum())) @ weights
+            for name, total in totals.items():
+                chosen = set(codes[today][np.argsort(-total)[:n // 10]])
+                if top[name] is not None:
+                    turnover[name].append(1 - len(chosen & top[name]) / len(chosen))
+                top[name] = chosen
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.npz')
+            rows = []
+            for mode, state in states.items():
+                state.save(path)
+                scores = signal + rng.normal(scale=0.7, size=(n, k))
+                rows.append((f'{mode}: 로드 + 갱신 + 저장',
+                             _timeit(lambda: SmoothingState.load(path).update(codes, scores).save(path))))
+        print(f"\n[평활 점수 - {n:,}종목, span {span}, {runs}회 실행]")
+        print("-" * 60)
+        for label, seconds in rows:
+            print(f"{label:<40} | {seconds * 1000:>10.2f} ms")
+        for name in top:
+            label = '원 점수' if name == 'raw' else f'평활 ({name})'
+            print(f"{'상위 10% 일간 교체율 - ' + label:<40} | {np.mean(turnover[name]):>10.1%}")
+
+
+# ---------------------------------------------------------
+# 시나리오 / 스트레스 재계산
+# ---------------------------------------------------------
+def synthetic_item_frame(n, seed=0):
+    """synthetic_scored_frame + 서로 맞는 Item_* 재무 항목 (재무 항목 관련 지표는 항목으로 다시 계산)"""
+    from data_sources import SCENARIO_ITEMS
+    from scenarios import AFFECTED_COLS, recompute_descriptors
+    from scoring import calculate_scores
+
+    df = synthetic_scored_frame(n, seed)
+    rng = np.random.default_rng(seed)
+    revenue = rng.lognormal(8, 1.5, n)
+    items = {'Revenue': revenue, 'COGS': revenue * rng.uniform(0.5, 0.9, n),
+             'OpProfit': revenue * rng.normal(0.07, 0.06, n)}
+    items['InterestExpense'] = revenue * rng.uniform(0.001, 0.03, n)
+    items['NetIncome'] = (items['OpProfit'] - items['InterestExpense']) * 0.75
+    items['OperatingCF'] = items['NetIncome'] * rng.uniform(0.5, 1.8, n)
+    items['TotalEquity'] = revenue * rng.uniform(0.3, 1.5, n)
+    items['TotalLiabilities'] = items['TotalEquity'] * rng.uniform(0.1, 3.0, n)
+    items['TotalAssets'] = items['TotalEquity'] + items['TotalLiabilities']
+    items['CurrentAssets'] = items['TotalAssets'] * rng.uniform(0.2, 0.6, n)
+    items['CurrentLiabilities'] = items['TotalLiabilities'] * rng.uniform(0.3, 0.8, n)
+    items['Cash'] = items['CurrentAssets'] * rng.uniform(0.1, 0.5, n)
+    for item in SCENARIO_ITEMS:
+        df[f'Item_{item}'] = items[item]
+    base = {col: df[col].to_numpy(dtype=float) for col in AFFECTED_COLS}
+    for col, values in recompute_descriptors(items, base).items():
+        df[col] = values
+    return calculate_scores(df)
+
+
+def bench_scenarios(sizes=(2600, 20000)):
+    from scenarios import Shock, run_scenarios
+
+    # 이자비용 8단계 x 영업이익률 6단계 = 48개
+    scenarios = {f'IE*{scale:g} OP{pp:+d}pp': [Shock('InterestExpense', 'scale', scale), Shock('OpProfit', 'revenue_pp', pp)]
+                 for scale in (1.25, 1.5, 1.75, 2, 2.5, 3, 3.5, 4) for pp in (0, -1, -2, -3, -4, -5)}
+    for n in sizes:
+        df = synthetic_item_frame(n)
+        result = run_scenarios(df, scenarios)
+        gap = np.abs(result.percentiles[0] - df['Quality_Score'].to_numpy()).max()
+        assert gap < 1e-9, f"기준 시나리오 점수 불일치: {gap}"
+        rows = [(f'{len(scenarios)}개 시나리오 일괄 (충격 + 재계산 + 점수)', _timeit(lambda: run_scenarios(df, scenarios))),
+                ('시나리오 1개', _timeit(lambda: run_scenarios(df, dict(list(scenarios.items())[:1]))))]
+        print(f"\n[시나리오 재계산 - {n:,}종목]")
+        print("-" * 60)
+        for label, seconds in rows:
+            print(f"{label:<40} | {seconds * 1000:>10.1f} ms")
+
+
+# ---------------------------------------------------------
+# 유니버스 프로필 (합집합 한 번 수집 vs 프로필별 수집)
+# ---------------------------------------------------------
+def bench_universes(n=600):
+    import contextlib
+    import io
+    import json
+    import shutil
+
+    import data_cache
+    import quality_analysis_ttm as qa
+    from fake_servers import FakeFnGuideServer
+    from universes import SHARED_FACTORS, build_universe, load_profiles, profile_paths, run_profiles
+
+    profiles = {
+        'kospi_top': {'markets': {'KOSPI': n // 4}},
+        'kospi_liquid': {'markets': {'KOSPI': None}, 'min_amount': 5e9, 'exclude_financials': True},
+        'kosdaq_cap': {'markets': {'KOSDAQ': None}, 'min_marcap': 1e12},
+        'konex': {'markets': {'KONEX': None}},
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeFnGuideServer(capacity=8, latency=0.02, page=synthetic_fnguide_page) as server:
+        os.chdir(tmp)
+        try:
+            data_cache.FNGUIDE_HOST = server.url
+            os.makedirs('cache')
+            rng = np.random.default_rng(0)
+            for market, offset, count in [('KOSPI', 0, n // 2), ('KOSDAQ', 100000, n * 2 // 5), ('KONEX', 200000, n // 10)]:
+                pd.DataFrame({'Code': [f'{offset + i:06d}' for i in range(count)],
+                              'Name': [f'{market}{"금융" if i % 10 == 0 else ""}{i}' for i in range(count)],
+                              'Marcap': rng.uniform(1e10, 1e13, size=count),
+                              'Amount': rng.lognormal(22, 1.5, size=count)}).to_csv(data_cache.listing_path(market), index=False)
+            with open('universes.json', 'w', encoding='utf-8') as f:
+                json.dump(profiles, f)
+            universes = {name: build_universe(p) for name, p in load_profiles().items() if name in profiles}
+            total = sum(map(len, universes.values()))
+
+            # 프로필마다 따로 수집 (페이지 캐시를 같이 쓰지 않을 때)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for name, universe in universes.items():
+                    shutil.rmtree(data_cache.PAGE_DIR, ignore_errors=True)
+                    qa.collect(universe, f'separate_{name}.csv', 'fnguide', 8)
+            separate_seconds, separate_trips = time.perf_counter() - start, server.round_trips
+
+            # 합집합 한 번 수집 + 프로필별 점수 산출 (빈 캐시에서 시작)
+            shutil.rmtree(data_cache.PAGE_DIR, ignore_errors=True)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = run_profiles(list(profiles), max_concurrency=8, stdout=subprocess.DEVNULL)
+            shared_seconds, shared_trips = time.perf_counter() - start, server.round_trips - separate_trips
+            collected = len(pd.read_csv(SHARED_FACTORS))
+            scored = {name: len(pd.read_csv(profile_paths(name)[0])) if not code else None for name, code in results.items()}
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n[유니버스 프로필 - {len(profiles)}개, 프로필 합계 {total:,}종목, 고유 {collected:,}종목]")
+    print("-" * 60)
+    print(f"{'프로필별 수집 (수집만)':<40} | {separate_seconds:>8.2f} s | 페이지 {separate_trips:,}개")
+    print(f"{'합집합 한 번 수집 + 프로필별 점수 산출':<40} | {shared_seconds:>8.2f} s | 페이지 {shared_trips:,}개")
+    for name, rows in scored.items():
+        print(f"  {name:<38} | {'실패' if rows is None else f'{rows:,}종목 점수'}")
+
+
+BENCHMARKS = {
+    'reports': bench_reports,
+    'startup': bench_startup,
+    'quality': bench_quality,
+    'sheets': bench_sheets,
+    'server': bench_server,
+    'peers': bench_peers,
+    'diff': bench_diff,
+    'sources': bench_sources,
+    'scheduler': bench_scheduler,
+    'profiling': bench_profiling,
+    'replay': bench_replay,
+    'alerts': bench_alerts,
+    'smoothing': bench_smoothing,
+    'scenarios': bench_scenarios,
+    'universes': bench_universes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='QuiltyStock 벤치마크')
+    parser.add_argument('names', nargs='*', help=f"실행할 벤치마크 {list(BENCHMARKS)} (기본: 전체)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"알 수 없는 벤치마크: {unknown}")
+
+    sys.path.insert(0, ROOT)
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
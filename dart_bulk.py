@@ -0,0 +1,289 @@
+"""
+OpenDART 재무정보 일괄 파일 변환 (data_sources.py 의 'dart' 소스)
+
+OpenDART '재무정보 일괄다운로드' 는 보고서(1분기 / 반기 / 3분기 / 사업보고서)마다
+전 상장사의 재무상태표 / 손익계산서 / 현금흐름표를 탭 구분 텍스트(cp949)로 준다.
+내려받은 zip / txt 파일들을 한 번에 읽어서
+
+    1. 필요한 XBRL 항목코드 행만 청크 단위로 걸러서 (종목, 기간, 계정, 구분, 값) 사실(fact)로 저장
+       cache/dart/facts.csv.gz   (새 파일을 넣을 때마다 누적, 같은 사실은 최신 보고서 값 사용)
+    2. 누적값(YTD)을 분기값으로 풀고 단위를 억원으로 맞춘 표준 스키마로 저장
+       cache/dart/statements.csv.gz   (종목 x 기간 x 계정, 전 종목이 파일 하나)
+
+로 만든다. 점수 산출 때는 statements.csv.gz 한 파일만 읽으면 되므로 종목마다
+FnGuide 페이지를 받지 않는다.
+
+    python dart_bulk.py ingest ~/Downloads/2024_*.zip
+    python quiltystock.py collect --source dart
+"""
+
+import argparse
+import csv
+import io
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from data_cache import CACHE_DIR
+from data_sources import ACCOUNTS, FLOW_ACCOUNTS, PER_SHARE_ACCOUNTS, STOCK_ACCOUNTS, Statements
+from profiling import profiled
+
+DART_DIR = os.path.join(CACHE_DIR, 'dart')
+FACTS_PATH = os.path.join(DART_DIR, 'facts.csv.gz')
+STATEMENTS_PATH = os.path.join(DART_DIR, 'statements.csv.gz')
+
+ENCODING = 'cp949'
+CHUNK_ROWS = 200_000
+UNIT = 1e8  # 원 -> 억원 (FnGuide 와 같은 단위)
+
+# XBRL 항목코드 (접두어 ifrs-full_ / ifrs_ / dart_ 제외) -> 표준 계정
+DART_ITEMS = {
+    'Revenue': 'Revenue',
+    'CostOfSales': 'COGS',
+    'GrossProfit': 'GrossProfit',  # 매출원가가 없으면 매출액 - 매출총이익
+    'OperatingIncomeLoss': 'OpProfit',
+    'ProfitLoss': 'NetIncome',
+    'InterestExpense': 'InterestExpense',
+    'FinanceCosts': 'FinanceCost',
+    'BasicEarningsLossPerShare': 'EPS',
+    'CashFlowsFromUsedInOperatingActivities': 'OperatingCF',
+    'DividendsPaidClassifiedAsFinancingActivities': 'DividendsPaid',
+    'Assets': 'TotalAssets',
+    'Equity': 'TotalEquity',
+    'Liabilities': 'TotalLiabilities',
+    'CurrentAssets': 'CurrentAssets',
+    'CurrentLiabilities': 'CurrentLiabilities',
+    'CashAndCashEquivalents': 'Cash',
+}
+ITEM_PREFIX = r'^(?:ifrs-full|ifrs|dart)_'
+
+FACT_COLS = ['Code', 'Name', 'Variant', 'FYMonth', 'Period', 'Account', 'Kind', 'Value', 'Asof']
+STATEMENT_COLS = ['Code', 'Name', 'Variant', 'Freq', 'Period'] + ACCOUNTS
+
+
+# ---------------------------------------------------------
+# 1. 파일 -> 사실 (스트리밍)
+# ---------------------------------------------------------
+def _period(month_index):
+    """연*12+월(0부터) -> 'YYYY/MM'"""
+    years, months = np.divmod(month_index, 12)
+    return pd.Series(years).astype(str).str.cat(pd.Series(months + 1).astype(str).str.zfill(2), sep='/').values
+
+
+def _value_columns(columns):
+    """'당기 1분기 3개월', '전기말', '전전기' 같은 금액 컬럼 -> {컬럼: (몇 기 전, 중간기 여부, 3개월 여부)}"""
+    out = {}
+    for col in columns:
+        name = str(col).strip()
+        for offset, prefix in ((2, '전전기'), (1, '전기'), (0, '당기')):
+            if name.startswith(prefix):
+                out[col] = (offset, '분기' in name or '반기' in name, '3개월' in name)
+                break
+    return out
+
+
+def _chunk_facts(chunk):
+    """일괄 파일 한 청크 -> 사실 데이터프레임 (필요한 항목코드 행만)"""
+    item = chunk['항목코드'].astype(str).str.strip().str.replace(ITEM_PREFIX, '', regex=True)
+    keep = item.isin(DART_ITEMS.keys())
+    chunk, item = chunk[keep], item[keep]
+    if chunk.empty:
+        return None
+
+    kind_text = chunk['재무제표종류'].astype(str)
+    statement = np.select([kind_text.str.contains('재무상태표'), kind_text.str.contains('현금흐름'),
+                           kind_text.str.contains('손익')], ['BS', 'CF', 'IS'], '')
+    report_date = pd.to_datetime(chunk['결산기준일'].astype(str).str.strip(), errors='coerce')
+    fy_month = pd.to_numeric(chunk['결산월'], errors='coerce').fillna(12).astype(int).to_numpy()
+    month_index = (report_date.dt.year * 12 + report_date.dt.month - 1).to_numpy()
+    annual_report = chunk['보고서종류'].astype(str).str.contains('사업').to_numpy()
+    # 중간 보고서의 '전기' / '전전기' 는 직전 / 그 전 회계연도말 잔액 / 연간 손익
+    since_fy_end = (report_date.dt.month.to_numpy() - fy_month) % 12
+    prior_fy_end = month_index - np.where(since_fy_end == 0, 12, since_fy_end)
+
+    base = pd.DataFrame({
+        'Code': chunk['종목코드'].astype(str).str.strip('[] ').values,
+        'Name': chunk['회사명'].astype(str).str.strip().values if '회사명' in chunk else '',
+        'Variant': np.where(kind_text.str.contains('연결'), 'consolidated', 'separate'),
+        'FYMonth': fy_month,
+        'Account': item.map(DART_ITEMS).values,
+        'Statement': statement,
+        'Asof': month_index,
+    })
+    valid = (base['Statement'] != '').to_numpy() & ~np.isnan(month_index)
+
+    frames = []
+    for col, (offset, interim, three_months) in _value_columns(chunk.columns).items():
+        values = pd.to_numeric(chunk[col].astype(str).str.replace(',', '').str.strip(), errors='coerce').to_numpy()
+        if interim or offset == 0:
+            period = month_index - 12 * offset
+        else:
+            period = np.where(annual_report, month_index - 12 * offset, prior_fy_end - 12 * (offset - 1))
+        kind = np.where(base['Statement'] == 'BS', 'bal', '3m' if three_months else 'ytd')
+        mask = valid & ~np.isnan(values)
+        frames.append(base[mask].assign(Period=period[mask].astype(int), Kind=kind[mask], Value=values[mask]))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def _open_members(path):
+    """zip 안의 txt / tsv 파일 또는 txt 파일 하나 -> (이름, 텍스트 스트림)"""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for member in archive.namelist():
+                if member.lower().endswith(('.txt', '.tsv')):
+                    with archive.open(member) as raw:
+                        yield member, io.TextIOWrapper(raw, encoding=ENCODING, errors='replace')
+    else:
+        with open(path, encoding=ENCODING, errors='replace') as f:
+            yield os.path.basename(path), f
+
+
+def read_facts(paths, chunk_rows=CHUNK_ROWS):
+    """일괄 파일들을 청크 단위로 읽어서 사실 데이터프레임 하나로 (파일 순서 = 우선순위)"""
+    frames = []
+    for path in paths:
+        for member, stream in _open_members(path):
+            reader = pd.read_csv(stream, sep='\t', dtype=str, chunksize=chunk_rows, quoting=csv.QUOTE_NONE,
+                                 on_bad_lines='skip', index_col=False)
+            n_facts = 0
+            for chunk in reader:
+                chunk.columns = [str(c).strip() for c in chunk.columns]
+                facts = _chunk_facts(chunk)
+                if facts is not None:
+                    frames.append(facts)
+                    n_facts += len(facts)
+            print(f"  {member}: {n_facts:,}개 항목")
+    if not frames:
+        return pd.DataFrame(columns=FACT_COLS)
+    return pd.concat(frames, ignore_index=True)[FACT_COLS]
+
+
+def merge_facts(existing, new):
+    """같은 (종목, 구분, 기간, 계정, 값 구분) 은 최신 보고서(정정 / 재작성 반영) 값 사용"""
+    facts = pd.concat([existing, new], ignore_index=True) if existing is not None and len(existing) else new
+    facts = facts.sort_values('Asof', kind='stable')
+    return facts.drop_duplicates(subset=['Code', 'Variant', 'Period', 'Account', 'Kind'], keep='last')
+
+
+# ---------------------------------------------------------
+# 2. 사실 -> 표준 스키마
+# ---------------------------------------------------------
+def build_statements(facts):
+    """
+    사실 -> 분기 / 연간 표준 스키마 (긴 형식 한 장, Freq = 'Q' / 'A')
+
+    분기 손익 = 3개월 값, 없으면 누적값 - 직전 분기 누적값 (회계연도 첫 분기는 누적값 그대로).
+    연간 손익 = 회계연도말 누적값, 잔액 = 분기말 / 연말 값.
+    """
+    if facts.empty:
+        return pd.DataFrame(columns=STATEMENT_COLS)
+    keys = ['Code', 'Variant', 'Account', 'Period']
+    wide = facts.pivot_table(index=keys, columns='Kind', values='Value', aggfunc='last')
+    wide = wide.reindex(columns=['3m', 'ytd', 'bal'])
+    meta = facts.groupby(['Code', 'Variant']).agg(Name=('Name', 'last'), FYMonth=('FYMonth', 'last'))
+    wide = wide.reset_index().join(meta, on=['Code', 'Variant'])
+    wide['Name'] = wide['Name'].fillna('')
+
+    month = wide['Period'].to_numpy() % 12 + 1
+    quarter = ((month - wide['FYMonth'].to_numpy() - 1) % 12) // 3 + 1  # 회계연도 내 분기 (1~4)
+    # 직전 분기 누적값 (같은 종목 / 계정, 3개월 전)
+    previous = wide[keys + ['ytd']].assign(Period=wide['Period'] + 3).rename(columns={'ytd': 'prev_ytd'})
+    wide = wide.merge(previous, on=keys, how='left')
+    from_ytd = np.where(quarter == 1, wide['ytd'], wide['ytd'] - wide['prev_ytd'])
+    wide['Q'] = wide['bal'].fillna(wide['3m']).fillna(pd.Series(from_ytd, index=wide.index))
+    wide['A'] = np.where(quarter == 4, wide['bal'].fillna(wide['ytd']), np.nan)
+
+    frames = []
+    for freq in ('Q', 'A'):
+        table = wide.pivot_table(index=['Code', 'Name', 'Variant', 'Period'], columns='Account',
+                                 values=freq, aggfunc='last').reset_index()
+        frames.append(table.assign(Freq=freq))
+    out = pd.concat(frames, ignore_index=True).reindex(columns=STATEMENT_COLS + ['GrossProfit'])
+    out = out[out[ACCOUNTS + ['GrossProfit']].notna().any(axis=1)]
+
+    # 매출원가가 없는 종목(성격별 손익계산서)은 매출총이익으로 보충
+    out['COGS'] = out['COGS'].fillna(out['Revenue'] - out['GrossProfit'])
+    amounts = [acc for acc in FLOW_ACCOUNTS + STOCK_ACCOUNTS if acc not in PER_SHARE_ACCOUNTS]
+    out[amounts] = out[amounts] / UNIT
+    out['Period'] = _period(out['Period'].to_numpy().astype(int))
+    return out[STATEMENT_COLS].sort_values(['Code', 'Variant', 'Freq', 'Period']).reset_index(drop=True)
+
+
+@profiled('dart_ingest')
+def ingest(paths, facts_path=FACTS_PATH, statements_path=STATEMENTS_PATH):
+    """
+    일괄 파일을 사실 파일에 누적하고 표준 스키마 파일을 다시 만듦
+
+    Args:
+        paths: OpenDART 일괄 다운로드 zip / txt 경로 목록 (오래된 보고서부터)
+    """
+    existing = pd.read_csv(facts_path, dtype={'Code': str}) if os.path.exists(facts_path) else None
+    facts = merge_facts(existing, read_facts(paths))
+    statements = build_statements(facts)
+
+    os.makedirs(os.path.dirname(facts_path) or '.', exist_ok=True)
+    for frame, path in ((facts, facts_path), (statements, statements_path)):
+        tmp_path = path + '.tmp'
+        frame.to_csv(tmp_path, index=False, encoding='utf-8', compression='gzip')
+        os.replace(tmp_path, path)
+    print(f"✅ {statements['Code'].nunique():,}개 종목, {len(statements):,}개 기간 -> {statements_path}")
+    return statements
+
+
+# ---------------------------------------------------------
+# 3. 어댑터
+# ---------------------------------------------------------
+class DartBulkSource:
+    """statements.csv.gz 를 한 번 읽어서 종목별 Statements 를 메모리에서 꺼냄"""
+
+    name = 'dart'
+    network = False
+
+    def __init__(self, path=STATEMENTS_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} 가 없습니다 (python dart_bulk.py ingest <일괄 파일> 먼저 실행)")
+        frame = pd.read_csv(path, dtype={'Code': str, 'Period': str})
+        frame['Code'] = frame['Code'].str.zfill(6)
+        self.frame = frame.sort_values(['Code', 'Variant', 'Freq', 'Period'], kind='stable').reset_index(drop=True)
+        self.rows = self.frame.groupby('Code').indices
+        self.path = path
+
+    def codes(self):
+        return sorted(self.rows)
+
+    def statements(self, code):
+        if code not in self.rows:
+            raise KeyError(f"일괄 파일에 없는 종목: {code}")
+        rows = self.frame.iloc[self.rows[code]]
+        # 연결 재무제표가 없는 종목(종속회사 없음)은 별도 재무제표 사용
+        variant = 'consolidated' if (rows['Variant'] == 'consolidated').any() else 'separate'
+        rows = rows[rows['Variant'] == variant]
+        quarterly = rows[rows['Freq'] == 'Q'].set_index('Period')[ACCOUNTS]
+        annual = rows[rows['Freq'] == 'A'].set_index('Period')[ACCOUNTS]
+        return Statements(code, variant, quarterly, annual, {}, None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='OpenDART 재무정보 일괄 파일 변환')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('ingest', help='zip / txt 파일을 표준 스키마로 변환 (누적)')
+    p.add_argument('paths', nargs='+', help='일괄 다운로드 파일 (오래된 보고서부터)')
+    p = sub.add_parser('show', help='종목 하나의 표준 스키마 출력')
+    p.add_argument('code')
+    args = parser.parse_args(argv)
+
+    if args.command == 'ingest':
+        return ingest(args.paths)
+    statements = DartBulkSource().statements(args.code.zfill(6))
+    print(f"[{statements.code}] {statements.variant}")
+    print(statements.quarterly.dropna(axis=1, how='all').to_string())
+    print(statements.annual.dropna(axis=1, how='all').to_string())
+    return statements
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+FnGuide 페이지 / KRX 종목 목록 캐시
+
+같은 날 같은 종목 페이지는 한 번만 받고, 받은 HTML 은 날짜별로 보관한다.
+보관된 과거 페이지는 분기 원장(quarterly_ledger.py) 재구성에 사용된다.
+
+    cache/pages/{kind}/{code}/{YYYYMMDD}.html.gz
+    cache/listing_{market}.csv
+
+실행 기록 / 재생(run_archive.py) 중에는 ARCHIVE 가 응답을 저장하거나 대신 돌려준다.
+requests / pandas / FinanceDataReader 는 실제로 네트워크가 필요할 때만 import 한다.
+"""
+
+import gzip
+import io
+import os
+import time
+from datetime import datetime
+
+CACHE_DIR = os.environ.get('QUILTY_CACHE_DIR', 'cache')
+PAGE_DIR = os.path.join(CACHE_DIR, 'pages')
+# 로컬 가짜 서버(fake_servers.FakeFnGuideServer)로 바꿔서 수집 속도 조절을 시험할 수 있다
+FNGUIDE_HOST = os.environ.get('QUILTY_FNGUIDE_HOST', 'http://comp.fnguide.com')
+# 실행 기록 / 재생 중인 run_archive.RunArchive (fetch_page / get_stock_listing / 분기 원장이 거쳐 감)
+ARCHIVE = None
+
+# kind -> URL 템플릿 (ReportGB: D = 연결, B = 별도)
+FNGUIDE_URLS = {
+    'finance': "{host}/SVO2/ASP/SVD_Finance.asp?pGB=1&cID=&MenuYn=Y&ReportGB=D&NewMenuID=103&stkGb=701&gicode={firm_code}",
+    'finance_separate': "{host}/SVO2/ASP/SVD_Finance.asp?pGB=1&cID=&MenuYn=Y&ReportGB=B&NewMenuID=103&stkGb=701&gicode={firm_code}",
+    'ratio': "{host}/SVO2/ASP/SVD_FinanceRatio.asp?pGB=1&gicode={firm_code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=104&stkGb=701",
+}
+
+
+def fnguide_url(kind, code, host=None):
+    return FNGUIDE_URLS[kind].format(host=(host or FNGUIDE_HOST).rstrip('/'), firm_code='A' + code)
+
+
+def page_path(kind, code, date=None):
+    date = date or datetime.now()
+    return os.path.join(PAGE_DIR, kind, code, f"{date.strftime('%Y%m%d')}.html.gz")
+
+
+def fetch_page(kind, code, timeout=10, use_cache=True, scheduler=None, retries=2):
+    """
+    FnGuide 페이지 HTML 반환 (오늘 받은 페이지가 있으면 캐시 사용)
+
+    Args:
+        kind: 'finance' / 'finance_separate' / 'ratio'
+        code: 종목코드 (6자리)
+        scheduler: fetch_scheduler.AdaptiveScheduler (동시 요청 수 제한, 없으면 바로 요청)
+        retries: scheduler 가 있을 때 타임아웃 / 429 / 5xx 재시도 횟수 (scheduler 의 대기 후)
+    """
+    if ARCHIVE is not None:
+        return ARCHIVE.page(kind, code, lambda: _fetch_page(kind, code, timeout, use_cache, scheduler, retries))
+    return _fetch_page(kind, code, timeout, use_cache, scheduler, retries)
+
+
+def _fetch_page(kind, code, timeout, use_cache, scheduler, retries):
+    path = page_path(kind, code)
+    if use_cache and os.path.exists(path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    import requests
+
+    if scheduler is None:
+        page = requests.get(fnguide_url(kind, code), timeout=timeout)
+        page.raise_for_status()
+    else:
+        page = _scheduled_get(fnguide_url(kind, code), timeout, scheduler, retries)
+    html = page.text
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        f.write(html)
+    os.replace(tmp_path, path)
+    return html
+
+
+def _scheduled_get(url, timeout, scheduler, retries):
+    """scheduler 슬롯 안에서 요청 (혼잡 신호면 scheduler.backoff 만큼 기다렸다가 재시도)"""
+    import requests
+
+    from fetch_scheduler import THROTTLE_STATUS
+
+    for attempt in range(retries + 1):
+        try:
+            with scheduler.slot() as outcome:
+                page = requests.get(url, timeout=timeout)
+                outcome.status = page.status_code
+                retry_after = page.headers.get('Retry-After', '')
+                outcome.retry_after = float(retry_after) if retry_after.isdigit() else None
+        except (requests.Timeout, requests.ConnectionError):
+            if attempt == retries:
+                raise
+        else:
+            if page.status_code not in THROTTLE_STATUS or attempt == retries:
+                page.raise_for_status()
+                return page
+        time.sleep(scheduler.backoff)
+
+
+def list_cached_pages(kind, code):
+    """보관된 페이지 목록 [(날짜, 경로), ...] (날짜 오름차순)"""
+    code_dir = os.path.join(PAGE_DIR, kind, code)
+    if not os.path.isdir(code_dir):
+        return []
+    pages = []
+    for fname in os.listdir(code_dir):
+        if fname.endswith('.html.gz'):
+            pages.append((datetime.strptime(fname[:8], '%Y%m%d'), os.path.join(code_dir, fname)))
+    return sorted(pages)
+
+
+def read_cached_page(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def cached_codes(kind='finance'):
+    """페이지 캐시에 있는 종목코드 목록"""
+    kind_dir = os.path.join(PAGE_DIR, kind)
+    if not os.path.isdir(kind_dir):
+        return []
+    return sorted(os.listdir(kind_dir))
+
+
+# ---------------------------------------------------------
+# KRX 종목 목록 (FinanceDataReader.StockListing 캐시)
+# ---------------------------------------------------------
+def listing_path(market):
+    return os.path.join(CACHE_DIR, f'listing_{market}.csv')
+
+
+def get_stock_listing(market='KRX', max_age_hours=12):
+    """
+    종목 목록 반환 (max_age_hours 이내에 받은 목록이 있으면 캐시 사용)
+
+    Args:
+        market: 'KRX' / 'KOSPI' / 'KOSDAQ' / 'KONEX' 등 StockListing 인자
+    """
+    import pandas as pd
+
+    if ARCHIVE is not None:
+        # 기록 / 재생 모두 CSV 로 한 번 저장했다 읽은 목록을 써야 dtype 까지 같다
+        return pd.read_csv(io.BytesIO(ARCHIVE.listing(market, lambda: _listing_csv(market, max_age_hours))),
+                           dtype={'Code': str})
+    return _get_stock_listing(market, max_age_hours)
+
+
+def _get_stock_listing(market, max_age_hours):
+    import pandas as pd
+
+    path = listing_path(market)
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_hours * 3600:
+        return pd.read_csv(path, dtype={'Code': str})
+
+    import FinanceDataReader as fdr
+
+    listing = fdr.StockListing(market)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    listing.to_csv(path, index=False, encoding='utf-8-sig')
+    return listing
+
+
+def _listing_csv(market, max_age_hours):
+    """종목 목록 CSV 바이트 (캐시를 갱신한 뒤 파일 그대로)"""
+    _get_stock_listing(market, max_age_hours)
+    with open(listing_path(market), 'rb') as f:
+        return f.read()
+
+
+def attach_names(df, market='KRX'):
+    """
+    Code 컬럼 기준으로 종목명(Name) 컬럼 추가
+
+    이미 Name 이 있으면 그대로 두고, 목록 조회가 실패하면 Code 를 이름으로 사용한다.
+    """
+    df['Code'] = df['Code'].astype(str).str.replace(r'\.0$', '', regex=True).str.zfill(6)
+    if 'Name' in df.columns:
+        return df
+    try:
+        listing = get_stock_listing(market)
+        names = dict(zip(listing['Code'].astype(str).str.zfill(6), listing['Name']))
+        df['Name'] = df['Code'].map(names).fillna(df['Code'])
+    except Exception as e:
+        print(f"⚠ 종목명 조회 실패 (종목코드로 대체): {e}")
+        df['Name'] = df['Code']
+    return df
+
+
+def attach_sectors(df, market='KRX-DESC'):
+    """
+    Code 컬럼 기준으로 업종(Sector) 컬럼 추가 (KRX-DESC 목록 사용)
+
+    이미 Sector 가 있으면 그대로 두고, 목록 조회가 실패하면 빈 값으로 둔다.
+    """
+    if 'Sector' in df.columns:
+        return df
+    try:
+        listing = get_stock_listing(market)
+        sectors = dict(zip(listing['Code'].astype(str).str.zfill(6), listing['Sector']))
+        df['Sector'] = df['Code'].astype(str).str.zfill(6).map(sectors)
+    except Exception as e:
+        print(f"⚠ 업종 조회 실패: {e}")
+        df['Sector'] = None
+    return df
@@ -0,0 +1,231 @@
+"""
+데이터 품질 게이트 (점수 산출 / 업로드 전 검증)
+
+FnGuide 페이지 구조가 바뀌면 파싱은 실패하지 않고 기본값(Debt_Ratio 100,
+안정성 0, 발생액 0)이나 엉뚱한 행('자산' 부분 일치)이 채워진 채로 점수가
+계산된다. 이 모듈은 21개 지표 전체를 (종목, 지표) 배열 하나로 만들어
+한 번에 검사한다.
+
+    1. 범위    : 지표별 허용 범위를 벗어나거나 inf
+    2. 결측률  : 종목별 결측 지표 수, 지표별 결측(+기본값) 비율
+    3. 일간 변화: 직전 스냅샷 대비 횡단면 표준편차의 JUMP_SIGMA 배 이상 변화
+    4. 정합성  : 자본비율 vs 부채비율, ROA vs ROE x 자본비율
+
+문제 종목은 격리(quarantine) 파일로 빼고 나머지로 점수를 계산한다.
+격리 비율이 max_failure_rate 를 넘거나 지표 하나가 통째로 깨졌으면
+DataQualityError 를 발생시켜 스냅샷 저장 / 업로드를 중단한다.
+"""
+
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scoring import CATEGORIES, DESCRIPTOR_COLS
+from factor_store import HISTORY_DIR, load_latest_snapshot, normalize_codes
+from profiling import profiled
+
+QUARANTINE_DIR = os.path.join(HISTORY_DIR, 'quarantine')
+
+# 지표별 허용 범위 (단위: quality_analysis_ttm.py 계산식 기준, % 지표는 %)
+RANGES = {
+    'ROE': (-500, 500),
+    'ROA': (-200, 200),
+    'ROIC': (-500, 500),
+    'Operating_Margin': (-5000, 100),
+    'Gross_Margin': (-500, 100),
+    'Revenue_Stability': (0, 10),          # 1 / (std + 0.1) <= 10
+    'OpProfit_Stability': (0, 10),
+    'NetIncome_Stability': (0, 10),
+    'EPS_Stability': (0, 10),
+    'Dividend_Stability': (0, 10),
+    'Debt_Ratio': (0, 50000),
+    'Interest_Coverage': (-1e5, 1e5),
+    'Current_Ratio': (0, 1e5),
+    'Equity_Ratio': (-500, 100),
+    'ROE_Improvement': (-1e4, 1e4),
+    'ROA_Improvement': (-1e4, 1e4),
+    'Operating_Margin_Improvement': (-1e5, 1e5),
+    'Gross_Margin_Improvement': (-1e4, 1e4),
+    'Accruals': (0, 1e4),
+    'Net_Operating_Assets': (-10, 10),
+    'Earnings_Smoothness': (0, 1e3),
+}
+
+# 파싱 실패 시 채워지는 기본값 (scoring.CATEGORIES 의 숫자 대체값과 동일)
+SILENT_DEFAULTS = {col: fill for _, cols, _ in CATEGORIES for col, fill in cols if fill != 'median'}
+
+MAX_MISSING_PER_ROW = 8        # 종목별 결측 지표 수 상한
+MAX_COLUMN_MISSING = 0.6       # 지표별 결측 + 기본값 비율 상한 (넘으면 페이지 구조 변경 의심)
+# 원래 기본값 비율이 높은 지표 (ROA 개선은 분기 원장이 쌓이기 전까지 proxy 가 없어 0, 무배당 종목은 배당 안정성 0)
+COLUMN_MISSING_LIMITS = {'ROA_Improvement': 1.0, 'Dividend_Stability': 0.9}
+MAX_COLUMN_OUT_OF_RANGE = 0.1  # 지표별 범위 이탈 비율 상한
+JUMP_SIGMA = 5.0               # 일간 변화 허용폭 (직전 스냅샷 횡단면 표준편차 배수)
+MAX_JUMPS_PER_ROW = 4          # 종목별 급변 지표 수 상한
+MAX_COLUMN_JUMP_RATE = 0.3     # 지표별 급변 종목 비율 상한
+CONSISTENCY_TOL = 5.0          # 정합성 허용 오차 (%p)
+MAX_FAILURE_RATE = 0.2         # 격리 비율 상한 (넘으면 중단)
+
+ValidationResult = namedtuple('ValidationResult', ['clean', 'quarantine', 'column_issues', 'failure_rate'])
+
+
+class DataQualityError(RuntimeError):
+    """격리 비율 초과 또는 지표 전체 이상 (업로드 중단)"""
+
+    def __init__(self, message, result):
+        super().__init__(message)
+        self.result = result
+
+
+def _matrix(df, columns=DESCRIPTOR_COLS):
+    """데이터프레임 -> (종목, 지표) float 배열 (없는 컬럼은 NaN)"""
+    return df.reindex(columns=columns).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+
+def _bounds(columns=DESCRIPTOR_COLS):
+    lo = np.array([RANGES.get(col, (-np.inf, np.inf))[0] for col in columns], dtype=float)
+    hi = np.array([RANGES.get(col, (-np.inf, np.inf))[1] for col in columns], dtype=float)
+    return lo, hi
+
+
+def _defaults(columns=DESCRIPTOR_COLS):
+    return np.array([SILENT_DEFAULTS.get(col, np.nan) for col in columns], dtype=float)
+
+
+def _jumps(values, codes, previous):
+    """직전 스냅샷과 같은 종목끼리 비교해서 급변 셀 마스크 (N, F)"""
+    if previous is None or previous.empty:
+        return np.zeros(values.shape, dtype=bool)
+    prev = previous.assign(Code=normalize_codes(previous['Code'])).drop_duplicates(subset=['Code'])
+    prev_values = _matrix(prev.set_index('Code').reindex(codes))
+    with np.errstate(invalid='ignore'):
+        scale = np.nanstd(_matrix(prev), axis=0, ddof=1) if len(prev) > 1 else np.full(values.shape[1], np.nan)
+        jump = np.abs(values - prev_values) > JUMP_SIGMA * scale
+    return jump & (scale > 0)
+
+
+def _consistency(values):
+    """지표 간 정합성 위반 마스크 (N,)"""
+    col = {c: i for i, c in enumerate(DESCRIPTOR_COLS)}
+    roe, roa = values[:, col['ROE']], values[:, col['ROA']]
+    debt, equity = values[:, col['Debt_Ratio']], values[:, col['Equity_Ratio']]
+    with np.errstate(all='ignore'):
+        # 부채총계/자본총계/자산총계가 같은 행에서 나왔다면 자본비율 = 100 / (1 + 부채비율/100)
+        expected_equity = 100 / (1 + debt / 100)
+        bad_equity = (np.abs(equity - expected_equity) > CONSISTENCY_TOL) & (debt != SILENT_DEFAULTS['Debt_Ratio'])
+        # ROA = ROE x 자본비율
+        bad_roa = np.abs(roa - roe * equity / 100) > CONSISTENCY_TOL
+    return bad_equity, bad_roa
+
+
+def _reasons(masks, n_rows):
+    """{사유: (N,) 또는 (N, F) 마스크} -> 종목별 사유 문자열"""
+    reasons = [[] for _ in range(n_rows)]
+    for label, mask in masks.items():
+        if mask.ndim == 1:
+            for i in np.flatnonzero(mask):
+                reasons[i].append(label)
+        else:
+            rows, cols = np.nonzero(mask)
+            for i, j in zip(rows, cols):
+                reasons[i].append(f'{label}:{DESCRIPTOR_COLS[j]}')
+    return ['; '.join(r) for r in reasons]
+
+
+def validate(df, previous=None):
+    """
+    21개 지표 일괄 검증
+
+    Args:
+        df: Code + 21개 지표 데이터프레임 (수집 결과)
+        previous: 직전 스냅샷 (일간 변화 검사용, None 이면 생략)
+
+    Returns:
+        ValidationResult(clean, quarantine, column_issues, failure_rate)
+        quarantine 은 원본 행 + Quality_Issues 컬럼, column_issues 는 {지표: 사유}
+    """
+    codes = normalize_codes(df['Code'])
+    values = _matrix(df)
+    n_rows = len(df)
+    missing = np.isnan(values)
+
+    lo, hi = _bounds()
+    with np.errstate(invalid='ignore'):
+        out_of_range = ~missing & ((values < lo) | (values > hi) | np.isinf(values))
+    defaulted = values == _defaults()
+    jump = _jumps(values, codes, previous)
+    bad_equity, bad_roa = _consistency(values)
+
+    too_many_missing = missing.sum(axis=1) > MAX_MISSING_PER_ROW
+    too_many_jumps = jump.sum(axis=1) >= MAX_JUMPS_PER_ROW
+    bad_row = out_of_range.any(axis=1) | too_many_missing | too_many_jumps | bad_equity | bad_roa
+
+    column_issues = {}
+    if n_rows:
+        missing_rate = (missing | defaulted).mean(axis=0)
+        jump_rate = jump.mean(axis=0)
+        range_rate = out_of_range.mean(axis=0)
+        for j, col in enumerate(DESCRIPTOR_COLS):
+            if col not in df.columns:
+                column_issues[col] = '컬럼 없음'
+            elif missing_rate[j] > COLUMN_MISSING_LIMITS.get(col, MAX_COLUMN_MISSING):
+                column_issues[col] = f'결측/기본값 {missing_rate[j]:.0%}'
+            elif jump_rate[j] > MAX_COLUMN_JUMP_RATE:
+                column_issues[col] = f'일간 급변 {jump_rate[j]:.0%}'
+            elif range_rate[j] > MAX_COLUMN_OUT_OF_RANGE:
+                column_issues[col] = f'범위 이탈 {range_rate[j]:.0%}'
+
+    quarantine = df.loc[bad_row].copy()
+    if bad_row.any():
+        masks = {'범위': out_of_range, '결측': too_many_missing, '급변': jump & too_many_jumps[:, None],
+                 '자본비율': bad_equity, 'ROA': bad_roa}
+        reasons = _reasons({k: m[bad_row] for k, m in masks.items()}, int(bad_row.sum()))
+        quarantine['Quality_Issues'] = reasons
+
+    failure_rate = float(bad_row.mean()) if n_rows else 0.0
+    return ValidationResult(df.loc[~bad_row].copy(), quarantine, column_issues, failure_rate)
+
+
+def quarantine_path(run_date=None):
+    return os.path.join(QUARANTINE_DIR, f"quarantine_{(run_date or datetime.now()).strftime('%Y%m%d')}.csv")
+
+
+def print_summary(result):
+    total = len(result.clean) + len(result.quarantine)
+    print(f"[데이터 품질] {total}개 종목 중 {len(result.quarantine)}개 격리 ({result.failure_rate:.1%})")
+    for col, reason in result.column_issues.items():
+        print(f"  ⚠ {col}: {reason}")
+    if len(result.quarantine):
+        print(result.quarantine[['Code', 'Quality_Issues']].head(10).to_string(index=False))
+
+
+@profiled('quality_gate')
+def gate(df, max_failure_rate=MAX_FAILURE_RATE, previous='latest', save=True):
+    """
+    검증 후 통과한 행만 반환 (격리 행은 quarantine 파일로 저장)
+
+    Args:
+        df: 수집 결과 데이터프레임
+        max_failure_rate: 격리 비율 상한 (넘으면 DataQualityError)
+        previous: 직전 스냅샷 데이터프레임, 'latest' 면 오늘 이전 최근 스냅샷, None 이면 일간 검사 생략
+        save: 격리 행을 history/quarantine/quarantine_YYYYMMDD.csv 로 저장
+    """
+    if isinstance(previous, str) and previous == 'latest':
+        _, previous = load_latest_snapshot(before=pd.Timestamp(datetime.now().date()))
+
+    result = validate(df, previous)
+    print_summary(result)
+
+    if save and len(result.quarantine):
+        os.makedirs(QUARANTINE_DIR, exist_ok=True)
+        path = quarantine_path()
+        result.quarantine.to_csv(path, index=False, encoding='utf-8-sig')
+        print(f"  격리 종목 저장: {path}")
+
+    if result.column_issues:
+        raise DataQualityError(f"지표 이상 (페이지 구조 변경 의심): {', '.join(result.column_issues)}", result)
+    if result.failure_rate > max_failure_rate:
+        raise DataQualityError(f"격리 비율 {result.failure_rate:.1%} > 허용 {max_failure_rate:.1%}", result)
+    return result.clean
@@ -0,0 +1,168 @@
+"""
+재무 데이터 소스 어댑터
+
+get_quality_factors_ttm() 은 소스가 무엇이든 같은 표준 계정 스키마(Statements)를
+받아서 21개 지표를 계산한다. 소스별 어댑터는 원본 형식을 이 스키마로 옮기는
+일만 한다.
+
+    fnguide : 종목별 FnGuide 재무제표 / 재무비율 페이지 2~3개 (data_cache 캐시)
+    dart    : 내려받아 둔 OpenDART 재무정보 일괄 파일(zip / txt)을 한 번에 변환한
+              cache/dart/statements.csv.gz (dart_bulk.py)
+
+표준 스키마 (단위: 억원, 주당 항목은 원)
+    quarterly : index=분기('YYYY/MM'), 분기 손익 / 분기말 잔액
+    annual    : index=회계연도말('YYYY/MM'), 연간 손익 / 연말 잔액 (결산월 컬럼만)
+    ratios    : 소스가 직접 주는 비율 (FnGuide 재무비율 페이지 최근값, 없으면 빈 dict)
+    ledger    : 분기 원장 (quarterly_ledger.py, None 이면 quarterly 로 메모리에서 생성)
+
+    source = get_source('dart')
+    statements = source.statements('005930')
+"""
+
+from collections import namedtuple
+from io import StringIO
+
+import pandas as pd
+
+from data_cache import fetch_page
+from profiling import profiled, stage
+from quarterly_ledger import row_values, update_ledger
+
+# 손익 / 현금흐름 (기간 합산) -> 재무상태 (기말 잔액) -> 연간 주당 배당
+FLOW_ACCOUNTS = ['Revenue', 'COGS', 'OpProfit', 'NetIncome', 'InterestExpense', 'FinanceCost',
+                 'OperatingCF', 'DividendsPaid', 'EPS']
+STOCK_ACCOUNTS = ['TotalAssets', 'TotalEquity', 'TotalLiabilities', 'CurrentAssets', 'CurrentLiabilities', 'Cash']
+ACCOUNTS = FLOW_ACCOUNTS + STOCK_ACCOUNTS + ['DPS']
+PER_SHARE_ACCOUNTS = ['EPS', 'DPS']
+
+# 시나리오 분석용으로 결과에 남기는 재무 항목 (compute_factors 의 Item_* 컬럼, scenarios.py)
+# 손익 / 현금흐름은 TTM 합계, 재무상태는 최근 분기말 잔액, 이자비용은 없으면 금융원가
+SCENARIO_ITEMS = ['Revenue', 'COGS', 'OpProfit', 'NetIncome', 'InterestExpense', 'OperatingCF',
+                  'TotalAssets', 'TotalEquity', 'TotalLiabilities', 'CurrentAssets', 'CurrentLiabilities', 'Cash']
+ITEM_COLS = [f'Item_{item}' for item in SCENARIO_ITEMS]
+
+# 소스가 직접 주는 비율 (계산값이 없을 때의 대체값 / 개선 지표 proxy)
+RATIO_KEYS = ['ROIC', 'Interest_Coverage', 'EPS_Growth', 'OpProfit_Growth', 'Revenue_Growth']
+
+Statements = namedtuple('Statements', ['code', 'variant', 'quarterly', 'annual', 'ratios', 'ledger'])
+
+
+def fiscal_year_ends(frame):
+    """연간 표에서 결산월 컬럼만 남김 (마지막 컬럼이 누적(YTD)인 경우 제외)"""
+    if not len(frame):
+        return frame
+    months = frame.index.str[-2:]
+    return frame[months == months.value_counts().idxmax()]
+
+
+# ---------------------------------------------------------
+# FnGuide (종목별 HTML 페이지)
+# ---------------------------------------------------------
+# 표준 계정 -> (재무제표 페이지 표 번호, 행 이름 키워드) : 0/1 손익(연간/분기), 2/3 재무상태, 4/5 현금흐름
+FNGUIDE_ROWS = {
+    'Revenue': ((0, 1), ['매출액']),
+    'COGS': ((0, 1), ['매출원가']),
+    'OpProfit': ((0, 1), ['영업이익']),
+    'NetIncome': ((0, 1), ['당기순이익']),
+    'InterestExpense': ((0, 1), ['이자비용']),
+    'FinanceCost': ((0, 1), ['금융원가']),
+    'EPS': ((0, 1), ['EPS', '주당순이익']),
+    'OperatingCF': ((4, 5), ['영업활동']),
+    'TotalAssets': ((2, 3), ['자산총계', '자산']),
+    'TotalEquity': ((2, 3), ['자본총계', '자본']),
+    'TotalLiabilities': ((2, 3), ['부채총계', '부채']),
+    'CurrentAssets': ((2, 3), ['유동자산']),
+    'CurrentLiabilities': ((2, 3), ['유동부채']),
+    'Cash': ((2, 3), ['현금및현금성자산']),
+}
+FNGUIDE_RATIOS = {
+    'ROIC': ['ROIC'],
+    'Interest_Coverage': ['이자보상배율'],
+    'EPS_Growth': ['EPS증가율'],
+    'OpProfit_Growth': ['영업이익증가율'],
+    'Revenue_Growth': ['매출액증가율'],
+}
+
+
+def _table(tables, i):
+    return tables[i].set_index(tables[i].columns[0]) if len(tables) > i else None
+
+
+def _last_value(df, keywords):
+    """keywords 를 포함하는 행의 마지막 컬럼 값 (숫자로 바뀌는 첫 행)"""
+    if df is None:
+        return None
+    for idx in df.index:
+        if any(k in str(idx) for k in keywords):
+            try:
+                return float(df.loc[idx, df.columns[-1]])
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def fnguide_statements(code, fs_tables, ratio_tables, variant='consolidated'):
+    """FnGuide 재무제표 / 재무비율 페이지 표(pd.read_html 결과) -> Statements"""
+    tables = [_table(fs_tables, i) for i in range(6)]
+    quarterly = pd.DataFrame({acc: row_values(tables[q], kw) for acc, ((_, q), kw) in FNGUIDE_ROWS.items()},
+                             columns=ACCOUNTS).sort_index()
+    annual = pd.DataFrame({acc: row_values(tables[a], kw) for acc, ((a, _), kw) in FNGUIDE_ROWS.items()},
+                          columns=ACCOUNTS).sort_index()
+
+    # 주당배당금은 재무비율 페이지 (연간)
+    ratio_df = _table(ratio_tables, 0)
+    annual = fiscal_year_ends(annual)
+    dps = fiscal_year_ends(pd.DataFrame({'DPS': row_values(ratio_df, ['주당배당금', 'DPS'])}, dtype=float).sort_index())
+    if len(dps):
+        annual = annual.reindex(annual.index.union(dps.index))
+        annual['DPS'] = dps['DPS']
+    ratios = {key: _last_value(ratio_df, keywords) for key, keywords in FNGUIDE_RATIOS.items()}
+    return Statements(code, variant, quarterly, annual, ratios, None)
+
+
+class FnGuideSource:
+    """종목마다 FnGuide 페이지를 받아서(같은 날은 캐시) 표준 스키마로 변환"""
+
+    name = 'fnguide'
+    network = True
+
+    def __init__(self, scheduler=None):
+        # 동시 요청 수 조절 (fetch_scheduler.AdaptiveScheduler, None 이면 순차 요청)
+        self.scheduler = scheduler
+
+    def _page(self, kind, code):
+        with stage('fetch_page'):
+            html = fetch_page(kind, code, scheduler=self.scheduler)
+        with stage('read_html'):
+            return pd.read_html(StringIO(html))
+
+    @profiled('fnguide_statements')
+    def statements(self, code):
+        fs_tables = self._page('finance', code)
+        variant = 'consolidated'
+        # 연결 재무제표가 없는 종목(종속회사 없음)은 별도 재무제표 사용
+        if len(fs_tables) < 2 or not any('/' in str(c) for c in fs_tables[1].columns[1:]):
+            fs_tables = self._page('finance_separate', code)
+            variant = 'separate'
+        ratio_tables = self._page('ratio', code)
+
+        statements = fnguide_statements(code, fs_tables, ratio_tables, variant)
+        # 페이지에는 4~5개 분기만 있으므로 매일 분기 원장에 누적 (TTM YoY 용)
+        return statements._replace(ledger=update_ledger(code, fs_tables, variant))
+
+
+# ---------------------------------------------------------
+# 등록된 소스
+# ---------------------------------------------------------
+SOURCES = ('fnguide', 'dart')
+
+
+def get_source(name='fnguide', **kwargs):
+    """이름으로 어댑터 생성 (dart 는 변환 파일을 읽을 때만 import)"""
+    if name == 'fnguide':
+        return FnGuideSource(**kwargs)
+    if name == 'dart':
+        from dart_bulk import DartBulkSource
+
+        return DartBulkSource(**kwargs)
+    raise ValueError(f"알 수 없는 데이터 소스: {name} (사용 가능: {', '.join(SOURCES)})")
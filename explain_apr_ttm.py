@@ -1,32 +1,26 @@
 import pandas as pd
 import numpy as np
-import requests
 from io import StringIO
 import sys
 
-def explain_apr_ttm_full():
-    code = '278470' # APR
-    name = '에이피알'
-    firm_code = 'A' + code
+from data_cache import fnguide_url, fetch_page
+
+def explain_apr_ttm_full(code='278470', name='에이피알'): # 기본: APR
     
     print(f"[{name} ({code}) 21개 퀄리티 지표 상세 분석 (Refined)]")
     print("=" * 80)
     
     # 1. Data Collection
-    fs_url = f"http://comp.fnguide.com/SVO2/ASP/SVD_Finance.asp?pGB=1&cID=&MenuYn=Y&ReportGB=D&NewMenuID=103&stkGb=701&gicode={firm_code}"
-    print(f"1. 재무제표 (Source: {fs_url})")
-    fs_page = requests.get(fs_url, timeout=10)
-    fs_tables = pd.read_html(StringIO(fs_page.text))
+    print(f"1. 재무제표 (Source: {fnguide_url('finance', code)})")
+    fs_tables = pd.read_html(StringIO(fetch_page('finance', code)))
     
     income_q = fs_tables[1].set_index(fs_tables[1].columns[0]) if len(fs_tables) > 1 else None
     balance_q = fs_tables[3].set_index(fs_tables[3].columns[0]) if len(fs_tables) > 3 else None
     cashflow_q = fs_tables[5].set_index(fs_tables[5].columns[0]) if len(fs_tables) > 5 else None
     income_a = fs_tables[0].set_index(fs_tables[0].columns[0]) if len(fs_tables) > 0 else None
     
-    ratio_url = f"http://comp.fnguide.com/SVO2/ASP/SVD_FinanceRatio.asp?pGB=1&gicode={firm_code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=104&stkGb=701"
-    print(f"2. 재무비율 (Source: {ratio_url})")
-    ratio_page = requests.get(ratio_url, timeout=10)
-    ratio_tables = pd.read_html(StringIO(ratio_page.text))
+    print(f"2. 재무비율 (Source: {fnguide_url('ratio', code)})")
+    ratio_tables = pd.read_html(StringIO(fetch_page('ratio', code)))
     ratio_df = ratio_tables[0].set_index(ratio_tables[0].columns[0]) if len(ratio_tables) > 0 else None
 
     # Debug: Print Balance Sheet Rows to find Debt items
@@ -206,9 +200,17 @@ def explain_apr_ttm_full():
     # Earnings Smoothness
     # ... (Same logic)
 
-if __name__ == "__main__":
-    with open('c:\\Users\\User\\고니\\apr_ttm_report_utf8.txt', 'w', encoding='utf-8') as f:
+def main(code='278470', name='에이피알', output_path='c:\\Users\\User\\고니\\apr_ttm_report_utf8.txt'):
+    if output_path in (None, '-'):
+        explain_apr_ttm_full(code, name)
+        return
+    with open(output_path, 'w', encoding='utf-8') as f:
         sys.stdout = f
-        explain_apr_ttm_full()
-        sys.stdout = sys.__stdout__
-    print("Report saved to apr_ttm_report_utf8.txt")
+        try:
+            explain_apr_ttm_full(code, name)
+        finally:
+            sys.stdout = sys.__stdout__
+    print(f"Report saved to {output_path}")
+
+if __name__ == "__main__":
+    main()
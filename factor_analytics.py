@@ -0,0 +1,236 @@
+"""
+팩터 IC / 감쇠 분석
+
+저장된 스냅샷(history/quality_*.csv)과 종가 캐시로 21개 디스크립터와
+카테고리 점수의 예측력을 점검한다.
+- Rank IC (날짜별 스피어만 상관) 및 IC IR / t-stat / 적중률
+- 보유 기간별 IC 감쇠 (1 / 5 / 20 / 60 거래일)
+- 팩터 자기상관 (연속 스냅샷 간 순위 상관 = 회전율 지표)
+- 팩터 간 상관 (중복 지표 확인)
+
+사용법:
+    python factor_analytics.py --horizons 1 5 20 60
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from scoring import DESCRIPTOR_COLS, CATEGORY_COLS
+from factor_store import cached_panel, load_prices, update_prices, forward_returns
+
+FACTOR_COLS = DESCRIPTOR_COLS + CATEGORY_COLS + ['Quality_Score_Total']
+DEFAULT_HORIZONS = [1, 5, 20, 60]
+REPORT_FILE = 'factor_report.md'
+IC_FILE = 'factor_ic.csv'
+
+
+def _rank(values):
+    """(N, F) 배열을 컬럼별 순위로 변환 (NaN 유지, 동점은 평균 순위)"""
+    return pd.DataFrame(values).rank().to_numpy()
+
+
+def _masked_corr(x, y):
+    """
+    NaN 을 제외한 컬럼별 피어슨 상관
+
+    Args:
+        x: (N, F) 배열
+        y: (N,) 또는 (N, F) 배열
+    """
+    if y.ndim == 1:
+        y = np.broadcast_to(y[:, None], x.shape)
+    valid = np.isfinite(x) & np.isfinite(y)
+    n = valid.sum(axis=0)
+    x = np.where(valid, x, 0.0)
+    y = np.where(valid, y, 0.0)
+    with np.errstate(all='ignore'):
+        mx = x.sum(axis=0) / n
+        my = y.sum(axis=0) / n
+        cov = (x * y).sum(axis=0) / n - mx * my
+        vx = (x * x).sum(axis=0) / n - mx ** 2
+        vy = (y * y).sum(axis=0) / n - my ** 2
+        corr = cov / np.sqrt(vx * vy)
+    # 상수 팩터(분산 0) 및 표본 부족은 NaN 처리
+    return np.where((n >= 30) & (vx > 1e-12) & (vy > 1e-12), corr, np.nan)
+
+
+# ---------------------------------------------------------
+# 1. Rank IC
+# ---------------------------------------------------------
+def rank_ic(values, returns):
+    """
+    날짜별 Rank IC
+
+    Args:
+        values: (T, N, F) 팩터 텐서
+        returns: (T, N) Forward Return
+
+    Returns:
+        (T, F) IC 배열
+    """
+    ic = np.full((values.shape[0], values.shape[2]), np.nan)
+    for t in range(values.shape[0]):
+        valid_r = np.isfinite(returns[t])
+        if valid_r.sum() < 30:
+            continue
+        # 팩터별로 팩터 / 수익률이 모두 있는 종목만으로 양쪽 순위를 매겨야 스피어만 상관과 일치
+        valid = np.isfinite(values[t]) & valid_r[:, None]
+        x = np.where(valid, values[t], np.nan)
+        r = np.where(valid, returns[t][:, None], np.nan)
+        ic[t] = _masked_corr(_rank(x), _rank(r))
+    return ic
+
+
+def ic_summary(ic):
+    """IC 배열 (T, F) -> 평균 / 표준편차 / IR / t-stat / 적중률"""
+    n = np.isfinite(ic).sum(axis=0)
+    with np.errstate(all='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(ic, axis=0)
+        std = np.nanstd(ic, axis=0, ddof=1)
+        hit = np.nansum(ic > 0, axis=0) / n
+    return pd.DataFrame({'IC_Mean': mean, 'IC_Std': std, 'IC_IR': mean / std,
+                         't_stat': mean / std * np.sqrt(n), 'Hit_Rate': hit, 'N_Dates': n})
+
+
+# ---------------------------------------------------------
+# 2. 자기상관 / 팩터 간 상관 / 커버리지
+# ---------------------------------------------------------
+def factor_autocorrelation(values):
+    """연속 스냅샷 간 팩터 순위 상관의 평균 (F,)"""
+    if values.shape[0] < 2:
+        return np.full(values.shape[2], np.nan)
+    ranks = [_rank(values[t]) for t in range(values.shape[0])]
+    ac = np.array([_masked_corr(ranks[t - 1], ranks[t]) for t in range(1, len(ranks))])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(ac, axis=0)
+
+
+def factor_correlation(values, columns):
+    """날짜별 스피어만 상관행렬의 평균 (F x F)"""
+    mats = [pd.DataFrame(_rank(values[t]), columns=columns).corr(min_periods=30).to_numpy()
+            for t in range(values.shape[0])]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return pd.DataFrame(np.nanmean(mats, axis=0), index=columns, columns=columns)
+
+
+def coverage(values):
+    """팩터별 결측률 / 0 값 비율 (플레이스홀더 지표 탐지용)"""
+    total = np.prod(values.shape[:2])
+    return pd.DataFrame({'Missing_Rate': np.isnan(values).sum(axis=(0, 1)) / total,
+                         'Zero_Rate': (values == 0).sum(axis=(0, 1)) / total})
+
+
+# ---------------------------------------------------------
+# 3. 리포트
+# ---------------------------------------------------------
+def analyze(horizons=DEFAULT_HORIZONS, start=None, end=None, refresh_prices=False):
+    """
+    Returns:
+        (summary, decay, corr)
+        - summary: 팩터별 요약 (주 horizon IC 통계 + 자기상관 + 커버리지 + 정리 후보 여부)
+        - decay: 팩터 x horizon 평균 IC
+        - corr: 팩터 간 평균 스피어만 상관
+    """
+    dates, codes, values = cached_panel(FACTOR_COLS, 'analytics_tensor', start, end)
+    if not dates:
+        raise FileNotFoundError("저장된 스냅샷이 없습니다. quality_analysis_ttm.py 를 먼저 실행하세요.")
+    prices = update_prices(codes, dates[0]) if refresh_prices else load_prices()
+    print(f"✓ 팩터 텐서: {len(dates)}개 날짜 x {len(codes)}개 종목 x {len(FACTOR_COLS)}개 지표")
+
+    decay = {}
+    summaries = {}
+    for h in horizons:
+        ic = rank_ic(values, forward_returns(prices, dates, codes, h))
+        summaries[h] = ic_summary(ic)
+        decay[f'IC_{h}D'] = summaries[h]['IC_Mean'].to_numpy()
+    decay = pd.DataFrame(decay, index=FACTOR_COLS)
+
+    main_h = 20 if 20 in horizons else horizons[0]
+    summary = summaries[main_h].copy()
+    summary.index = FACTOR_COLS
+    summary['Autocorr'] = factor_autocorrelation(values)
+    summary = summary.join(coverage(values).set_index(pd.Index(FACTOR_COLS)))
+
+    corr = factor_correlation(values, FACTOR_COLS)
+
+    # 정리 후보: 상수/결측 지표, 또는 모든 horizon 에서 유의하지 않은 지표
+    insignificant = pd.concat([summaries[h]['t_stat'].abs() < 2 for h in horizons], axis=1).all(axis=1).to_numpy()
+    degenerate = (summary['Zero_Rate'] + summary['Missing_Rate'] > 0.95).to_numpy()
+    summary['Prune_Candidate'] = insignificant | degenerate
+    summary['Main_Horizon'] = main_h
+    return summary, decay, corr
+
+
+def redundant_pairs(corr, threshold=0.8):
+    """상관이 threshold 이상인 디스크립터 쌍"""
+    pairs = []
+    cols = [c for c in corr.columns if c in DESCRIPTOR_COLS]
+    for i, a in enumerate(cols):
+        for b in cols[i + 1:]:
+            if abs(corr.loc[a, b]) >= threshold:
+                pairs.append((a, b, corr.loc[a, b]))
+    return sorted(pairs, key=lambda p: -abs(p[2]))
+
+
+def _table(df):
+    """tabulate 가 있으면 Markdown 표, 없으면 고정폭 텍스트"""
+    try:
+        return df.to_markdown(floatfmt='.3f')
+    except ImportError:
+        return df.to_string(float_format=lambda x: f"{x:.3f}")
+
+
+def write_report(summary, decay, corr, path=REPORT_FILE):
+    lines = [
+        "# 팩터 IC 리포트",
+        "",
+        f"기준 horizon: {int(summary['Main_Horizon'].iloc[0])}거래일",
+        "",
+        "## 팩터 요약",
+        "",
+        _table(summary.drop(columns=['Main_Horizon'])),
+        "",
+        "## IC 감쇠 (horizon 별 평균 IC)",
+        "",
+        _table(decay),
+        "",
+        "## 중복 지표 (|상관| >= 0.8)",
+        "",
+    ]
+    pairs = redundant_pairs(corr)
+    lines += [f"- {a} / {b}: {c:.2f}" for a, b, c in pairs] or ["- 없음"]
+    lines += ["", "## 정리 후보", ""]
+    lines += [f"- {name}" for name in summary.index[summary['Prune_Candidate']] if name in DESCRIPTOR_COLS] or ["- 없음"]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='팩터 IC / 감쇠 분석')
+    parser.add_argument('--horizons', type=int, nargs='+', default=DEFAULT_HORIZONS)
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--refresh-prices', action='store_true', help='종가 캐시 갱신 (네트워크)')
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    summary, decay, corr = analyze(args.horizons, args.start, args.end, args.refresh_prices)
+    summary.join(decay).to_csv(IC_FILE, encoding='utf-8-sig')
+    write_report(summary, decay, corr, args.output)
+
+    print(summary[['IC_Mean', 'IC_IR', 't_stat', 'Autocorr', 'Prune_Candidate']].to_string(float_format=lambda x: f"{x:.3f}"))
+    print(f"\n✅ 리포트 저장: {args.output}, {IC_FILE} ({time.perf_counter() - t0:.2f}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+팩터 히스토리 저장소
+
+매 실행의 점수 산출 결과(quality_analysis_all.csv)를 날짜별 스냅샷으로 보관하고,
+종가 캐시(prices.csv)와 함께 (날짜, 종목, 지표) 텐서로 불러온다.
+가중치 최적화, IC 분석 등 과거 데이터가 필요한 기능이 공통으로 사용한다.
+"""
+
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from profiling import profiled
+
+HISTORY_DIR = os.environ.get('QUILTY_HISTORY_DIR', 'history')
+PRICE_CACHE = os.path.join(HISTORY_DIR, 'prices.csv')
+
+SNAPSHOT_PATTERN = re.compile(r'^quality_(\d{8})\.csv$')
+
+
+def normalize_codes(codes):
+    """종목코드를 6자리 문자열로 통일 (CSV 로드 시 앞자리 0 손실 방지)"""
+    return pd.Series(codes).astype(str).str.replace(r'\.0$', '', regex=True).str.zfill(6).values
+
+
+def snapshot_path(run_date):
+    return os.path.join(HISTORY_DIR, f"quality_{pd.Timestamp(run_date).strftime('%Y%m%d')}.csv")
+
+
+@profiled()
+def save_snapshot(df, run_date=None):
+    """
+    점수 산출 결과를 날짜별 스냅샷으로 저장 (같은 날짜는 덮어쓰기)
+
+    Args:
+        df: Code + 21개 지표 + 점수 컬럼을 포함한 데이터프레임
+        run_date: 기준일 (기본: 오늘)
+    """
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    path = snapshot_path(run_date or datetime.now())
+    df.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
+
+
+def list_snapshots():
+    """저장된 스냅샷 목록 [(날짜, 경로), ...] (날짜 오름차순)"""
+    if not os.path.isdir(HISTORY_DIR):
+        return []
+    snapshots = []
+    for fname in os.listdir(HISTORY_DIR):
+        m = SNAPSHOT_PATTERN.match(fname)
+        if m:
+            snapshots.append((pd.Timestamp(m.group(1)), os.path.join(HISTORY_DIR, fname)))
+    return sorted(snapshots)
+
+
+def load_snapshot(path):
+    df = pd.read_csv(path, dtype={'Code': str})
+    df['Code'] = normalize_codes(df['Code'])
+    return df.drop_duplicates(subset=['Code'])
+
+
+def load_snapshots(start=None, end=None):
+    """기간 내 스냅샷을 {날짜: 데이터프레임} 으로 로드"""
+    snapshots = {}
+    for date, path in list_snapshots():
+        if start is not None and date < pd.Timestamp(start):
+            continue
+        if end is not None and date > pd.Timestamp(end):
+            continue
+        snapshots[date] = load_snapshot(path)
+    return snapshots
+
+
+def load_latest_snapshot(before=None):
+    """가장 최근 스냅샷 (before 지정 시 그 이전 날짜 중 최근) -> (날짜, 데이터프레임)"""
+    candidates = list_snapshots()
+    if before is not None:
+        candidates = [(d, p) for d, p in candidates if d < pd.Timestamp(before)]
+    if not candidates:
+        return None, None
+    date, path = candidates[-1]
+    return date, load_snapshot(path)
+
+
+def factor_panel(snapshots, columns):
+    """
+    스냅샷들을 (날짜, 종목, 지표) 텐서로 정렬
+
+    Args:
+        snapshots: {날짜: 데이터프레임}
+        columns: 텐서에 담을 컬럼 목록
+
+    Returns:
+        (dates, codes, values) - values shape = (len(dates), len(codes), len(columns))
+        해당 날짜에 없는 종목/컬럼은 NaN
+    """
+    dates = sorted(snapshots)
+    codes = sorted(set().union(*[set(snapshots[d]['Code']) for d in dates])) if dates else []
+    code_pos = pd.Index(codes)
+
+    values = np.full((len(dates), len(codes), len(columns)), np.nan)
+    for t, date in enumerate(dates):
+        df = snapshots[date]
+        rows = code_pos.get_indexer(df['Code'])
+        for f, col in enumerate(columns):
+            if col in df.columns:
+                values[t, rows, f] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+    return dates, codes, values
+
+
+# ---------------------------------------------------------
+# 종가 캐시 (Forward Return 계산용)
+# ---------------------------------------------------------
+def load_prices():
+    """종가 캐시 로드 (index=Date, columns=종목코드)"""
+    if not os.path.exists(PRICE_CACHE):
+        return pd.DataFrame()
+    prices = pd.read_csv(PRICE_CACHE, index_col=0, parse_dates=True)
+    prices.columns = normalize_codes(prices.columns)
+    return prices.sort_index()
+
+
+def update_prices(codes, start):
+    """
+    종가 캐시에 없는 종목/기간만 FinanceDataReader 로 받아서 추가
+
+    Args:
+        codes: 종목코드 목록
+        start: 조회 시작일
+    """
+    import FinanceDataReader as fdr
+
+    prices = load_prices()
+    last_date = prices.index.max() if len(prices) else None
+    series = {}
+    for code in normalize_codes(codes):
+        fetch_start = pd.Timestamp(start)
+        if code in prices.columns and last_date is not None:
+            fetch_start = max(fetch_start, last_date)
+        try:
+            df = fdr.DataReader(code, fetch_start.strftime('%Y-%m-%d'))
+            if len(df):
+                series[code] = df['Close']
+        except Exception as e:
+            print(f"⚠ {code} 종가 조회 실패: {e}")
+
+    if series:
+        new_prices = pd.DataFrame(series)
+        prices = new_prices.combine_first(prices) if len(prices) else new_prices
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        prices.sort_index().to_csv(PRICE_CACHE)
+    return prices.sort_index()
+
+
+def forward_returns(prices, dates, codes, horizon):
+    """
+    각 스냅샷 날짜 기준 horizon 거래일 후 수익률 행렬
+
+    Args:
+        prices: load_prices() 결과
+        dates: 스냅샷 날짜 목록
+        codes: 종목코드 목록
+        horizon: 보유 기간 (거래일 수)
+
+    Returns:
+        (len(dates), len(codes)) 배열, 가격이 없는 구간은 NaN
+    """
+    out = np.full((len(dates), len(codes)), np.nan)
+    if prices is None or prices.empty:
+        return out
+    px = prices.reindex(columns=list(codes)).to_numpy(dtype=float)
+    # 스냅샷 날짜 이후 첫 거래일의 종가를 기준가로 사용
+    start_idx = prices.index.searchsorted(pd.DatetimeIndex(dates), side='left')
+    end_idx = start_idx + horizon
+    valid = end_idx < len(prices)
+    with np.errstate(all='ignore'):
+        out[valid] = px[end_idx[valid]] / px[start_idx[valid]] - 1
+    return out
+
+
+# ---------------------------------------------------------
+# 텐서 캐시 (스냅샷 CSV 를 매번 다시 읽지 않도록 npz 로 보관)
+# ---------------------------------------------------------
+def _snapshot_signature(snapshots):
+    return '|'.join(f"{os.path.basename(p)}:{os.path.getmtime(p):.0f}" for _, p in snapshots)
+
+
+def cached_panel(columns, name, start=None, end=None):
+    """
+    factor_panel 결과를 history/{name}.npz 에 캐시해서 반환
+
+    스냅샷 파일 목록/수정시각이 바뀌면 자동으로 다시 만든다.
+    """
+    snapshots = [(d, p) for d, p in list_snapshots()
+                 if (start is None or d >= pd.Timestamp(start)) and (end is None or d <= pd.Timestamp(end))]
+    signature = _snapshot_signature(snapshots) + '#' + ','.join(columns)
+    cache_path = os.path.join(HISTORY_DIR, f'{name}.npz')
+
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path, allow_pickle=False)
+        if str(cached['signature']) == signature:
+            dates = list(pd.to_datetime(cached['dates'].tolist()))
+            return dates, cached['codes'].tolist(), cached['values']
+
+    dates, codes, values = factor_panel({d: load_snapshot(p) for d, p in snapshots}, columns)
+    if dates:
+        os.makedirs(HISTORY_DIR, exist_ok=True)
+        np.savez_compressed(cache_path, signature=np.array(signature),
+                            dates=np.array([d.strftime('%Y-%m-%d') for d in dates]),
+                            codes=np.array(codes, dtype=str), values=values)
+    return dates, codes, values
@@ -0,0 +1,336 @@
+"""
+로컬 가짜 서버 (벤치마크 / 동작 확인용)
+
+네트워크나 실제 계정 없이 외부 API 를 흉내 내고, 받은 요청의 왕복 수와
+본문 크기를 기록한다.
+
+    with FakeSheetsServer() as server:
+        service = get_service(endpoint=server.url, http=httplib2.Http())
+        publish_tabs(service, server.spreadsheet_id, tabs)
+        print(server.round_trips, server.request_bytes, server.values('Analysis'))
+
+    with FakeFnGuideServer(capacity=4, error_rate=0.01) as server:
+        data_cache.FNGUIDE_HOST = server.url
+        fetch_page('finance', '005930', scheduler=scheduler)
+        print(server.statuses, server.peak_in_flight)
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+class _RecordingServer:
+    """ThreadingHTTPServer 를 별도 스레드로 띄우고 요청 로그를 남기는 공통 부분"""
+
+    handler_class = None
+
+    def __init__(self):
+        self.log = []  # [(method, path, 요청 바이트, 응답 바이트), ...]
+        self.lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def round_trips(self):
+        return len(self.log)
+
+    @property
+    def request_bytes(self):
+        return sum(entry[2] for entry in self.log)
+
+    @property
+    def response_bytes(self):
+        return sum(entry[3] for entry in self.log)
+
+    def reset_log(self):
+        with self.lock:
+            self.log.clear()
+
+    def start(self):
+        server = self
+
+        class Handler(self.handler_class):
+            owner = server
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    owner = None
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _reply(self, status, payload, request_size):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        # 응답 전에 기록해야 클라이언트가 응답을 받은 시점에 로그가 완성돼 있다
+        with self.owner.lock:
+            self.owner.log.append((self.command, self.path, request_size, len(data)))
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# ---------------------------------------------------------
+# Google Sheets v4 (spreadsheets.get / batchUpdate / values.clear / values.update)
+# ---------------------------------------------------------
+_A1 = re.compile(r"^'?(?P<title>[^'!]+)'?(?:![A-Z]+(?P<row>\d+)(?::[A-Z]+\d+)?)?$")
+
+
+class _SheetsHandler(_JsonHandler):
+
+    def do_GET(self):
+        body = self._body()
+        m = re.match(r'^/v4/spreadsheets/([^/:?]+)$', urlparse(self.path).path)
+        if not m:
+            return self._reply(404, {'error': {'code': 404, 'message': 'not found'}}, len(body))
+        self._reply(200, self.owner.metadata(), len(body))
+
+    def do_POST(self):
+        body = self._body()
+        path = unquote(urlparse(self.path).path)
+        payload = json.loads(body or b'{}')
+        try:
+            if path.endswith('/values:batchUpdate'):
+                cells = sum(self.owner.write_values(item['range'], item['values']) for item in payload.get('data', []))
+                return self._reply(200, {'spreadsheetId': self.owner.spreadsheet_id, 'totalUpdatedCells': cells}, len(body))
+            if path.endswith(':batchUpdate'):
+                replies = self.owner.apply(payload.get('requests', []))
+                return self._reply(200, {'spreadsheetId': self.owner.spreadsheet_id, 'replies': replies}, len(body))
+            if path.endswith(':clear'):
+                title = _A1.match(path.split('/values/')[1][:-len(':clear')]).group('title')
+                self.owner.sheets[title]['cells'] = []
+                return self._reply(200, {'clearedRange': title}, len(body))
+        except (KeyError, ValueError, AttributeError) as e:
+            return self._reply(400, {'error': {'code': 400, 'message': str(e)}}, len(body))
+        self._reply(404, {'error': {'code': 404, 'message': 'not found'}}, len(body))
+
+    def do_PUT(self):
+        # values.update: 'Title!A1' 부터 values 쓰기
+        body = self._body()
+        path = unquote(urlparse(self.path).path)
+        cells = self.owner.write_values(path.split('/values/')[1], json.loads(body).get('values', []))
+        self._reply(200, {'updatedRange': path.split('/values/')[1], 'updatedCells': cells}, len(body))
+
+
+class FakeSheetsServer(_RecordingServer):
+    """메모리 안에 시트 값을 보관하는 가짜 Google Sheets API"""
+
+    handler_class = _SheetsHandler
+
+    def __init__(self, spreadsheet_id='fake-sheet', tabs=('Sheet1',)):
+        super().__init__()
+        self.spreadsheet_id = spreadsheet_id
+        # title -> {'sheetId', 'rowCount', 'columnCount', 'cells': [[값, ...], ...]}
+        self.sheets = {title: {'sheetId': i, 'rowCount': 1000, 'columnCount': 26, 'cells': []}
+                       for i, title in enumerate(tabs)}
+
+    def metadata(self):
+        return {'spreadsheetId': self.spreadsheet_id, 'sheets': [
+            {'properties': {'sheetId': s['sheetId'], 'title': title,
+                            'gridProperties': {'rowCount': s['rowCount'], 'columnCount': s['columnCount']}}}
+            for title, s in self.sheets.items()]}
+
+    def values(self, title):
+        """탭 값 (2차원 리스트, 빈 칸은 None)"""
+        return self.sheets[title]['cells']
+
+    def write_values(self, a1_range, values):
+        """'Title'!A{row} 부터 values 를 덮어쓰기 (RAW), 쓴 셀 수 반환"""
+        m = _A1.match(a1_range)
+        if not m:
+            raise ValueError(f'잘못된 범위: {a1_range}')
+        sheet = self.sheets[m.group('title')]
+        row0 = int(m.group('row') or 1) - 1
+        cells = sheet['cells']
+        while len(cells) < row0 + len(values):
+            cells.append([])
+        for i, row in enumerate(values):
+            cells[row0 + i] = list(row)
+        sheet['rowCount'] = max(sheet['rowCount'], len(cells))
+        return sum(len(row) for row in values)
+
+    def _by_id(self, sheet_id):
+        for s in self.sheets.values():
+            if s['sheetId'] == sheet_id:
+                return s
+        raise KeyError(f'sheetId {sheet_id} 없음')
+
+    @staticmethod
+    def _check_grid(grid, row_count):
+        # 실제 Sheets API 와 같은 규칙: 보이는 행을 모두 고정할 수 없음
+        if grid.get('frozenRowCount', 0) >= row_count:
+            raise ValueError("You can't freeze all visible rows on the sheet.")
+
+    def apply(self, requests):
+        replies = []
+        for request in requests:
+            (kind, body), = request.items()
+            if kind == 'addSheet':
+                props = body['properties']
+                if props['title'] in self.sheets:
+                    raise ValueError(f"이미 있는 탭: {props['title']}")
+                grid = props.get('gridProperties', {})
+                self._check_grid(grid, grid.get('rowCount', 1000))
+                self.sheets[props['title']] = {'sheetId': props['sheetId'], 'rowCount': grid.get('rowCount', 1000),
+                                               'columnCount': grid.get('columnCount', 26), 'cells': []}
+                replies.append({'addSheet': {'properties': props}})
+                continue
+            if kind == 'updateSheetProperties':
+                sheet = self._by_id(body['properties']['sheetId'])
+                grid = body['properties'].get('gridProperties', {})
+                self._check_grid(grid, grid.get('rowCount', sheet['rowCount']))
+                sheet['rowCount'] = grid.get('rowCount', sheet['rowCount'])
+                sheet['columnCount'] = grid.get('columnCount', sheet['columnCount'])
+                sheet['cells'] = [row[:sheet['columnCount']] for row in sheet['cells'][:sheet['rowCount']]]
+            elif kind == 'updateCells':
+                self._update_cells(body)
+            else:
+                raise ValueError(f'지원하지 않는 요청: {kind}')
+            replies.append({})
+        return replies
+
+    def _update_cells(self, body):
+        if 'range' in body:  # rows 없는 range = clear
+            self._by_id(body['range']['sheetId'])['cells'] = []
+            return
+        start = body['start']
+        sheet = self._by_id(start['sheetId'])
+        row0, col0 = start.get('rowIndex', 0), start.get('columnIndex', 0)
+        rows = body.get('rows', [])
+        if row0 + len(rows) > sheet['rowCount']:
+            raise ValueError(f"그리드 범위 초과: {row0 + len(rows)} > {sheet['rowCount']}")
+        cells = sheet['cells']
+        for i, row in enumerate(rows):
+            while len(cells) <= row0 + i:
+                cells.append([])
+            target = cells[row0 + i]
+            for j, cell in enumerate(row.get('values', [])):
+                while len(target) <= col0 + j:
+                    target.append(None)
+                value = cell.get('userEnteredValue')
+                target[col0 + j] = next(iter(value.values())) if value else None
+
+
+# ---------------------------------------------------------
+# FnGuide 페이지 (지연 / 오류 주입)
+# ---------------------------------------------------------
+_FNGUIDE_PAGE = (
+    '<html><body><table><thead><tr><th>IFRS(연결)</th><th>2024/12</th><th>2025/03</th><th>2025/06</th></tr></thead>'
+    '<tbody><tr><th>매출액</th><td>100</td><td>110</td><td>120</td></tr></tbody></table></body></html>')
+
+
+class _FnGuideHandler(BaseHTTPRequestHandler):
+    owner = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        owner = self.owner
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        code = query.get('gicode', ['A'])[0][1:]
+        if 'FinanceRatio' in url.path:
+            kind = 'ratio'
+        else:
+            kind = 'finance_separate' if query.get('ReportGB') == ['B'] else 'finance'
+
+        with owner.lock:
+            owner.in_flight += 1
+            owner.peak_in_flight = max(owner.peak_in_flight, owner.in_flight)
+            in_flight = owner.in_flight
+            roll = owner.rng.random()
+        status, headers, body = 0, {}, b''
+        try:
+            if in_flight > owner.capacity * owner.overload:
+                status, headers, body = 429, {'Retry-After': str(owner.retry_after)}, b'Too Many Requests'
+            elif roll < owner.error_rate:
+                status, headers, body = 503, {}, b'Service Unavailable'
+            else:
+                # 처리 용량을 넘는 만큼 대기열 지연 (동시 요청 수 / 용량 배)
+                time.sleep(owner.latency * max(1.0, in_flight / owner.capacity))
+                if roll < owner.error_rate + owner.stall_rate:
+                    time.sleep(owner.stall)
+                status, headers, body = 200, {}, owner.page(kind, code).encode('utf-8')
+        finally:
+            with owner.lock:
+                owner.in_flight -= 1
+                owner.statuses[status] += 1
+                owner.log.append((self.command, self.path, 0, len(body)))
+        try:
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 클라이언트가 타임아웃으로 먼저 끊은 경우
+
+
+class FakeFnGuideServer(_RecordingServer):
+    """
+    처리 용량이 정해진 가짜 FnGuide (요청 속도 조절 시험용)
+
+    Args:
+        capacity: 기본 지연(latency)으로 처리하는 동시 요청 수 (넘으면 비례해서 느려짐)
+        overload: 동시 요청이 capacity 의 이 배수를 넘으면 429 + Retry-After
+        error_rate: 무작위 503 비율
+        stall_rate, stall: 이 비율의 요청은 stall 초 더 걸림 (클라이언트 타임아웃 유도)
+        page: (kind, code) -> HTML (기본: 표 하나짜리 고정 페이지)
+
+    capacity / error_rate 등은 실행 중에 바꿔도 다음 요청부터 적용된다.
+    """
+
+    handler_class = _FnGuideHandler
+
+    def __init__(self, capacity=4, latency=0.05, overload=2.0, retry_after=1, error_rate=0.0,
+                 stall_rate=0.0, stall=15.0, page=None, seed=0):
+        super().__init__()
+        self.capacity, self.latency, self.overload, self.retry_after = capacity, latency, overload, retry_after
+        self.error_rate, self.stall_rate, self.stall = error_rate, stall_rate, stall
+        self.page = page or (lambda kind, code: _FNGUIDE_PAGE)
+        self.rng = random.Random(seed)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.statuses = Counter()
+
+    def reset_log(self):
+        with self.lock:
+            self.log.clear()
+            self.statuses.clear()
+            self.peak_in_flight = 0
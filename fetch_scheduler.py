@@ -0,0 +1,213 @@
+"""
+적응형 요청 스케줄러 (AIMD)
+
+고정 간격(time.sleep) 대신 관측한 지연 시간과 오류율로 동시 요청 수를 조절한다.
+
+    - 최근 window 개 요청의 p95 지연과 오류율이 건강하면 동시 요청 수 +1 (additive increase)
+    - 타임아웃 / 429 / 5xx 가 나오거나 p95 가 기준을 넘으면 x0.5 (multiplicative decrease)
+    - 429 의 Retry-After 는 모든 슬롯에 적용 (그동안 새 요청 없음)
+    - 학습한 동시 요청 수와 기준 지연은 호스트별로 cache/scheduler.json 에 저장
+
+    scheduler = AdaptiveScheduler.load('comp.fnguide.com')
+    with scheduler.slot() as outcome:
+        page = requests.get(url, timeout=10)
+        outcome.status = page.status_code
+    scheduler.save()
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from data_cache import CACHE_DIR
+
+LIMITS_PATH = os.path.join(CACHE_DIR, 'scheduler.json')
+
+# 혼잡 신호로 보는 HTTP 상태 (그 밖의 4xx 는 요청 자체의 문제)
+THROTTLE_STATUS = {429, 500, 502, 503, 504}
+
+# 기준 p95 지수 평균 계수 (한 번 빨랐던 구간이 기준을 계속 낮추지 않도록)
+FLOOR_ALPHA = 0.3
+
+
+class Outcome:
+    """slot() 안에서 채우는 요청 결과 (status 가 없고 예외로 끝나면 타임아웃 / 연결 오류)"""
+
+    __slots__ = ('status', 'retry_after')
+
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+
+
+class AdaptiveScheduler:
+    """
+    호스트 하나에 대한 동시 요청 수 제한 (스레드 안전)
+
+    Args:
+        host: limits_path 저장 키
+        limit: 시작 동시 요청 수
+        min_limit, max_limit: 동시 요청 수 범위
+        target_p95: 이 값(초)을 넘는 p95 는 무조건 혼잡
+        latency_factor: p95 가 기준 p95 (동시 요청 1개일 때 p95 의 지수 평균) 의 이 배수를 넘으면 혼잡 (대기열이 쌓이는 신호)
+        max_error_rate: 구간 오류율 상한
+        window: 증가 여부를 판단하는 완료 요청 수
+    """
+
+    def __init__(self, host, limit=1.0, min_limit=1, max_limit=8, target_p95=3.0, latency_factor=1.5,
+                 max_error_rate=0.02, window=20, floor_p95=None, limits_path=LIMITS_PATH):
+        self.host = host
+        self.min_limit, self.max_limit = min_limit, max_limit
+        self.limit = float(min(max(limit, min_limit), max_limit))
+        self.target_p95 = target_p95
+        self.latency_factor = latency_factor
+        self.max_error_rate = max_error_rate
+        self.window = window
+        self.floor_p95 = floor_p95
+        self.limits_path = limits_path
+
+        self.in_flight = 0
+        self.pause_until = 0.0
+        self.history = []  # [(완료 시각, 동시 요청 수), ...] 조절할 때마다 추가
+        self.stats = {'requests': 0, 'errors': 0, 'increases': 0, 'decreases': 0}
+        self._samples = deque()  # [(지연 초, 오류 여부), ...] 마지막 조절 이후
+        self._since_decrease = 0
+        self._cond = threading.Condition()
+
+    # ---------------------------------------------------------
+    # 저장 / 불러오기
+    # ---------------------------------------------------------
+    @classmethod
+    def load(cls, host, limits_path=LIMITS_PATH, **kwargs):
+        """저장된 동시 요청 수 / 기준 p95 로 시작 (없으면 1개부터)"""
+        try:
+            with open(limits_path, encoding='utf-8') as f:
+                saved = json.load(f).get(host, {})
+        except (FileNotFoundError, ValueError):
+            saved = {}
+        kwargs.setdefault('limit', saved.get('limit', 1.0))
+        kwargs.setdefault('floor_p95', saved.get('floor_p95'))
+        return cls(host, limits_path=limits_path, **kwargs)
+
+    def save(self):
+        """학습한 값을 limits_path 에 호스트별로 저장 (다른 호스트 값은 유지)"""
+        try:
+            with open(self.limits_path, encoding='utf-8') as f:
+                limits = json.load(f)
+        except (FileNotFoundError, ValueError):
+            limits = {}
+        limits[self.host] = {'limit': round(self.limit, 2), 'floor_p95': self.floor_p95,
+                             'updated': datetime.now().isoformat(timespec='seconds')}
+        os.makedirs(os.path.dirname(self.limits_path) or '.', exist_ok=True)
+        tmp_path = self.limits_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(limits, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.limits_path)
+
+    # ---------------------------------------------------------
+    # 슬롯
+    # ---------------------------------------------------------
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self.pause_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._cond.wait(wait if wait > 0 else None)
+
+    def release(self, latency, status=None, retry_after=None):
+        """
+        요청 하나 완료 기록 후 필요하면 동시 요청 수 조절
+
+        Args:
+            latency: 요청 시간 (초)
+            status: HTTP 상태 (None = 타임아웃 / 연결 오류)
+            retry_after: 429 / 503 응답의 Retry-After (초)
+        """
+        error = status is None or status in THROTTLE_STATUS
+        with self._cond:
+            self.in_flight -= 1
+            self.stats['requests'] += 1
+            self.stats['errors'] += error
+            self._samples.append((latency, error))
+            self._since_decrease += 1
+            if error:
+                if retry_after:
+                    self.pause_until = max(self.pause_until, time.monotonic() + retry_after)
+                # 한 번의 혼잡에 동시 요청이 한꺼번에 실패해도 한 번만 줄임 (TCP 의 RTT 당 1회와 같은 규칙)
+                if self._since_decrease >= self.limit:
+                    self._decrease()
+            elif len(self._samples) >= self.window:
+                self._evaluate()
+            self._cond.notify_all()
+
+    def slot(self):
+        """with scheduler.slot() as outcome: ... (outcome.status 에 HTTP 상태 기록)"""
+        return _Slot(self)
+
+    @property
+    def backoff(self):
+        """재시도 전 대기 시간 (초): Retry-After 가 남았으면 그만큼, 아니면 최근 p95"""
+        with self._cond:
+            wait = self.pause_until - time.monotonic()
+            return wait if wait > 0 else (self.floor_p95 or 1.0)
+
+    # ---------------------------------------------------------
+    # AIMD
+    # ---------------------------------------------------------
+    def _p95(self):
+        return float(np.percentile([latency for latency, _ in self._samples], 95))
+
+    def _evaluate(self):
+        p95 = self._p95()
+        error_rate = sum(error for _, error in self._samples) / len(self._samples)
+        # 동시 요청 1개일 때의 p95 가 기준 (그보다 느려지면 서버에 대기열이 생긴 것)
+        # 최솟값이 아니라 지수 평균이라 저장된 기준이 낮게 굳어도 1개로 줄어든 뒤 다시 따라감
+        if int(self.limit) <= 1:
+            floor = p95 if self.floor_p95 is None else self.floor_p95 + FLOOR_ALPHA * (p95 - self.floor_p95)
+            self.floor_p95 = round(floor, 4)
+        bar = self.target_p95 if self.floor_p95 is None else min(self.target_p95, self.floor_p95 * self.latency_factor)
+        congested = p95 > bar
+        if error_rate > self.max_error_rate or congested:
+            self._decrease()
+        else:
+            if self.limit < self.max_limit:
+                self.stats['increases'] += 1
+            self.limit = min(self.limit + 1, self.max_limit)
+            self._samples.clear()
+            self.history.append((time.monotonic(), self.limit))
+
+    def _decrease(self):
+        self.limit = max(self.limit * 0.5, self.min_limit)
+        self.stats['decreases'] += 1
+        self._samples.clear()
+        self._since_decrease = 0
+        self.history.append((time.monotonic(), self.limit))
+
+    def summary(self):
+        s = self.stats
+        error_rate = s['errors'] / s['requests'] if s['requests'] else 0.0
+        return (f"동시 요청 {int(self.limit)}개 (증가 {s['increases']} / 감소 {s['decreases']}), "
+                f"요청 {s['requests']:,}개, 오류 {error_rate:.1%}")
+
+
+class _Slot:
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.outcome = Outcome()
+
+    def __enter__(self):
+        self.scheduler.acquire()
+        self.start = time.perf_counter()
+        return self.outcome
+
+    def __exit__(self, exc_type, exc, tb):
+        self.scheduler.release(time.perf_counter() - self.start, self.outcome.status, self.outcome.retry_after)
+        return False
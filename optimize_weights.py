@@ -0,0 +1,231 @@
+"""
+카테고리 가중치 최적화 도구
+
+STEP 4 의 가중치(0.30/0.25/0.20/0.15/0.10)를 저장된 팩터 히스토리와
+Forward Return 으로 검증/탐색한다. 후보 가중치는 점수 스크립트를 다시 돌리지 않고
+(날짜, 종목, 카테고리) 점수 텐서에 대한 행렬곱 한 번으로 평가한다.
+
+사용법:
+    python optimize_weights.py --horizon 20 --objective ic --method all
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from scoring import CATEGORY_COLS, WEIGHTS, weight_vector
+from factor_store import cached_panel, load_prices, update_prices, forward_returns
+
+OUTPUT_FILE = 'weight_optimization.csv'
+
+
+# ---------------------------------------------------------
+# 1. 학습 데이터 (카테고리 점수 텐서 + Forward Return)
+# ---------------------------------------------------------
+def load_training_data(horizon=20, start=None, end=None, refresh_prices=False):
+    """
+    Returns:
+        dates, codes, scores (T, N, 5), returns (T, N)
+    """
+    dates, codes, scores = cached_panel(CATEGORY_COLS, 'category_tensor', start, end)
+    if not dates:
+        raise FileNotFoundError("저장된 스냅샷이 없습니다. quality_analysis_ttm.py 를 먼저 실행하세요.")
+
+    prices = update_prices(codes, dates[0]) if refresh_prices else load_prices()
+    returns = forward_returns(prices, dates, codes, horizon)
+    return dates, codes, scores, returns
+
+
+def _prepare_dates(scores, returns, min_names=30):
+    """날짜별로 점수/수익률이 모두 있는 종목만 추려서 (점수 행렬, 수익률, 수익률 순위 z) 목록 생성"""
+    prepared = []
+    for t in range(scores.shape[0]):
+        valid = np.isfinite(scores[t]).all(axis=1) & np.isfinite(returns[t])
+        if valid.sum() < min_names:
+            continue
+        s = scores[t][valid].astype(np.float32)
+        r = returns[t][valid]
+        rank_r = pd.Series(r).rank().to_numpy()
+        z_r = rank_r - rank_r.mean()
+        norm = np.sqrt((z_r ** 2).sum())
+        prepared.append((s, r, z_r / norm if norm > 0 else z_r))
+    return prepared
+
+
+# ---------------------------------------------------------
+# 2. 후보 평가 (행렬곱 1회 + 정렬)
+# ---------------------------------------------------------
+def evaluate(weights, prepared, top_pct=0.10, chunk=512):
+    """
+    후보 가중치들의 날짜 평균 Rank IC / 상위 분위 수익률 계산
+
+    Args:
+        weights: (M, 5) 후보 가중치 배열
+        prepared: _prepare_dates() 결과
+        top_pct: 상위 분위 비율 (기본 10%)
+
+    Returns:
+        DataFrame (ic, ic_ir, top_return) - 행 순서는 weights 와 동일
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float32))
+    m = len(weights)
+    ic = np.zeros((len(prepared), m))
+    top = np.zeros((len(prepared), m))
+
+    for t, (s, r, z_r) in enumerate(prepared):
+        n = len(r)
+        k = max(1, int(np.ceil(n * top_pct)))
+        centered = np.arange(n) - (n - 1) / 2
+        norm = np.sqrt((centered ** 2).sum())
+        for lo in range(0, m, chunk):
+            w = weights[lo:lo + chunk]
+            total = w @ s.T                                   # (chunk, N)
+            order = np.argsort(total, axis=1)
+            ranks = np.empty_like(order)
+            np.put_along_axis(ranks, order, np.arange(n)[None, :], axis=1)
+            ic[t, lo:lo + chunk] = (ranks - (n - 1) / 2) @ z_r / norm
+            top_idx = order[:, -k:]
+            top[t, lo:lo + chunk] = r[top_idx].mean(axis=1)
+
+    ic_std = ic.std(axis=0, ddof=1) if len(prepared) > 1 else np.full(m, np.nan)
+    with np.errstate(all='ignore'):
+        ic_ir = ic.mean(axis=0) / ic_std
+    return pd.DataFrame({'ic': ic.mean(axis=0), 'ic_ir': ic_ir, 'top_return': top.mean(axis=0)})
+
+
+# ---------------------------------------------------------
+# 3. 후보 생성 (그리드 / 랜덤 / 제약 하 지역 탐색)
+# ---------------------------------------------------------
+def _within_bounds(weights, min_w, max_w):
+    return ((weights >= min_w - 1e-9) & (weights <= max_w + 1e-9)).all(axis=1)
+
+
+def grid_candidates(step=0.05, min_w=0.0, max_w=1.0):
+    """합이 1인 step 단위 가중치 전체 (5개 카테고리, step=0.05 -> 10,626개)"""
+    units = int(round(1 / step))
+    k = len(CATEGORY_COLS)
+    combos = []
+    # stars and bars: units 개를 k 칸에 나누기
+    for bars in itertools.combinations(range(units + k - 1), k - 1):
+        edges = (-1,) + bars + (units + k - 1,)
+        combos.append([edges[i + 1] - edges[i] - 1 for i in range(k)])
+    weights = np.array(combos, dtype=float) / units
+    return weights[_within_bounds(weights, min_w, max_w)]
+
+
+def random_candidates(n=5000, min_w=0.0, max_w=1.0, seed=0):
+    """Dirichlet 분포로 심플렉스 위의 랜덤 가중치 생성 (범위 밖 후보는 제외)"""
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(CATEGORY_COLS)), size=n)
+    return weights[_within_bounds(weights, min_w, max_w)]
+
+
+def local_search(start, prepared, objective, min_w=0.0, max_w=1.0, top_pct=0.10,
+                 delta=0.05, min_delta=0.005, max_iter=200):
+    """
+    합=1, min_w <= w <= max_w 제약 하에서 두 카테고리 사이로 가중치를 옮기는 지역 탐색
+
+    매 반복마다 가능한 이동(k*(k-1)개)을 한 번에 평가하고, 개선이 없으면 이동 폭을 절반으로 줄인다.
+    """
+    k = len(CATEGORY_COLS)
+    best = np.asarray(start, dtype=float)
+    best_value = evaluate(best, prepared, top_pct)[objective].iloc[0]
+    history = [best.copy()]
+
+    for _ in range(max_iter):
+        moves = []
+        for i, j in itertools.permutations(range(k), 2):
+            cand = best.copy()
+            cand[i] += delta
+            cand[j] -= delta
+            moves.append(cand)
+        moves = np.array(moves)
+        moves = moves[_within_bounds(moves, min_w, max_w)]
+        if len(moves):
+            values = evaluate(moves, prepared, top_pct)[objective].to_numpy()
+            i_best = int(np.nanargmax(values)) if np.isfinite(values).any() else None
+            if i_best is not None and values[i_best] > best_value + 1e-12:
+                best, best_value = moves[i_best], values[i_best]
+                history.append(best.copy())
+                continue
+        delta /= 2
+        if delta < min_delta:
+            break
+    return best, np.array(history)
+
+
+# ---------------------------------------------------------
+# 4. 실행
+# ---------------------------------------------------------
+def optimize(horizon=20, objective='ic', method='all', step=0.1, n_random=2000,
+             min_w=0.0, max_w=1.0, top_pct=0.10, start=None, end=None, refresh_prices=False):
+    dates, codes, scores, returns = load_training_data(horizon, start, end, refresh_prices)
+    prepared = _prepare_dates(scores, returns)
+    if not prepared:
+        raise ValueError(f"{horizon}거래일 Forward Return 을 계산할 수 있는 스냅샷이 없습니다.")
+    print(f"✓ 학습 데이터: {len(prepared)}개 날짜 x 최대 {max(len(p[1]) for p in prepared)}개 종목 (horizon={horizon})")
+
+    candidates = [weight_vector(WEIGHTS)[None, :]]
+    if method in ('grid', 'all'):
+        candidates.append(grid_candidates(step, min_w, max_w))
+    if method in ('random', 'all'):
+        candidates.append(random_candidates(n_random, min_w, max_w))
+    weights = np.unique(np.round(np.vstack(candidates), 6), axis=0)
+
+    t0 = time.perf_counter()
+    results = evaluate(weights, prepared, top_pct)
+    print(f"✓ 후보 {len(weights):,}개 평가: {time.perf_counter() - t0:.2f}초")
+    if not np.isfinite(results[objective].to_numpy()).any():
+        # ic_ir 은 날짜별 IC 의 표준편차가 필요 (날짜 1개면 전부 NaN)
+        need = " (ic_ir 은 날짜 2개 이상 필요)" if objective == 'ic_ir' else ""
+        raise ValueError(f"{objective} 를 계산할 수 없습니다: 학습 날짜 {len(prepared)}개{need}")
+
+    if method in ('local', 'all'):
+        seed = weights[int(np.nanargmax(results[objective].to_numpy()))]
+        refined, path = local_search(seed, prepared, objective, min_w, max_w, top_pct)
+        weights = np.vstack([weights, path])
+        results = pd.concat([results, evaluate(path, prepared, top_pct)], ignore_index=True)
+
+    for j, cat in enumerate(CATEGORY_COLS):
+        results[cat] = weights[:, j]
+    results = results.drop_duplicates(subset=CATEGORY_COLS)
+    baseline = evaluate(weight_vector(WEIGHTS), prepared, top_pct).iloc[0]
+    return results.sort_values(objective, ascending=False).reset_index(drop=True), baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description='카테고리 가중치 최적화')
+    parser.add_argument('--horizon', type=int, default=20, help='Forward Return 보유 기간 (거래일)')
+    parser.add_argument('--objective', choices=['ic', 'ic_ir', 'top_return'], default='ic')
+    parser.add_argument('--method', choices=['grid', 'random', 'local', 'all'], default='all')
+    parser.add_argument('--step', type=float, default=0.1, help='그리드 간격 (0.05 -> 10,626개 후보)')
+    parser.add_argument('--n-random', type=int, default=2000)
+    parser.add_argument('--min-weight', type=float, default=0.0)
+    parser.add_argument('--max-weight', type=float, default=1.0)
+    parser.add_argument('--top-pct', type=float, default=0.10, help='상위 분위 비율')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--refresh-prices', action='store_true', help='종가 캐시 갱신 (네트워크)')
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    try:
+        results, baseline = optimize(args.horizon, args.objective, args.method, args.step, args.n_random,
+                                     args.min_weight, args.max_weight, args.top_pct,
+                                     args.start, args.end, args.refresh_prices)
+    except ValueError as e:
+        raise SystemExit(f"⚠ {e}")
+    results.to_csv(args.output, index=False, encoding='utf-8-sig')
+
+    print("=" * 80)
+    print(f"[현재 가중치] IC {baseline['ic']:.4f} | IC IR {baseline['ic_ir']:.2f} | 상위 {args.top_pct:.0%} 수익률 {baseline['top_return']:.2%}")
+    print(f"[상위 후보 - {args.objective} 기준]")
+    print(results.head(10).to_string(float_format=lambda x: f"{x:.4f}"))
+    print(f"\n✅ 전체 결과 저장: {args.output} ({len(results)}개 후보)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+퀄리티 프로필 유사 종목 검색 (quality peers)
+
+STEP 4 의 표준화 점수(Score_* 21개)를 종목별 벡터로 보고, 행 단위로 정규화한
+행렬 하나에 대한 행렬곱 + argpartition 으로 가장 비슷한 k개 종목을 찾는다.
+2,600 x 21 행렬이라 트리 인덱스보다 행렬곱 한 번이 빠르다.
+
+인덱스는 점수 산출 후(quality_analysis_ttm.score) history/peers.npz 로 다시 만들고,
+로드할 때 최신 스냅샷보다 오래됐으면 자동으로 다시 만든다.
+
+    python peers.py 005930 -k 10
+    python peers.py --profile ROE=20,Debt_Ratio=50,Revenue_Stability=5
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from scoring import CATEGORIES, DESCRIPTOR_COLS, SCORE_COLS
+from factor_store import HISTORY_DIR, list_snapshots, load_snapshot, normalize_codes
+from data_cache import attach_names
+from profiling import profiled
+
+PEER_INDEX = os.path.join(HISTORY_DIR, 'peers.npz')
+METRICS = ('cosine', 'euclidean')
+_SIGNS = {col: sign for _, cols, sign in CATEGORIES for col, _ in cols}
+
+
+class PeerIndex:
+    """
+    Args:
+        codes, names: 종목코드 / 종목명 배열 (N,)
+        vectors: Score_* 행렬 (N, 21), 결측은 0 (전체 평균)
+        raw_mean, raw_std: 원본 지표 -> Score 변환용 (결측치 대체 후 평균 / 표준편차)
+        source: 만든 스냅샷 (파일명:수정시각)
+    """
+
+    def __init__(self, codes, names, vectors, raw_mean, raw_std, source=''):
+        self.codes = np.asarray(codes).astype(str)
+        self.names = np.asarray(names).astype(str)
+        self.vectors = np.nan_to_num(np.asarray(vectors, dtype=float))
+        self.raw_mean = np.asarray(raw_mean, dtype=float)
+        self.raw_std = np.asarray(raw_std, dtype=float)
+        self.source = source
+
+        norms = np.linalg.norm(self.vectors, axis=1)
+        self.sq_norms = norms ** 2
+        self.unit = self.vectors / np.where(norms > 0, norms, 1)[:, None]
+        self.by_code = {code: i for i, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_frame(cls, df, source=''):
+        """calculate_scores() 결과 데이터프레임으로 생성"""
+        df = df.drop_duplicates(subset=['Code'])
+        scores = df.reindex(columns=SCORE_COLS).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        raw = df.reindex(columns=DESCRIPTOR_COLS).apply(pd.to_numeric, errors='coerce')
+        # scoring._fill_and_standardize 와 같은 대체값 기준 평균 / 표준편차
+        fills = {col: fill for _, cols, _ in CATEGORIES for col, fill in cols}
+        filled = raw.apply(lambda s: s.fillna(s.median() if fills[s.name] == 'median' else fills[s.name]))
+        names = df['Name'] if 'Name' in df.columns else df['Code']
+        return cls(normalize_codes(df['Code']), names.astype(str).values, scores,
+                   filled.mean().values, filled.std().values, source)
+
+    # ---------------------------------------------------------
+    # 저장 / 로드
+    # ---------------------------------------------------------
+    def save(self, path=PEER_INDEX):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, codes=self.codes, names=self.names, vectors=self.vectors,
+                 raw_mean=self.raw_mean, raw_std=self.raw_std, source=np.array(self.source))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=PEER_INDEX):
+        data = np.load(path)
+        return cls(data['codes'], data['names'], data['vectors'], data['raw_mean'], data['raw_std'],
+                   str(data['source']))
+
+    # ---------------------------------------------------------
+    # 검색
+    # ---------------------------------------------------------
+    def profile_vector(self, profile):
+        """
+        {지표: 값} -> Score 벡터 (없는 지표는 0 = 평균)
+
+        'Score_ROE' 처럼 Score_ 로 시작하면 표준화 점수 그대로, 'ROE' 처럼 원본 지표면
+        이 스냅샷의 평균 / 표준편차로 표준화한다 (회계품질 지표는 부호 반전).
+        """
+        vector = np.zeros(len(SCORE_COLS))
+        for key, value in profile.items():
+            if key in SCORE_COLS:
+                vector[SCORE_COLS.index(key)] = float(value)
+            elif key in DESCRIPTOR_COLS:
+                i = DESCRIPTOR_COLS.index(key)
+                std = self.raw_std[i] if self.raw_std[i] > 0 else 1.0
+                vector[i] = (float(value) - self.raw_mean[i]) / std * _SIGNS[key]
+            else:
+                raise KeyError(f"알 수 없는 지표: {key}")
+        return vector
+
+    def query(self, code=None, profile=None, k=10, metric='cosine'):
+        """
+        가장 비슷한 k개 종목
+
+        Args:
+            code: 기준 종목코드 (결과에서 자기 자신은 제외)
+            profile: {지표: 값} (code 대신 사용)
+            metric: 'cosine' (프로필 모양) / 'euclidean' (수준까지 비교)
+
+        Returns:
+            (행 번호 배열, 유사도 배열) - cosine 은 유사도, euclidean 은 -거리 (클수록 가까움)
+        """
+        if code is not None:
+            code = str(code).zfill(6)
+            if code not in self.by_code:
+                raise KeyError(f"종목 없음: {code}")
+            self_row = self.by_code[code]
+            q = self.vectors[self_row]
+        else:
+            self_row = None
+            q = self.profile_vector(profile or {})
+
+        if metric == 'cosine':
+            norm = np.linalg.norm(q)
+            similarity = self.unit @ (q / norm if norm > 0 else q)
+        elif metric == 'euclidean':
+            similarity = -np.sqrt(np.maximum(self.sq_norms - 2 * (self.vectors @ q) + q @ q, 0))
+        else:
+            raise ValueError(f"metric 은 {METRICS} 중 하나")
+
+        if self_row is not None:
+            similarity[self_row] = -np.inf
+        k = min(k, len(similarity) - (self_row is not None))
+        if k <= 0:
+            return np.array([], dtype=int), np.array([])
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top], kind='stable')]
+        return top, similarity[top]
+
+
+# ---------------------------------------------------------
+# 스냅샷 연동
+# ---------------------------------------------------------
+def _snapshot_source(path):
+    return f"{os.path.basename(path)}:{os.path.getmtime(path):.0f}"
+
+
+@profiled()
+def build_peer_index(df=None, path=PEER_INDEX):
+    """peer 인덱스를 만들어 저장 (df 를 넘기지 않으면 가장 최근 스냅샷 사용)"""
+    source = ''
+    if df is None:
+        snapshots = list_snapshots()
+        if not snapshots:
+            raise FileNotFoundError("저장된 스냅샷이 없습니다")
+        source = _snapshot_source(snapshots[-1][1])
+        df = load_snapshot(snapshots[-1][1])
+    elif list_snapshots():
+        source = _snapshot_source(list_snapshots()[-1][1])
+    index = PeerIndex.from_frame(attach_names(df.copy()), source)
+    index.save(path)
+    return index
+
+
+def load_peer_index(path=PEER_INDEX):
+    """저장된 인덱스 로드 (최신 스냅샷과 다르면 다시 만듦)"""
+    snapshots = list_snapshots()
+    latest = _snapshot_source(snapshots[-1][1]) if snapshots else ''
+    if os.path.exists(path):
+        index = PeerIndex.load(path)
+        if index.source == latest or not latest:
+            return index
+    return build_peer_index(path=path)
+
+
+def peers_frame(index, rows, similarity, snapshot=None):
+    """검색 결과 -> 데이터프레임 (snapshot 을 넘기면 점수 컬럼 추가)"""
+    out = pd.DataFrame({'Rank': range(1, len(rows) + 1), 'Code': index.codes[rows],
+                        'Name': index.names[rows], 'Similarity': similarity})
+    if snapshot is not None:
+        cols = ['Code', 'Quality_Score', 'Smoothed_Quality_Score'] + [cat for cat, _, _ in CATEGORIES]
+        out = out.merge(snapshot[[col for col in cols if col in snapshot.columns]], on='Code', how='left')
+    return out
+
+
+def parse_profile(text):
+    """'ROE=20,Debt_Ratio=50' -> {'ROE': 20.0, 'Debt_Ratio': 50.0}"""
+    profile = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        key, _, value = item.partition('=')
+        profile[key.strip()] = float(value)
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='퀄리티 프로필 유사 종목 검색')
+    parser.add_argument('code', nargs='?', help='기준 종목코드')
+    parser.add_argument('--profile', help="원본 지표 또는 Score_* 값 (예: 'ROE=20,Debt_Ratio=50')")
+    parser.add_argument('-k', type=int, default=10)
+    parser.add_argument('--metric', choices=METRICS, default='cosine')
+    parser.add_argument('--rebuild', action='store_true', help='인덱스 다시 만들기')
+    args = parser.parse_args(argv)
+    if not args.code and not args.profile:
+        parser.error("종목코드 또는 --profile 이 필요합니다")
+
+    from report_writer import Column, write_report
+    from generate_final_table import FULL_LIST_COLUMNS
+
+    index = build_peer_index() if args.rebuild else load_peer_index()
+    rows, similarity = index.query(args.code, parse_profile(args.profile or ''), args.k, args.metric)
+    snapshots = list_snapshots()
+    snapshot = load_snapshot(snapshots[-1][1]) if snapshots else None
+
+    if args.metric == 'cosine':
+        columns = FULL_LIST_COLUMNS[:3] + [Column('Similarity', 'Sim', '>6.3f')]
+    else:
+        similarity = -similarity  # 거리로 표시
+        columns = FULL_LIST_COLUMNS[:3] + [Column('Similarity', 'Dist', '>6.2f')]
+    frame = peers_frame(index, rows, similarity, snapshot)
+    if snapshot is not None:
+        # 평활 점수가 없는 예전 스냅샷도 출력
+        columns += [col for col in FULL_LIST_COLUMNS[3:] if col.name in frame.columns]
+    target = f"{index.names[index.by_code[args.code.zfill(6)]]} ({args.code.zfill(6)})" if args.code else args.profile
+    write_report(frame, columns, '-',
+                 title_lines=[f"[Quality Peers] {target} - {args.metric}, 기준: {index.source}", "-" * 80])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+파이프라인 단계별 프로파일링 (기본 꺼짐)
+
+QUILTY_PROFILE 환경 변수나 `quiltystock.py --profile` 로 켠다. 꺼져 있으면
+stage() / @profiled 는 전역 변수 하나만 확인하고 바로 원래 함수를 호출한다.
+
+    QUILTY_PROFILE=1 python quality_analysis_ttm.py                 # 전부 (cprofile,sample,memory)
+    QUILTY_PROFILE=sample,memory python quality_analysis_ttm.py     # 골라서
+    python quiltystock.py --profile score
+    python quiltystock.py --profile --profile-modes sample collect
+
+    @profiled('factors')
+    def get_quality_factors_ttm(...): ...
+
+    with stage('read_html'):
+        tables = pd.read_html(...)
+
+결과: profiles/YYYYMMDD_HHMMSS/ (QUILTY_PROFILE_DIR)
+    stages.csv       단계별 호출 수 / 총 시간 / 평균 / 최대 / 할당 증가량
+    {단계}.prof      스레드별 가장 바깥 단계의 cProfile (snakeviz, pstats 로 열기)
+    collapsed.txt    단계;파일:함수;... 샘플 수 (flamegraph.pl, speedscope 입력)
+    allocations.txt  tracemalloc 할당 상위 위치
+
+memory 의 할당 증가량은 프로세스 전체 기준이라 스레드로 동시에 도는 단계는 서로 섞인다.
+cProfile / pstats / tracemalloc 은 켤 때만 import 한다 (CLI 시작 시간).
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get('QUILTY_PROFILE_DIR', 'profiles')
+MODES = ('cprofile', 'sample', 'memory')
+SAMPLE_INTERVAL = 0.005  # 초
+TOP_ALLOCATIONS = 30
+
+_state = None  # 켜져 있을 때만 _Profiler
+
+
+def parse_modes(value):
+    """'1' / 'all' / '' -> 전부, 'sample,memory' -> 해당 모드만"""
+    value = (value or '').strip().lower()
+    if value in ('', '1', 'all', 'true', 'yes'):
+        return set(MODES)
+    modes = {mode.strip() for mode in value.split(',') if mode.strip()}
+    unknown = modes - set(MODES)
+    if unknown:
+        raise ValueError(f"알 수 없는 프로파일링 모드: {', '.join(sorted(unknown))} (사용 가능: {', '.join(MODES)})")
+    return modes
+
+
+def enable(modes='all', output_dir=None):
+    """
+    프로파일링 시작 (프로세스 종료 시 결과 저장, 이미 켜져 있으면 그대로)
+
+    Returns:
+        결과 폴더 경로
+    """
+    global _state
+    if _state is None:
+        output_dir = output_dir or os.path.join(PROFILE_DIR, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        _state = _Profiler(parse_modes(modes), output_dir)
+        atexit.register(disable)
+    return _state.output_dir
+
+
+def disable():
+    """프로파일링 종료 후 결과 저장 (켜져 있지 않으면 아무것도 안 함)"""
+    global _state
+    profiler, _state = _state, None
+    if profiler is not None:
+        profiler.finish()
+        print(f"✅ 프로파일 저장: {profiler.output_dir}", file=sys.stderr)
+
+
+def enabled():
+    return _state is not None
+
+
+class _NullStage:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """with stage('score'): ... (꺼져 있으면 아무 일도 하지 않는 공용 객체)"""
+    if _state is None:
+        return _NULL_STAGE
+    return _Stage(_state, name)
+
+
+def profiled(name=None):
+    """함수 호출 전체를 하나의 단계로 기록하는 데코레이터 (이름 기본값: 함수 이름)"""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _state is None:
+                return func(*args, **kwargs)
+            with _Stage(_state, stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------
+# 켜져 있을 때
+# ---------------------------------------------------------
+class _Stage:
+
+    __slots__ = ('profiler', 'name', 'start', 'memory', 'cprofile')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler.stacks[threading.get_ident()]
+        stack.append(self.name)
+        self.cprofile = None
+        # cProfile 은 스레드당 하나만 켤 수 있으므로 가장 바깥 단계에서만
+        if self.profiler.profile_class is not None and len(stack) == 1:
+            self.cprofile = self.profiler.profile_class()
+            try:
+                self.cprofile.enable()
+            except ValueError:  # Python 3.12+ 는 프로세스 전체에 하나 (다른 스레드가 사용 중)
+                self.cprofile = None
+        traced = self.profiler.traced_memory
+        self.memory = traced()[0] if traced else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        traced = self.profiler.traced_memory
+        allocated = traced()[0] - self.memory if traced else 0
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.profiler.stacks[threading.get_ident()].pop()
+        self.profiler.record(self.name, seconds, allocated, self.cprofile)
+        return False
+
+
+class _Profiler:
+
+    def __init__(self, modes, output_dir):
+        self.modes = modes
+        self.output_dir = output_dir
+        self.lock = threading.Lock()
+        self.stacks = defaultdict(list)  # 스레드 id -> [단계 이름, ...]
+        self.timings = defaultdict(lambda: [0, 0.0, 0.0, 0])  # 단계 -> [호출 수, 총 시간, 최대 시간, 할당 증가량]
+        self.profiles = {}  # 가장 바깥 단계 -> pstats.Stats
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._sampler = None
+        self.profile_class = None
+        self.traced_memory = None
+        if 'cprofile' in modes:
+            import cProfile
+            import pstats
+
+            self.profile_class, self.stats_class = cProfile.Profile, pstats.Stats
+        if 'memory' in modes:
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self.traced_memory = tracemalloc.get_traced_memory
+        if 'sample' in modes:
+            self._sampler = threading.Thread(target=self._sample_loop, name='quilty-profiler', daemon=True)
+            self._sampler.start()
+
+    def record(self, name, seconds, allocated, profile):
+        with self.lock:
+            timing = self.timings[name]
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+            timing[3] += allocated
+            if profile is not None:
+                if name in self.profiles:
+                    self.profiles[name].add(profile)
+                else:
+                    self.profiles[name] = self.stats_class(profile)
+
+    def _sample_loop(self):
+        """단계 안에 있는 스레드의 호출 스택을 주기적으로 모아 접힌 스택(collapsed) 으로 집계"""
+        me = threading.get_ident()
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                stack = self.stacks.get(ident)
+                if ident == me or not stack:
+                    continue
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                self.samples[';'.join(stack[:1] + calls[::-1])] += 1
+
+    def finish(self):
+        import csv
+        import tracemalloc
+
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        with open(os.path.join(self.output_dir, 'stages.csv'), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Stage', 'Calls', 'Total_s', 'Mean_ms', 'Max_ms', 'Memory_Delta_KB'])
+            for name, (calls, total, longest, allocated) in sorted(self.timings.items(), key=lambda kv: -kv[1][1]):
+                writer.writerow([name, calls, round(total, 4), round(total / calls * 1000, 3),
+                                 round(longest * 1000, 3), round(allocated / 1024, 1)])
+
+        for name, stats in self.profiles.items():
+            stats.dump_stats(os.path.join(self.output_dir, f'{name}.prof'))
+
+        if self.samples:
+            with open(os.path.join(self.output_dir, 'collapsed.txt'), 'w', encoding='utf-8') as f:
+                for stack, count in self.samples.most_common():
+                    f.write(f'{stack} {count}\n')
+
+        if 'memory' in self.modes and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(os.path.join(self.output_dir, 'allocations.txt'), 'w', encoding='utf-8') as f:
+                f.write(f'# 현재 {current / 1e6:.1f} MB, 최대 {peak / 1e6:.1f} MB\n')
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                    f.write(f'{stat}\n')
+
+
+if os.environ.get('QUILTY_PROFILE', '').strip().lower() not in ('', '0', 'false', 'no'):
+    enable(os.environ['QUILTY_PROFILE'])
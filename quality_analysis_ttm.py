@@ -1,259 +1,248 @@
-import FinanceDataReader as fdr
 import pandas as pd
 import numpy as np
-import requests
-import time
 import os
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from scoring import calculate_scores
+from score_smoothing import smooth_scores
+from factor_store import save_snapshot
+from data_cache import FNGUIDE_HOST
+from data_sources import ITEM_COLS, FnGuideSource, get_source
+from fetch_scheduler import AdaptiveScheduler
+from quarterly_ledger import build_ledger, ttm_improvements
+from data_quality import MAX_FAILURE_RATE, gate
+from peers import build_peer_index
+from score_diff import diff_against_latest, print_summary as print_diff_summary
+from alerts import alert_against_latest, print_events as print_alert_events
+from profiling import profiled
+from universes import FINANCIAL_KEYWORDS, build_universe as build_profile_universe, describe as describe_profile, load_profiles
 
 # ---------------------------------------------------------
-# STEP 1. 유니버스 구성 (Main 블록으로 이동)
+# STEP 1. 유니버스 구성
 # ---------------------------------------------------------
-financial_keywords = ['은행', '보험', '증권', '금융', '캐피탈', '저축', '신용', 
-                      '생명', '화재', '손해', '투자', '자산운용', '리츠', 'SPAC']
+financial_keywords = FINANCIAL_KEYWORDS
+
+@profiled('universe')
+def build_universe(profile='default'):
+    """유니버스 프로필(universes.py)로 종목 선정 (default: KOSPI 시가총액 상위 500 + KOSDAQ 상위 200)"""
+    profiles = load_profiles()
+    if profile not in profiles:
+        raise ValueError(f"알 수 없는 유니버스: {profile} (사용 가능: {', '.join(profiles)})")
+    description = describe_profile(profiles[profile])
+    print(f"1. 유니버스 구성 중... ({description})")
+    df_universe = build_profile_universe(profiles[profile])
+    print(f"-> 최종 분석 대상: {len(df_universe)}개 ({description})")
+    return df_universe
 
 # ---------------------------------------------------------
 # STEP 2. TTM 기반 21가지 퀄리티 지표 수집
 # ---------------------------------------------------------
-def get_quality_factors_ttm(code, name):
-    """TTM 기반 21가지 퀄리티 디스크립터"""
+def _ttm(quarterly, account, num_quarters=4):
+    """최근 num_quarters 개 분기 합 (분기가 3개월 간격으로 연속이고 값이 모두 있을 때만)"""
+    values = quarterly[account].dropna() if account in quarterly else []
+    if len(values) < num_quarters:
+        return None
+    recent = values.iloc[-num_quarters:]
+    months = [int(q[:4]) * 12 + int(q[5:7]) for q in recent.index]
+    if any(b - a != 3 for a, b in zip(months, months[1:])):
+        return None
+    return float(recent.sum())
+
+
+def _latest(quarterly, account):
+    """최근 분기말 잔액 (최근 분기에 값이 없으면 None)"""
+    if not len(quarterly) or pd.isna(quarterly[account].iloc[-1]):
+        return None
+    return float(quarterly[account].iloc[-1])
+
+
+def _annual_values(annual, account, num_years=4):
+    return annual[account].dropna().iloc[-num_years:].tolist() if len(annual) else []
+
+
+@profiled()
+def compute_factors(statements, is_financial=False):
+    """
+    표준 계정 스키마(data_sources.Statements) -> 21가지 퀄리티 디스크립터
+
+    소스(FnGuide / OpenDART 일괄 파일)와 관계없이 같은 계산식을 사용한다.
+    """
+    quarterly, annual, ratios = statements.quarterly, statements.annual, statements.ratios
+
+    # ===== 1. 수익성 (5개) - TTM 기반 =====
+    profitability = {}
+    ttm_revenue = _ttm(quarterly, 'Revenue')
+    ttm_op_profit = _ttm(quarterly, 'OpProfit')
+    ttm_net_income = _ttm(quarterly, 'NetIncome')
+    
+    # Balance Sheet Items (최근 분기말)
+    total_assets = _latest(quarterly, 'TotalAssets')
+    total_equity = _latest(quarterly, 'TotalEquity')
+    total_debt = _latest(quarterly, 'TotalLiabilities')
+    
+    # ROE, ROA
+    profitability['ROE'] = (ttm_net_income / total_equity * 100) if ttm_net_income and total_equity else None
+    profitability['ROA'] = (ttm_net_income / total_assets * 100) if ttm_net_income and total_assets else None
+    
+    # ROIC (Manual TTM Calculation for Consistency)
+    # NOPAT approx = Operating Profit * (1 - Tax Rate 25%)
+    # IC approx = Total Equity + Total Debt
+    if ttm_op_profit and total_equity and total_debt:
+        nopat = ttm_op_profit * 0.75
+        invested_capital = total_equity + total_debt
+        profitability['ROIC'] = (nopat / invested_capital * 100)
+    else:
+        profitability['ROIC'] = ratios.get('ROIC') # Fallback
+    
+    # Margins
+    profitability['Operating_Margin'] = (ttm_op_profit / ttm_revenue * 100) if ttm_op_profit and ttm_revenue else None
+    ttm_cogs = _ttm(quarterly, 'COGS')
+    profitability['Gross_Margin'] = ((ttm_revenue - ttm_cogs) / ttm_revenue * 100) if ttm_revenue and ttm_cogs else None
+    
+    # ===== 2. 이익안정성 (5개) - 연간 데이터 기준 (최근 4개 회계연도) =====
+    earnings_stability = {}
+    
+    def calc_stability(vals):
+        if len(vals) >= 3:
+            growth_rates = [(vals[i]-vals[i-1])/abs(vals[i-1]) for i in range(1, len(vals)) if vals[i-1]!=0]
+            if len(growth_rates) >= 2:
+                return 1 / (np.std(growth_rates) + 0.1)
+        return 0
+
+    earnings_stability['Revenue_Stability'] = calc_stability(_annual_values(annual, 'Revenue'))
+    earnings_stability['OpProfit_Stability'] = calc_stability(_annual_values(annual, 'OpProfit'))
+    earnings_stability['NetIncome_Stability'] = calc_stability(_annual_values(annual, 'NetIncome'))
+    earnings_stability['EPS_Stability'] = calc_stability(_annual_values(annual, 'EPS'))
+    # 주당배당금 (없으면 배당금 지급액, 증가율은 규모와 무관)
+    dividends = _annual_values(annual, 'DPS') or [abs(v) for v in _annual_values(annual, 'DividendsPaid')]
+    earnings_stability['Dividend_Stability'] = calc_stability(dividends)
+    
+    # ===== 3. 자본구조 (4개) =====
+    capital_structure = {}
+    capital_structure['Debt_Ratio'] = (total_debt / total_equity * 100) if total_debt and total_equity else 100
+    
+    # Interest Coverage (Manual TTM Calculation)
+    ttm_interest_expense = _ttm(quarterly, 'InterestExpense')
+    if not ttm_interest_expense:
+         ttm_interest_expense = _ttm(quarterly, 'FinanceCost') # Fallback
+         
+    if ttm_op_profit and ttm_interest_expense and ttm_interest_expense > 0:
+        capital_structure['Interest_Coverage'] = ttm_op_profit / ttm_interest_expense
+    else:
+        capital_structure['Interest_Coverage'] = ratios.get('Interest_Coverage') # Fallback
+    
+    current_assets = _latest(quarterly, 'CurrentAssets')
+    current_liabilities = _latest(quarterly, 'CurrentLiabilities')
+    capital_structure['Current_Ratio'] = (current_assets / current_liabilities * 100) if current_assets and current_liabilities else None
+    capital_structure['Equity_Ratio'] = (total_equity / total_assets * 100) if total_equity and total_assets else None
+    
+    # ===== 4. 수익성 개선 (4개) - TTM YoY (분기 원장) =====
+    # FnGuide 는 4~5개 분기만 보여주므로 매일 받은 페이지를 분기 원장에 누적해서 8개 분기가 쌓이면
+    # TTM 대비 TTM 변화(%p) 사용 (OpenDART 일괄 파일은 분기가 모두 있으므로 메모리에서 원장 생성)
+    # 원장이 부족하면 소스가 주는 성장률(FnGuide 재무비율 페이지)을 proxy 로 사용
+    ledger = statements.ledger if statements.ledger is not None else build_ledger(quarterly)
+    ttm_yoy = ttm_improvements(ledger) or {}
+    
+    def get_improvement(key, proxy_key):
+        if ttm_yoy.get(key) is not None:
+            return ttm_yoy[key]
+        return (ratios.get(proxy_key) if proxy_key else None) or 0
+    
+    profitability_growth = {}
+    profitability_growth['ROE_Improvement'] = get_improvement('ROE_Improvement', 'EPS_Growth')  # Proxy using EPS Growth
+    profitability_growth['ROA_Improvement'] = get_improvement('ROA_Improvement', None)  # Not available from ratio page
+    profitability_growth['Operating_Margin_Improvement'] = get_improvement('Operating_Margin_Improvement', 'OpProfit_Growth')  # Proxy using Op Profit Growth
+    profitability_growth['Gross_Margin_Improvement'] = get_improvement('Gross_Margin_Improvement', 'Revenue_Growth')  # Proxy using Revenue Growth
+    profitability_growth['Improvement_Source'] = 'ttm_ledger' if ttm_yoy else 'ratio_proxy'
+    
+    # ===== 5. 회계품질 (3개) - TTM 기반 =====
+    accounting_quality = {}
+    ttm_operating_cf = _ttm(quarterly, 'OperatingCF')
+    accounting_quality['Accruals'] = abs(ttm_net_income - ttm_operating_cf) / (abs(ttm_net_income) + 1) if ttm_net_income and ttm_operating_cf else 0
+    
+    # NOA
+    cash_equiv = _latest(quarterly, 'Cash') or 0
+    if total_assets and total_equity and total_debt:
+        # NOA = (TotalAssets - Cash) - (TotalLiab - TotalDebt)
+        # TotalLiab = TotalAssets - TotalEquity
+        total_liab = total_assets - total_equity
+        op_assets = total_assets - cash_equiv
+        op_liab = total_liab - total_debt
+        accounting_quality['Net_Operating_Assets'] = (op_assets - op_liab) / total_assets
+    else:
+        accounting_quality['Net_Operating_Assets'] = 0
+        
+    # Earnings Smoothness (연간 순이익 / 영업현금흐름 변동성)
+    ni_vals = _annual_values(annual, 'NetIncome')
+    ocf_vals = _annual_values(annual, 'OperatingCF')
+    if len(ni_vals) >= 3 and len(ocf_vals) >= 3:
+        std_ni = np.std(ni_vals)
+        std_ocf = np.std(ocf_vals)
+        accounting_quality['Earnings_Smoothness'] = std_ni / std_ocf if std_ocf != 0 else 0
+    else:
+        accounting_quality['Earnings_Smoothness'] = 0
+    
+    # 시나리오 분석용 재무 항목 (scenarios.py 가 이 값으로 지표를 다시 계산)
+    items = dict(zip(ITEM_COLS, [ttm_revenue, ttm_cogs, ttm_op_profit, ttm_net_income, ttm_interest_expense,
+                                 ttm_operating_cf, total_assets, total_equity, total_debt,
+                                 current_assets, current_liabilities, _latest(quarterly, 'Cash')]))
+    
+    return {
+        'Code': statements.code,
+        'Is_Financial': is_financial,
+        'Latest_Quarter': quarterly.index[-1] if len(quarterly) else None,
+        **profitability,
+        **earnings_stability,
+        **capital_structure,
+        **profitability_growth,
+        **accounting_quality,
+        **items
+    }
+
+
+@profiled('factors')
+def get_quality_factors_ttm(code, name, source=None):
+    """
+    TTM 기반 21가지 퀄리티 디스크립터
+
+    Args:
+        source: data_sources 어댑터 (기본: FnGuide 페이지)
+    """
     try:
         is_financial = any(keyword in name for keyword in financial_keywords)
-        firm_code = 'A' + code
-        
-        # ===== 재무제표 (분기 데이터) =====
-        fs_url = f"http://comp.fnguide.com/SVO2/ASP/SVD_Finance.asp?pGB=1&cID=&MenuYn=Y&ReportGB=D&NewMenuID=103&stkGb=701&gicode={firm_code}"
-        fs_page = requests.get(fs_url, timeout=10)
-        fs_tables = pd.read_html(StringIO(fs_page.text))
-        
-        # Annual Tables (for Stability) - Index 0
-        income_a = fs_tables[0].set_index(fs_tables[0].columns[0]) if len(fs_tables) > 0 else None
-        
-        # Quarterly Tables
-        income_df = fs_tables[1].set_index(fs_tables[1].columns[0]) if len(fs_tables) > 1 else None
-        balance_df = fs_tables[3].set_index(fs_tables[3].columns[0]) if len(fs_tables) > 3 else None
-        cashflow_df = fs_tables[5].set_index(fs_tables[5].columns[0]) if len(fs_tables) > 5 else None
-        
-        # ===== 재무비율 (ROIC, 이자보상배율, 성장성) =====
-        ratio_url = f"http://comp.fnguide.com/SVO2/ASP/SVD_FinanceRatio.asp?pGB=1&gicode={firm_code}&cID=&MenuYn=Y&ReportGB=&NewMenuID=104&stkGb=701"
-        ratio_page = requests.get(ratio_url, timeout=10)
-        ratio_tables = pd.read_html(StringIO(ratio_page.text))
-        ratio_df = ratio_tables[0].set_index(ratio_tables[0].columns[0]) if len(ratio_tables) > 0 else None
-        
-        # Helper: Get Ratio Value
-        def get_ratio_value(df, row_keywords):
-            if df is None: return None
-            cols = df.columns
-            recent_col = cols[-1] # Assume last column is recent
-            for idx in df.index:
-                if any(k in str(idx) for k in row_keywords):
-                    try:
-                        val = float(df.loc[idx, recent_col])
-                        return val
-                    except:
-                        pass
-            return None
-
-        # ===== TTM 계산 함수 =====
-        def calculate_ttm(df, row_name, num_quarters=4):
-            if df is None: return None
-            for idx in df.index:
-                if row_name in str(idx):
-                    values = []
-                    for col in df.columns[:num_quarters]:
-                        try:
-                            val = float(df.loc[idx, col])
-                            if not np.isnan(val): values.append(val)
-                        except: pass
-                    if len(values) >= num_quarters: return sum(values[:num_quarters])
-            return None
-        
-        def get_quarterly_values(df, row_name, max_quarters=8):
-            if df is None: return []
-            for idx in df.index:
-                if row_name in str(idx):
-                    values = []
-                    for col in df.columns[:max_quarters]:
-                        try:
-                            val = float(df.loc[idx, col])
-                            if not np.isnan(val): values.append(val)
-                        except: pass
-                    return values
-            return []
-
-        # ===== 1. 수익성 (5개) - TTM 기반 =====
-        profitability = {}
-        ttm_revenue = calculate_ttm(income_df, '매출액')
-        ttm_op_profit = calculate_ttm(income_df, '영업이익')
-        ttm_net_income = calculate_ttm(income_df, '당기순이익')
-        
-        # Balance Sheet Items
-        recent_col = None
-        if balance_df is not None:
-            date_cols = [c for c in balance_df.columns if '/' in str(c) and c[0].isdigit()]
-            if date_cols: recent_col = date_cols[-1]
-            
-        def get_bs_value(keywords):
-            if balance_df is None or not recent_col: return None
-            for idx in balance_df.index:
-                if any(k in str(idx) or str(idx) == k for k in keywords):
-                    try: return float(balance_df.loc[idx, recent_col])
-                    except: pass
-            return None
-
-        total_assets = get_bs_value(['자산총계', '자산'])
-        total_equity = get_bs_value(['자본총계', '자본'])
-        total_debt = get_bs_value(['부채총계', '부채'])
-        
-        # ROE, ROA
-        profitability['ROE'] = (ttm_net_income / total_equity * 100) if ttm_net_income and total_equity else None
-        profitability['ROA'] = (ttm_net_income / total_assets * 100) if ttm_net_income and total_assets else None
-        
-        # ROIC (Manual TTM Calculation for Consistency)
-        # NOPAT approx = Operating Profit * (1 - Tax Rate 25%)
-        # IC approx = Total Equity + Total Debt
-        if ttm_op_profit and total_equity and total_debt:
-            nopat = ttm_op_profit * 0.75
-            invested_capital = total_equity + total_debt
-            profitability['ROIC'] = (nopat / invested_capital * 100)
-        else:
-            profitability['ROIC'] = get_ratio_value(ratio_df, ['ROIC']) # Fallback
-        
-        # Margins
-        profitability['Operating_Margin'] = (ttm_op_profit / ttm_revenue * 100) if ttm_op_profit and ttm_revenue else None
-        ttm_cogs = calculate_ttm(income_df, '매출원가')
-        profitability['Gross_Margin'] = ((ttm_revenue - ttm_cogs) / ttm_revenue * 100) if ttm_revenue and ttm_cogs else None
-        
-        # ===== 2. 이익안정성 (5개) - 연간 데이터 기준 =====
-        earnings_stability = {}
-        
-        def calc_stability(df, row_keywords):
-            if df is None: return 0
-            cols = df.columns[-4:] if len(df.columns) >= 4 else df.columns
-            vals = []
-            for idx in df.index:
-                if any(k in str(idx) for k in row_keywords):
-                    for col in cols:
-                        try: vals.append(float(df.loc[idx, col]))
-                        except: pass
-                    break
-            if len(vals) >= 3:
-                growth_rates = [(vals[i]-vals[i-1])/abs(vals[i-1]) for i in range(1, len(vals)) if vals[i-1]!=0]
-                if len(growth_rates) >= 2:
-                    return 1 / (np.std(growth_rates) + 0.1)
-            return 0
-
-        earnings_stability['Revenue_Stability'] = calc_stability(income_a, ['매출액'])
-        earnings_stability['OpProfit_Stability'] = calc_stability(income_a, ['영업이익'])
-        earnings_stability['NetIncome_Stability'] = calc_stability(income_a, ['당기순이익'])
-        earnings_stability['EPS_Stability'] = calc_stability(income_a, ['EPS', '주당순이익'])
-        earnings_stability['Dividend_Stability'] = calc_stability(ratio_df, ['주당배당금', 'DPS'])
-        
-        # ===== 3. 자본구조 (4개) =====
-        capital_structure = {}
-        capital_structure['Debt_Ratio'] = (total_debt / total_equity * 100) if total_debt and total_equity else 100
-        
-        # Interest Coverage (Manual TTM Calculation)
-        # Try to fetch Interest Expense from Income Statement
-        ttm_interest_expense = calculate_ttm(income_df, '이자비용')
-        if not ttm_interest_expense:
-             ttm_interest_expense = calculate_ttm(income_df, '금융원가') # Fallback
-             
-        if ttm_op_profit and ttm_interest_expense and ttm_interest_expense > 0:
-            capital_structure['Interest_Coverage'] = ttm_op_profit / ttm_interest_expense
-        else:
-            capital_structure['Interest_Coverage'] = get_ratio_value(ratio_df, ['이자보상배율']) # Fallback
-        
-        current_assets = get_bs_value(['유동자산'])
-        current_liabilities = get_bs_value(['유동부채'])
-        capital_structure['Current_Ratio'] = (current_assets / current_liabilities * 100) if current_assets and current_liabilities else None
-        capital_structure['Equity_Ratio'] = (total_equity / total_assets * 100) if total_equity and total_assets else None
-        
-        # ===== 4. 수익성 개선 (4개) - 분기 YoY (Ratio Page Proxy) =====
-        # Note: TTM YoY requires 8 quarters, but FnGuide only provides 4-5 quarters
-        # Using quarterly YoY from Ratio page as proxy
-        profitability_growth = {}
-        profitability_growth['ROE_Improvement'] = get_ratio_value(ratio_df, ['EPS증가율']) or 0  # Proxy using EPS Growth
-        profitability_growth['ROA_Improvement'] = 0  # Not available directly
-        profitability_growth['Operating_Margin_Improvement'] = get_ratio_value(ratio_df, ['영업이익증가율']) or 0  # Proxy using Op Profit Growth
-        profitability_growth['Gross_Margin_Improvement'] = get_ratio_value(ratio_df, ['매출액증가율']) or 0  # Proxy using Revenue Growth
-        
-        # ===== 5. 회계품질 (3개) - TTM 기반 =====
-        accounting_quality = {}
-        ttm_operating_cf = calculate_ttm(cashflow_df, '영업활동')
-        accounting_quality['Accruals'] = abs(ttm_net_income - ttm_operating_cf) / (abs(ttm_net_income) + 1) if ttm_net_income and ttm_operating_cf else 0
-        
-        # NOA
-        cash_equiv = get_bs_value(['현금및현금성자산']) or 0
-        if total_assets and total_equity and total_debt:
-            # NOA = (TotalAssets - Cash) - (TotalLiab - TotalDebt)
-            # TotalLiab = TotalAssets - TotalEquity
-            total_liab = total_assets - total_equity
-            op_assets = total_assets - cash_equiv
-            op_liab = total_liab - total_debt
-            accounting_quality['Net_Operating_Assets'] = (op_assets - op_liab) / total_assets
-        else:
-            accounting_quality['Net_Operating_Assets'] = 0
-            
-        # Earnings Smoothness
-        ni_vals = []
-        ocf_vals = []
-        if income_a is not None:
-            for idx in income_a.index:
-                if '당기순이익' in str(idx):
-                    ni_vals = [float(income_a.loc[idx, c]) for c in income_a.columns[-4:]]
-                    break
-        if len(fs_tables) > 4: # Annual Cashflow
-            cashflow_a = fs_tables[4].set_index(fs_tables[4].columns[0])
-            for idx in cashflow_a.index:
-                if '영업활동' in str(idx):
-                    ocf_vals = [float(cashflow_a.loc[idx, c]) for c in cashflow_a.columns[-4:]]
-                    break
-        
-        if len(ni_vals) >= 3 and len(ocf_vals) >= 3:
-            std_ni = np.std(ni_vals)
-            std_ocf = np.std(ocf_vals)
-            accounting_quality['Earnings_Smoothness'] = std_ni / std_ocf if std_ocf != 0 else 0
-        else:
-            accounting_quality['Earnings_Smoothness'] = 0
-        
-        result = {
-            'Code': code,
-            'Is_Financial': is_financial,
-            **profitability,
-            **earnings_stability,
-            **capital_structure,
-            **profitability_growth,
-            **accounting_quality
-        }
-        return result
-
+        statements = (source or FnGuideSource()).statements(code)
+        return compute_factors(statements, is_financial)
     except Exception as e:
         return None
 
 # ---------------------------------------------------------
 # STEP 3. 데이터 수집
 # ---------------------------------------------------------
-if __name__ == "__main__":
-    print("1. 유니버스 구성 중... (KOSPI 500위 + KOSDAQ 200위)")
-    df_kospi = fdr.StockListing('KOSPI')
-    df_kosdaq = fdr.StockListing('KOSDAQ')
-    
-    df_kospi_top = df_kospi.sort_values('Marcap', ascending=False).head(500)
-    df_kosdaq_top = df_kosdaq.sort_values('Marcap', ascending=False).head(200)
-    
-    df_universe = pd.concat([df_kospi_top, df_kosdaq_top]).reset_index(drop=True)
-    
+# FnGuide 동시 요청 수 상한 (시작은 저장된 값 또는 1개, 지연 / 오류를 보면서 조절)
+MAX_CONCURRENCY = 4
+
+@profiled()
+def collect(df_universe, output_file="quality_analysis_all.csv", source='fnguide', max_concurrency=MAX_CONCURRENCY):
+    """
+    유니버스 전 종목 지표 수집 후 output_file 에 10개 단위로 추가 저장 (이어하기 지원)
+
+    Args:
+        source: 'fnguide' (종목별 페이지) / 'dart' (OpenDART 일괄 파일 변환본, dart_bulk.py)
+        max_concurrency: 네트워크 소스의 동시 요청 수 상한 (실제 동시 요청 수는 fetch_scheduler 가 조절)
+    """
     target_codes = df_universe['Code'].tolist()
-    print(f"-> 최종 분석 대상: {len(target_codes)}개 (KOSPI 500 + KOSDAQ 200)")
+    source = get_source(source) if isinstance(source, str) else source
+    # 고정 간격 대신 지연 시간 / 오류율로 동시 요청 수 조절 (학습한 값은 cache/scheduler.json)
+    scheduler = getattr(source, 'scheduler', None)
+    if source.network and scheduler is None:
+        scheduler = source.scheduler = AdaptiveScheduler.load(urlparse(FNGUIDE_HOST).netloc, max_limit=max_concurrency)
 
-    print("2. TTM 기반 21가지 퀄리티 지표 수집 시작...")
+    print(f"2. TTM 기반 21가지 퀄리티 지표 수집 시작... (소스: {source.name})")
     data_list = []
     success_count = 0
     fail_count = 0
     
-    output_file = "quality_analysis_all.csv"
-    
     # 기존 파일이 있으면 로드하여 중복 방지 (Resuming 기능)
     try:
         existing_df = pd.read_csv(output_file)
@@ -263,133 +252,141 @@ if __name__ == "__main__":
         processed_codes = set()
         print(f"-> 새로운 분석 시작: {output_file}")
 
-    for idx, code in enumerate(target_codes):
-        if code in processed_codes:
-            continue
+    pending = [(idx, code, df_universe.loc[idx, 'Name']) for idx, code in enumerate(target_codes)
+               if code not in processed_codes]
+
+    def fetch(item):
+        idx, code, name = item
+        return item, get_quality_factors_ttm(code, name, source)
+
+    # 요청 순서대로 결과를 받으므로 진행 표시 / 저장 순서는 순차 수집과 같다
+    executor = ThreadPoolExecutor(max_workers=max_concurrency) if scheduler else None
+    results = executor.map(fetch, pending) if executor else map(fetch, pending)
+    try:
+        for (idx, code, name), result in results:
+            print(f"[{idx+1}/{len(target_codes)}] {name} ({code})", end=" ")
+            if result:
+                data_list.append(result)
+                success_count += 1
+                print("✓")
+            else:
+                fail_count += 1
+                print("✗")
             
-        name = df_universe.loc[idx, 'Name']
-        print(f"[{idx+1}/{len(target_codes)}] {name} ({code})", end=" ")
-        
-        result = get_quality_factors_ttm(code, name)
-        if result:
-            data_list.append(result)
-            success_count += 1
-            print("✓")
-        else:
-            fail_count += 1
-            print("✗")
-        
-        # 10개마다 또는 마지막에 저장
-        if len(data_list) >= 10 or idx == len(target_codes) - 1:
-            if data_list:
-                temp_df = pd.DataFrame(data_list)
-                
-                # 점수 계산 로직 (임시 점수 계산 - 전체 데이터가 아니므로 완벽하진 않지만 대략적인 확인용)
-                # 최종 점수는 모든 데이터 수집 후 다시 계산해야 정확함
-                # 여기서는 Raw Data만 저장하고, 최종 분석 시 점수 재계산 권장
-                
-                # CSV에 Append
-                if not os.path.exists(output_file):
-                    temp_df.to_csv(output_file, index=False, encoding='utf-8-sig', mode='w')
-                else:
-                    temp_df.to_csv(output_file, index=False, encoding='utf-8-sig', mode='a', header=False)
-                
+            # 10개마다 저장 (남은 종목은 마지막에)
+            if len(data_list) >= 10:
+                _append_rows(data_list, output_file)
                 data_list = [] # 리스트 초기화
-        
-        time.sleep(0.2) # 속도 약간 상향 (0.5 -> 0.2)
+    finally:
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+        _append_rows(data_list, output_file)
+        if scheduler:
+            scheduler.save()
+            print(f"\n-> 요청 속도: {scheduler.summary()}")
     
     print(f"\n수집 완료. 최종 점수 산출 및 정렬을 진행합니다...")
+
+
+def _append_rows(data_list, output_file):
+    """수집한 원본 지표를 CSV 에 추가 (점수는 전체 수집 후 score() 에서 다시 계산)"""
+    if not data_list:
+        return
+    temp_df = pd.DataFrame(data_list)
+    if not os.path.exists(output_file):
+        temp_df.to_csv(output_file, index=False, encoding='utf-8-sig', mode='w')
+    else:
+        # 이어쓰기는 기존 헤더 순서에 맞춤 (점수 컬럼이 붙은 파일 / 컬럼이 추가되기 전 파일)
+        header = pd.read_csv(output_file, nrows=0).columns
+        temp_df.reindex(columns=header).to_csv(output_file, index=False, encoding='utf-8-sig', mode='a', header=False)
+
+# ---------------------------------------------------------
+# STEP 4. 신영증권 방식 퀄리티 점수 계산 (전체 데이터 로드 후 일괄 처리)
+# ---------------------------------------------------------
+@profiled()
+def score(output_file="quality_analysis_all.csv", max_failure_rate=MAX_FAILURE_RATE, previous='latest', save=True,
+          smoothing='latest'):
+    """
+    수집된 CSV 전체로 점수를 다시 계산해서 저장 (네트워크 불필요)
+
+    데이터 품질 게이트(data_quality.py)를 통과한 종목만 점수를 매긴다.
+    격리 비율이 max_failure_rate 를 넘으면 DataQualityError 로 중단 (스냅샷 저장 안 함)
+
+    Args:
+        previous: 일간 변화 검사 기준 스냅샷 (data_quality.gate 와 같음)
+        save: False 면 output_file 만 쓰고 격리 / 변화 분석 / 스냅샷 / peer 인덱스 / 평활 상태는 건드리지 않음 (재생용)
+        smoothing: 직전 평활 상태 (score_smoothing.smooth_scores 와 같음)
+    """
+    if not os.path.exists(output_file):
+        print("저장된 데이터가 없습니다.")
+        return None
+
+    df_final = pd.read_csv(output_file)
+    # 중복 제거 (혹시 모를 중복 방지)
+    df_final = df_final.drop_duplicates(subset=['Code'])
+    
+    # 범위 / 결측률 / 일간 변화 / 정합성 검사 -> 이상 종목 격리
+    df_final = gate(df_final, max_failure_rate, previous, save)
+    
+    # Z-Score 표준화 -> 카테고리 점수 -> 가중 평균 (scoring.py)
+    df_final = calculate_scores(df_final)
+    
+    # 실행 간 평활 점수 (직전 상태 파일 + 오늘 카테고리 점수, score_smoothing.py)
+    df_final = smooth_scores(df_final, smoothing, save)
     
     # ---------------------------------------------------------
-    # STEP 4. 신영증권 방식 퀄리티 점수 계산 (전체 데이터 로드 후 일괄 처리)
+    # STEP 5. 결과 확인
     # ---------------------------------------------------------
-    if os.path.exists(output_file):
-        df_final = pd.read_csv(output_file)
-        # 중복 제거 (혹시 모를 중복 방지)
-        df_final = df_final.drop_duplicates(subset=['Code'])
-        
-        # 유니버스 정보 병합 (Name 등 확인)
-        # df_final에는 이미 Name이 있지만, 확실히 하기 위해
-        # df_final = pd.merge(df_final, df_universe[['Code', 'Name']], on='Code', how='left') 
-        
-        def z_score(x): 
-            if x.std() == 0:
-                return pd.Series([0] * len(x), index=x.index)
-            return (x - x.mean()) / x.std()
-        
-        # 1. 수익성 점수
-        profitability_cols = ['ROE', 'ROA', 'ROIC', 'Operating_Margin', 'Gross_Margin']
-        profitability_scores = []
-        for col in profitability_cols:
-            if col in df_final.columns:
-                df_final[f'Score_{col}'] = z_score(df_final[col].fillna(df_final[col].median()))
-                profitability_scores.append(f'Score_{col}')
-        
-        df_final['Profitability_Score'] = df_final[profitability_scores].mean(axis=1) if profitability_scores else 0
-        
-        # 2. 이익안정성 점수
-        stability_cols = ['Revenue_Stability', 'OpProfit_Stability', 'NetIncome_Stability', 'EPS_Stability', 'Dividend_Stability']
-        stability_scores = []
-        for col in stability_cols:
-            if col in df_final.columns:
-                df_final[f'Score_{col}'] = z_score(df_final[col].fillna(0))
-                stability_scores.append(f'Score_{col}')
-        
-        df_final['Stability_Score'] = df_final[stability_scores].mean(axis=1) if stability_scores else 0
-        
-        # 3. 자본구조 점수
-        df_final['Score_Debt_Ratio'] = z_score(df_final['Debt_Ratio'].fillna(100))
-        capital_scores = ['Score_Debt_Ratio']
-        for col in ['Interest_Coverage', 'Current_Ratio', 'Equity_Ratio']:
-            if col in df_final.columns:
-                df_final[f'Score_{col}'] = z_score(df_final[col].fillna(df_final[col].median()))
-                capital_scores.append(f'Score_{col}')
-        
-        df_final['Capital_Score'] = df_final[capital_scores].mean(axis=1)
-        
-        # 4. 수익성 개선 점수
-        improvement_cols = ['ROE_Improvement', 'ROA_Improvement', 'Operating_Margin_Improvement', 'Gross_Margin_Improvement']
-        improvement_scores = []
-        for col in improvement_cols:
-            if col in df_final.columns:
-                df_final[f'Score_{col}'] = z_score(df_final[col].fillna(0))
-                improvement_scores.append(f'Score_{col}')
-        
-        df_final['Improvement_Score'] = df_final[improvement_scores].mean(axis=1) if improvement_scores else 0
-        
-        # 5. 회계품질 점수
-        accounting_cols = ['Accruals', 'Net_Operating_Assets', 'Earnings_Smoothness']
-        accounting_scores = []
-        for col in accounting_cols:
-            if col in df_final.columns:
-                df_final[f'Score_{col}'] = z_score(df_final[col].fillna(0)) * -1
-                accounting_scores.append(f'Score_{col}')
-        
-        df_final['Accounting_Score'] = df_final[accounting_scores].mean(axis=1) if accounting_scores else 0
-        
-        # 신영증권 방식 가중 평균
-        df_final['Quality_Score_Total'] = (
-            df_final['Profitability_Score'] * 0.30 +
-            df_final['Stability_Score'] * 0.25 +
-            df_final['Capital_Score'] * 0.20 +
-            df_final['Improvement_Score'] * 0.15 +
-            df_final['Accounting_Score'] * 0.10
-        )
-        
-        df_final['Quality_Score'] = df_final['Quality_Score_Total'].rank(pct=True) * 100
-        
-        # ---------------------------------------------------------
-        # STEP 5. 결과 확인
-        # ---------------------------------------------------------
-        result_cols = ['Code', 'Is_Financial', 'Quality_Score', 
-                       'Profitability_Score', 'Stability_Score', 'Capital_Score', 'Improvement_Score', 'Accounting_Score']
-        
-        print("\n[전체 종목 분석 완료!]")
-        print("데이터 기준: 2025년 Q3 TTM (최근 12개월)")
-        print(df_final[result_cols].sort_values('Quality_Score', ascending=False).head(20))
-        
-        # CSV 저장 (최종본)
-        df_final.sort_values('Quality_Score', ascending=False).to_csv(output_file, index=False, encoding='utf-8-sig')
-        print(f"\n✅ 전체 결과 저장: {output_file} ({len(df_final)}개 종목)")
-    else:
-        print("저장된 데이터가 없습니다.")
+    result_cols = ['Code', 'Is_Financial', 'Quality_Score', 'Smoothed_Quality_Score',
+                   'Profitability_Score', 'Stability_Score', 'Capital_Score', 'Improvement_Score', 'Accounting_Score']
+    result_cols = [col for col in result_cols if col in df_final.columns]
+    
+    print("\n[전체 종목 분석 완료!]")
+    if 'Latest_Quarter' in df_final.columns and df_final['Latest_Quarter'].notna().any():
+        print(f"데이터 기준: {df_final['Latest_Quarter'].mode().iloc[0]} TTM (최근 12개월)")
+    print(df_final[result_cols].sort_values('Quality_Score', ascending=False).head(20))
+    
+    # CSV 저장 (최종본)
+    df_final.sort_values('Quality_Score', ascending=False).to_csv(output_file, index=False, encoding='utf-8-sig')
+    print(f"\n✅ 전체 결과 저장: {output_file} ({len(df_final)}개 종목)")
+    if not save:
+        return df_final
+    
+    # 직전 스냅샷 대비 점수 변화 (history/diff/diff_YYYYMMDD.csv)
+    try:
+        diff = diff_against_latest(df_final)
+        if diff is not None:
+            print_diff_summary(diff)
+    except Exception as e:
+        print(f"⚠ 점수 변화 분석 실패: {e}")
+    
+    # 관심 종목 알림 (alerts.json 이 있을 때만, history/alerts/)
+    try:
+        events = alert_against_latest(df_final)
+        if events is not None:
+            print(f"\n[관심 종목 알림] 새 알림 {len(events)}건")
+            print_alert_events(events)
+    except Exception as e:
+        print(f"⚠ 관심 종목 알림 실패: {e}")
+    
+    # 날짜별 스냅샷 보관 (가중치 최적화 / IC 분석용 히스토리)
+    snapshot_file = save_snapshot(df_final)
+    print(f"✅ 스냅샷 저장: {snapshot_file}")
+    
+    # 유사 종목 검색 인덱스 재생성 (peers.py)
+    try:
+        build_peer_index(df_final)
+        print("✅ peer 인덱스 갱신")
+    except Exception as e:
+        print(f"⚠ peer 인덱스 갱신 실패: {e}")
+    return df_final
+
+
+def main(output_file="quality_analysis_all.csv", source='fnguide', max_concurrency=MAX_CONCURRENCY):
+    df_universe = build_universe()
+    collect(df_universe, output_file, source, max_concurrency)
+    return score(output_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+분기 원장 (Quarterly Ledger)
+
+FnGuide 재무제표 페이지는 최근 4~5개 분기만 보여주기 때문에 TTM YoY(8개 분기)를
+바로 계산할 수 없다. 매일 받은 페이지의 분기 데이터를 종목별 원장에 누적하고,
+연간 표로 빠진 4분기(연간 - 1~3분기)를 보충해서 진짜 TTM 대비 TTM 변화를 계산한다.
+
+    cache/ledger/{variant}/{code}.csv   (variant: consolidated = 연결, separate = 별도)
+
+새 분기가 공시되면 원장에 한 줄이 추가되고, 바뀐 분기부터만 TTM 을 다시 계산한다.
+
+사용법:
+    python quarterly_ledger.py --rebuild        # 캐시된 과거 페이지 전체로 원장 재구성
+"""
+
+import argparse
+import os
+import re
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+from data_cache import CACHE_DIR, cached_codes, list_cached_pages, read_cached_page
+from profiling import profiled
+
+LEDGER_DIR = os.path.join(CACHE_DIR, 'ledger')
+
+# 손익 (분기 합산 대상) / 재무상태 (분기말 잔액)
+FLOW_ITEMS = {
+    'Revenue': ['매출액'],
+    'COGS': ['매출원가'],
+    'OpProfit': ['영업이익'],
+    'NetIncome': ['당기순이익'],
+}
+STOCK_ITEMS = {
+    'TotalAssets': ['자산총계', '자산'],
+    'TotalEquity': ['자본총계', '자본'],
+}
+ITEMS = list(FLOW_ITEMS) + list(STOCK_ITEMS)
+TTM_COLS = [f'TTM_{item}' for item in FLOW_ITEMS]
+RATIO_COLS = ['ROE_TTM', 'ROA_TTM', 'Operating_Margin_TTM', 'Gross_Margin_TTM']
+LEDGER_COLS = ['Quarter', 'Source'] + ITEMS + TTM_COLS + RATIO_COLS
+
+QUARTER_PATTERN = re.compile(r'^(\d{4})/(\d{2})')
+
+# 원장 비율 -> quality_analysis_ttm 개선 지표
+IMPROVEMENT_MAP = {
+    'ROE_TTM': 'ROE_Improvement',
+    'ROA_TTM': 'ROA_Improvement',
+    'Operating_Margin_TTM': 'Operating_Margin_Improvement',
+    'Gross_Margin_TTM': 'Gross_Margin_Improvement',
+}
+
+
+def _month_index(quarter):
+    """'2025/09' -> 연*12+월 (분기 연속성 확인용)"""
+    m = QUARTER_PATTERN.match(str(quarter))
+    return int(m.group(1)) * 12 + int(m.group(2)) if m else None
+
+
+def row_values(df, keywords):
+    """keywords 를 포함하는 첫 행의 {분기: 값} (get_quality_factors_ttm 과 같은 행 매칭 규칙)"""
+    if df is None:
+        return {}
+    date_cols = [c for c in df.columns if QUARTER_PATTERN.match(str(c))]
+    for idx in df.index:
+        if any(k in str(idx) or str(idx) == k for k in keywords):
+            row = df.loc[idx]
+            if isinstance(row, pd.DataFrame):
+                row = row.iloc[0]
+            values = pd.to_numeric(row[date_cols], errors='coerce')
+            return {QUARTER_PATTERN.match(str(c)).group(0): v for c, v in values.items() if pd.notna(v)}
+    return {}
+
+
+def _table(fs_tables, i):
+    return fs_tables[i].set_index(fs_tables[i].columns[0]) if len(fs_tables) > i else None
+
+
+# ---------------------------------------------------------
+# 1. 페이지 -> 분기 데이터
+# ---------------------------------------------------------
+def extract_quarters(fs_tables):
+    """
+    재무제표 페이지 표(pd.read_html 결과)에서 분기 데이터 추출
+
+    Returns:
+        (quarterly, annual)
+        - quarterly: index=분기, columns=ITEMS (분기 손익 / 분기말 잔액)
+        - annual: index=회계연도말, columns=ITEMS (연간 손익 / 연말 잔액, 결산월 컬럼만)
+    """
+    income_a, income_q = _table(fs_tables, 0), _table(fs_tables, 1)
+    balance_a, balance_q = _table(fs_tables, 2), _table(fs_tables, 3)
+
+    def collect(income, balance):
+        data = {}
+        for item, keywords in FLOW_ITEMS.items():
+            data[item] = row_values(income, keywords)
+        for item, keywords in STOCK_ITEMS.items():
+            data[item] = row_values(balance, keywords)
+        frame = pd.DataFrame(data, columns=ITEMS)
+        return frame.sort_index()
+
+    quarterly = collect(income_q, balance_q)
+    annual = collect(income_a, balance_a)
+    if len(annual):
+        # 연간 표 마지막 컬럼은 누적(YTD)인 경우가 있으므로 결산월 컬럼만 사용
+        months = annual.index.str[-2:]
+        annual = annual[months == months.value_counts().idxmax()]
+    return quarterly, annual
+
+
+# ---------------------------------------------------------
+# 2. 원장 저장 / 갱신
+# ---------------------------------------------------------
+def ledger_path(code, variant='consolidated'):
+    return os.path.join(LEDGER_DIR, variant, f'{code}.csv')
+
+
+def load_ledger(code, variant='consolidated'):
+    path = ledger_path(code, variant)
+    if data_cache.ARCHIVE is not None:
+        # 실행 기록 / 재생: 이번 실행이 읽은 원장 파일 그대로 (재생 중에는 디스크 원장을 보지 않음)
+        data = data_cache.ARCHIVE.file(f'ledger/{variant}/{code}.csv', path)
+        source = BytesIO(data) if data is not None else None
+    else:
+        source = path if os.path.exists(path) else None
+    if source is None:
+        return pd.DataFrame(columns=LEDGER_COLS).set_index('Quarter')
+    return pd.read_csv(source, dtype={'Quarter': str}).set_index('Quarter')
+
+
+def save_ledger(code, ledger, variant='consolidated'):
+    if data_cache.ARCHIVE is not None and data_cache.ARCHIVE.replaying:
+        return
+    path = ledger_path(code, variant)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    ledger.reset_index()[LEDGER_COLS].to_csv(path, index=False, encoding='utf-8-sig')
+
+
+def _upsert(ledger, rows, source):
+    """rows 를 원장에 반영하고 값이 바뀐 가장 이른 분기를 반환 (없으면 None)"""
+    changed = []
+    for quarter, values in rows.iterrows():
+        values = values.dropna()
+        if values.empty:
+            continue
+        if quarter in ledger.index:
+            current = ledger.loc[quarter, values.index]
+            # 분기 실적 공시가 4분기 추정치(derived)보다 우선, 같은 출처는 최신 페이지(정정 반영)가 우선
+            if source == 'derived' and ledger.loc[quarter, 'Source'] == 'quarterly':
+                continue
+            if np.allclose(current.astype(float), values.astype(float), equal_nan=True) \
+                    and ledger.loc[quarter, 'Source'] == source:
+                continue
+        ledger.loc[quarter, values.index] = values
+        ledger.loc[quarter, 'Source'] = source
+        changed.append(quarter)
+    return min(changed, key=_month_index) if changed else None
+
+
+def _derive_q4(ledger, annual):
+    """연간 손익 - (1~3분기 합) 으로 누락된 결산 분기 보충"""
+    rows = {}
+    for fy_end, annual_row in annual.iterrows():
+        fy_idx = _month_index(fy_end)
+        prev = [q for q in ledger.index if fy_idx - 9 <= _month_index(q) < fy_idx]
+        row = {item: annual_row[item] for item in STOCK_ITEMS}
+        if len(prev) == 3:
+            for item in FLOW_ITEMS:
+                flows = ledger.loc[prev, item].astype(float)
+                if flows.notna().all() and pd.notna(annual_row[item]):
+                    row[item] = annual_row[item] - flows.sum()
+        rows[fy_end] = row
+    return pd.DataFrame.from_dict(rows, orient='index', columns=ITEMS)
+
+
+def _roll_ttm(ledger, from_quarter):
+    """from_quarter 이후 분기만 TTM / TTM 비율 재계산 (증분 갱신, 컬럼 단위 rolling)"""
+    ledger.sort_index(key=lambda idx: idx.map(_month_index), inplace=True)
+    months = np.array([_month_index(q) for q in ledger.index])
+    start = list(ledger.index).index(from_quarter)
+    # 4개 분기가 3개월 간격으로 연속인 경우에만 TTM 계산
+    consecutive = pd.Series(np.r_[False, np.diff(months) == 3]).rolling(3).sum().to_numpy() == 3
+
+    ttm = {}
+    for item in FLOW_ITEMS:
+        # rolling sum 은 창 안에 NaN 이 하나라도 있으면 NaN
+        rolled = ledger[item].astype(float).rolling(4).sum().to_numpy()
+        ttm[item] = np.where(consecutive, rolled, np.nan)
+    equity, assets = ledger['TotalEquity'].astype(float).to_numpy(), ledger['TotalAssets'].astype(float).to_numpy()
+    rev, cogs, op, ni = ttm['Revenue'], ttm['COGS'], ttm['OpProfit'], ttm['NetIncome']
+    with np.errstate(all='ignore'):
+        columns = {f'TTM_{item}': values for item, values in ttm.items()}
+        columns['ROE_TTM'] = np.where(equity != 0, ni / equity * 100, np.nan)
+        columns['ROA_TTM'] = np.where(assets != 0, ni / assets * 100, np.nan)
+        columns['Operating_Margin_TTM'] = np.where(rev != 0, op / rev * 100, np.nan)
+        columns['Gross_Margin_TTM'] = np.where(rev != 0, (rev - cogs) / rev * 100, np.nan)
+    for col, values in columns.items():
+        ledger[col] = ledger[col].astype(float)
+        ledger.iloc[start:, ledger.columns.get_loc(col)] = values[start:]
+    return ledger
+
+
+@profiled()
+def update_ledger(code, fs_tables, variant='consolidated'):
+    """
+    재무제표 페이지 표를 원장에 반영 (새 분기 추가 / 정정 반영) 후 원장 반환
+
+    Args:
+        code: 종목코드
+        fs_tables: SVD_Finance 페이지의 pd.read_html 결과
+        variant: 'consolidated' (연결) / 'separate' (별도)
+    """
+    ledger = load_ledger(code, variant)
+    quarterly, annual = extract_quarters(fs_tables)
+    if merge_quarters(ledger, quarterly, annual):
+        save_ledger(code, ledger, variant)
+    return ledger
+
+
+def merge_quarters(ledger, quarterly, annual=None):
+    """
+    분기 / 연간 데이터를 원장에 반영하고 바뀐 분기부터 TTM 재계산
+
+    Args:
+        quarterly, annual: index=분기('YYYY/MM'), ITEMS 컬럼을 포함한 데이터프레임
+
+    Returns:
+        원장이 바뀌었으면 True
+    """
+    changed = [_upsert(ledger, quarterly.reindex(columns=ITEMS), 'quarterly')]
+    if annual is not None and len(annual):
+        changed.append(_upsert(ledger, _derive_q4(ledger, annual.reindex(columns=ITEMS)), 'derived'))
+    changed = [q for q in changed if q is not None]
+    if changed:
+        _roll_ttm(ledger, min(changed, key=_month_index))
+    return bool(changed)
+
+
+@profiled()
+def build_ledger(quarterly):
+    """
+    분기 데이터가 이미 모두 있을 때(OpenDART 일괄 파일) 저장 없이 메모리에서 원장 생성
+
+    Args:
+        quarterly: index=분기('YYYY/MM'), ITEMS 컬럼을 포함한 데이터프레임 (4분기 포함)
+    """
+    ledger = quarterly.reindex(columns=LEDGER_COLS[1:]).astype({item: float for item in ITEMS})
+    ledger = ledger[ledger[ITEMS].notna().any(axis=1)]
+    ledger['Source'] = 'quarterly'
+    if len(ledger):
+        _roll_ttm(ledger, ledger.index[0])
+    return ledger
+
+
+def ttm_improvements(ledger):
+    """
+    최근 분기 TTM 비율 - 4개 분기 전 TTM 비율 (%p)
+
+    Returns:
+        {'ROE_Improvement': ..., ...} 또는 원장이 8개 분기에 못 미치면 None
+    """
+    if ledger is None or len(ledger) == 0:
+        return None
+    latest = ledger.index[-1]
+    year_ago = [q for q in ledger.index if _month_index(q) == _month_index(latest) - 12]
+    if not year_ago:
+        return None
+    now, before = ledger.loc[latest], ledger.loc[year_ago[0]]
+    result = {}
+    for ratio_col, name in IMPROVEMENT_MAP.items():
+        a, b = float(now[ratio_col]), float(before[ratio_col])
+        result[name] = a - b if np.isfinite(a) and np.isfinite(b) else None
+    return result if any(v is not None for v in result.values()) else None
+
+
+# ---------------------------------------------------------
+# 3. 캐시된 과거 페이지로 재구성
+# ---------------------------------------------------------
+def rebuild_ledger(code):
+    """보관된 페이지를 오래된 순서로 다시 반영 (연결 / 별도 각각)"""
+    for kind, variant in [('finance', 'consolidated'), ('finance_separate', 'separate')]:
+        path = ledger_path(code, variant)
+        if os.path.exists(path):
+            os.remove(path)
+        for _, page_file in list_cached_pages(kind, code):
+            try:
+                fs_tables = pd.read_html(StringIO(read_cached_page(page_file)))
+            except ValueError:
+                continue
+            update_ledger(code, fs_tables, variant)
+    return load_ledger(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='분기 원장 관리')
+    parser.add_argument('--rebuild', action='store_true', help='캐시된 과거 페이지로 원장 재구성')
+    parser.add_argument('--codes', nargs='*', help='대상 종목코드 (기본: 캐시된 전체)')
+    args = parser.parse_args()
+
+    codes = args.codes or cached_codes('finance')
+    ready = 0
+    for i, code in enumerate(codes):
+        ledger = rebuild_ledger(code) if args.rebuild else load_ledger(code)
+        if ttm_improvements(ledger):
+            ready += 1
+        if args.rebuild:
+            print(f"[{i+1}/{len(codes)}] {code} ({len(ledger)}개 분기)")
+    print(f"✅ TTM YoY 계산 가능 종목: {ready}/{len(codes)}개")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+QuiltyStock 통합 CLI
+
+    python quiltystock.py collect                 # 유니버스 구성 + 지표 수집 + 점수 산출
+    python quiltystock.py score                   # 저장된 CSV 로 점수만 다시 계산 (네트워크 없음)
+    python quiltystock.py ingest-dart 2024_*.zip  # OpenDART 일괄 파일 변환 -> collect --source dart
+    python quiltystock.py table -o full_list.md   # 전체 순위표 (txt / md / html / xlsx)
+    python quiltystock.py screen                  # 투자 전략 스크리닝
+    python quiltystock.py explain 278470 --name 에이피알
+    python quiltystock.py validate                # 데이터 품질 검사만 실행
+    python quiltystock.py upload                  # 구글 시트 업로드
+    python quiltystock.py serve --port 8050       # 점수 조회 API 서버 (읽기 전용)
+    python quiltystock.py peers 005930 -k 10      # 퀄리티 프로필 유사 종목
+    python quiltystock.py diff --code 005930      # 직전 실행 대비 점수 변화 기여도
+    python quiltystock.py alerts --dry-run        # 관심 종목 트리거 평가 (alerts.json)
+    python quiltystock.py scenario -s "금리2배=InterestExpense*2"   # 재무 항목 충격 후 순위 변화
+    python quiltystock.py collect --record        # 입력 전체를 runs/run_*.zip 으로 기록
+    python quiltystock.py collect --universe default --universe konex   # 여러 유니버스 (수집 한 번, 점수는 따로)
+    python quiltystock.py universes               # 유니버스 프로필 / 종목 수 / 겹치는 종목 (universes.json)
+    python quiltystock.py replay runs/run_20251020_090000.zip -o replay.csv
+    python quiltystock.py --profile score         # 단계별 cProfile / flame graph / 할당 통계 (profiling.py)
+
+무거운 패키지(pandas, FinanceDataReader, Google API client)는 각 서브커맨드
+안에서만 import 한다. 이 파일은 표준 라이브러리만 사용해야 `--help` 와
+캐시만 읽는 명령이 빠르게 시작한다.
+"""
+
+import argparse
+import sys
+
+DEFAULT_CSV = 'quality_analysis_all.csv'
+MAX_FAILURE_RATE = 0.2  # data_quality.MAX_FAILURE_RATE (pandas import 없이 --help 를 띄우기 위해 복사)
+MAX_MOVER_RATE = 0.2    # score_diff.MAX_MOVER_RATE
+MAX_CONCURRENCY = 4     # quality_analysis_ttm.MAX_CONCURRENCY
+
+
+def cmd_collect(args):
+    import quality_analysis_ttm
+
+    if args.universe:
+        if args.record:
+            sys.exit("--record 와 --universe 는 같이 쓸 수 없습니다")
+        from universes import run_profiles
+
+        try:
+            results = run_profiles(args.universe, args.source, args.max_concurrency)
+        except ValueError as e:
+            sys.exit(str(e))
+        if any(results.values()):
+            sys.exit(1)
+        return
+    if args.record:
+        if args.source != 'fnguide':
+            sys.exit("--record 는 FnGuide 소스만 지원합니다 (OpenDART 는 일괄 파일 자체가 기록)")
+        from run_archive import record_run
+
+        record_run(args.output, args.max_concurrency, args.archive)
+        return
+    quality_analysis_ttm.main(args.output, args.source, args.max_concurrency)
+
+
+def cmd_universes(args):
+    from universes import main as universes
+
+    universes(['list'] + args.names)
+
+
+def cmd_replay(args):
+    from run_archive import print_info, replay_run
+
+    if args.info:
+        print_info(args.archive)
+        return
+    replay_run(args.archive, args.output)
+
+
+def cmd_ingest_dart(args):
+    from dart_bulk import ingest
+
+    ingest(args.paths)
+
+
+def cmd_score(args):
+    import quality_analysis_ttm
+
+    quality_analysis_ttm.score(args.input, args.max_failure_rate)
+
+
+def cmd_validate(args):
+    import pandas as pd
+    from data_quality import print_summary, validate
+    from factor_store import load_latest_snapshot
+
+    df = pd.read_csv(args.input, dtype={'Code': str})
+    previous = None
+    if not args.no_history:
+        _, previous = load_latest_snapshot(before=pd.Timestamp.now().normalize())
+    result = validate(df, previous)
+    print_summary(result)
+    if args.quarantine and len(result.quarantine):
+        result.quarantine.to_csv(args.quarantine, index=False, encoding='utf-8-sig')
+    return 1 if result.column_issues or result.failure_rate > args.max_failure_rate else 0
+
+
+def cmd_table(args):
+    from generate_final_table import generate_table
+
+    generate_table(args.input, args.output, args.format)
+
+
+def cmd_screen(args):
+    from screen_strategies import screen_strategies
+
+    screen_strategies(args.input, args.output, args.format)
+
+
+def cmd_explain(args):
+    from explain_apr_ttm import main as explain
+
+    explain(args.code, args.name or args.code, args.output)
+
+
+def cmd_upload(args):
+    from upload_to_sheets import main as upload
+
+    upload(args.input, args.max_failure_rate, args.max_mover_rate)
+
+
+def cmd_serve(args):
+    from score_server import main as serve
+
+    argv = ['--host', args.host, '--port', str(args.port), '--reload-interval', str(args.reload_interval)]
+    serve(argv + (['--csv', args.csv] if args.csv else []))
+
+
+def cmd_peers(args):
+    from peers import main as peers
+
+    argv = ['-k', str(args.k), '--metric', args.metric] + ([args.code] if args.code else [])
+    peers(argv + (['--profile', args.profile] if args.profile else []) + (['--rebuild'] if args.rebuild else []))
+
+
+def cmd_diff(args):
+    from score_diff import main as diff
+
+    argv = ['-n', str(args.n)] + (['--prev', args.prev] if args.prev else []) + (['--curr', args.curr] if args.curr else [])
+    diff(argv + (['--code', args.code] if args.code else []) + (['-o', args.output] if args.output else []))
+
+
+def cmd_alerts(args):
+    from alerts import main as alerts
+
+    argv = (['--config', args.config] if args.config else []) + (['--dry-run'] if args.dry_run else [])
+    alerts(argv + (['--prev', args.prev] if args.prev else []) + (['--curr', args.curr] if args.curr else []))
+
+
+def cmd_scenario(args):
+    from scenarios import main as scenario
+
+    argv = [arg for text in args.scenario for arg in ('-s', text)] + ['-n', str(args.n)]
+    argv += (['--preset'] + args.preset if args.preset is not None else []) + (['--config', args.config] if args.config else [])
+    argv += (['--csv', args.csv] if args.csv else []) + (['--code', args.code] if args.code else [])
+    scenario(argv + (['-o', args.output] if args.output else []))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='quiltystock', description='한국 주식 퀄리티 분석')
+    parser.add_argument('--profile', action='store_true', help='단계별 프로파일 저장 (환경 변수 QUILTY_PROFILE=1 과 같음)')
+    parser.add_argument('--profile-modes', default='all', metavar='MODES', help='cprofile,sample,memory 중 선택 (기본: 전부)')
+    sub = parser.add_subparsers(dest='command', metavar='command')
+    sub.required = True
+
+    p = sub.add_parser('collect', help='유니버스 구성 + 지표 수집 + 점수 산출 (네트워크)')
+    p.add_argument('-o', '--output', default=DEFAULT_CSV)
+    p.add_argument('--source', choices=['fnguide', 'dart'], default='fnguide',
+                   help='재무 데이터 소스 (dart: ingest-dart 로 변환한 OpenDART 일괄 파일)')
+    p.add_argument('--max-concurrency', type=int, default=MAX_CONCURRENCY,
+                   help='동시 요청 수 상한 (1 이면 순차 요청, 실제 값은 지연 / 오류를 보고 자동 조절)')
+    p.add_argument('--record', action='store_true', help='받은 응답 / 종목 목록 / 원장을 압축 파일 하나로 기록 (replay 로 재실행)')
+    p.add_argument('--archive', help='기록 파일 경로 (기본: runs/run_YYYYMMDD_HHMMSS.zip)')
+    p.add_argument('--universe', action='append', metavar='NAME',
+                   help='유니버스 프로필 (여러 번 지정 가능, 결과는 프로필별 CSV / 히스토리, -o 무시)')
+    p.set_defaults(func=cmd_collect)
+
+    p = sub.add_parser('universes', help='유니버스 프로필 목록 / 종목 수 / 겹치는 종목')
+    p.add_argument('names', nargs='*', help='프로필 이름 (기본: 전체)')
+    p.set_defaults(func=cmd_universes)
+
+    p = sub.add_parser('replay', help='기록한 실행을 네트워크 없이 다시 실행 (같은 입력 -> 같은 순위)')
+    p.add_argument('archive', help='collect --record 로 만든 파일')
+    p.add_argument('-o', '--output', default='replay.csv')
+    p.add_argument('--info', action='store_true', help='재실행하지 않고 기록 요약만 출력')
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser('ingest-dart', help='OpenDART 재무정보 일괄 파일(zip / txt) 변환')
+    p.add_argument('paths', nargs='+', help='일괄 다운로드 파일 (오래된 보고서부터)')
+    p.set_defaults(func=cmd_ingest_dart)
+
+    p = sub.add_parser('score', help='저장된 CSV 로 점수 재계산')
+    p.add_argument('-i', '--input', default=DEFAULT_CSV)
+    p.add_argument('--max-failure-rate', type=float, default=MAX_FAILURE_RATE, help='격리 비율 상한')
+    p.set_defaults(func=cmd_score)
+
+    p = sub.add_parser('validate', help='데이터 품질 검사 (범위 / 결측률 / 일간 변화 / 정합성)')
+    p.add_argument('-i', '--input', default=DEFAULT_CSV)
+    p.add_argument('-q', '--quarantine', help='격리 종목 저장 경로')
+    p.add_argument('--max-failure-rate', type=float, default=MAX_FAILURE_RATE, help='격리 비율 상한')
+    p.add_argument('--no-history', action='store_true', help='직전 스냅샷 대비 일간 변화 검사 생략')
+    p.set_defaults(func=cmd_validate)
+
+    formats = ['text', 'markdown', 'html', 'xlsx']
+    p = sub.add_parser('table', help='전체 순위표 생성')
+    p.add_argument('-i', '--input', default=DEFAULT_CSV)
+    p.add_argument('-o', '--output', default='quality_analysis_full_list.txt', help="'-' 이면 표준출력")
+    p.add_argument('-f', '--format', choices=formats, help='기본: 출력 파일 확장자로 판단')
+    p.set_defaults(func=cmd_table)
+
+    p = sub.add_parser('screen', help='투자 전략 스크리닝')
+    p.add_argument('-i', '--input', default=DEFAULT_CSV)
+    p.add_argument('-o', '--output', default='strategy_results.txt', help="'-' 이면 표준출력")
+    p.add_argument('-f', '--format', choices=formats, help='기본: 출력 파일 확장자로 판단')
+    p.set_defaults(func=cmd_screen)
+
+    p = sub.add_parser('explain', help='개별 종목 21개 지표 상세 분석')
+    p.add_argument('code', help='종목코드 (6자리)')
+    p.add_argument('--name', help='종목명 (출력용)')
+    p.add_argument('-o', '--output', default='-', help="'-' 이면 표준출력")
+    p.set_defaults(func=cmd_explain)
+
+    p = sub.add_parser('upload', help='구글 시트 업로드 (품질 검사 실패 시 중단)')
+    p.add_argument('-i', '--input', default=DEFAULT_CSV)
+    p.add_argument('--max-failure-rate', type=float, default=MAX_FAILURE_RATE, help='격리 비율 상한')
+    p.add_argument('--max-mover-rate', type=float, default=MAX_MOVER_RATE, help='점수 급변 종목 비율 상한')
+    p.set_defaults(func=cmd_upload)
+
+    p = sub.add_parser('serve', help='점수 조회 API 서버 (최근 스냅샷, 읽기 전용)')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8050)
+    p.add_argument('--csv', help='스냅샷 대신 이 CSV 사용')
+    p.add_argument('--reload-interval', type=float, default=30, help='새 스냅샷 확인 주기 (초, 0 이면 끔)')
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser('peers', help='퀄리티 프로필 유사 종목 검색')
+    p.add_argument('code', nargs='?', help='기준 종목코드')
+    p.add_argument('--profile', help="원본 지표 또는 Score_* 값 (예: 'ROE=20,Debt_Ratio=50')")
+    p.add_argument('-k', type=int, default=10)
+    p.add_argument('--metric', choices=['cosine', 'euclidean'], default='cosine')
+    p.add_argument('--rebuild', action='store_true', help='인덱스 다시 만들기')
+    p.set_defaults(func=cmd_peers)
+
+    p = sub.add_parser('diff', help='직전 실행 대비 점수 변화 / 기여도 분석')
+    p.add_argument('--prev', help='직전 결과 CSV (기본: 두 번째로 최근 스냅샷)')
+    p.add_argument('--curr', help='오늘 결과 CSV (기본: 가장 최근 스냅샷)')
+    p.add_argument('--code', help='종목별 디스크립터 기여도')
+    p.add_argument('-n', type=int, default=20, help='급변 종목 표시 수')
+    p.add_argument('-o', '--output', help='종목별 변화 CSV 저장 경로')
+    p.set_defaults(func=cmd_diff)
+
+    p = sub.add_parser('alerts', help='관심 종목 알림 (상위 구간 진입 / 이탈, 점수 급락, 기준값 돌파)')
+    p.add_argument('--config', help='트리거 설정 JSON (기본: alerts.json)')
+    p.add_argument('--prev', help='직전 결과 CSV (기본: 두 번째로 최근 스냅샷)')
+    p.add_argument('--curr', help='오늘 결과 CSV (기본: 가장 최근 스냅샷)')
+    p.add_argument('--dry-run', action='store_true', help='기록 / 전송 없이 출력만')
+    p.set_defaults(func=cmd_alerts)
+
+    p = sub.add_parser('scenario', help='시나리오 / 스트레스 재계산 (이자비용, 영업이익률, 부채 충격)')
+    p.add_argument('-s', '--scenario', action='append', default=[], metavar='NAME=SHOCKS',
+                   help="시나리오 (예: '금리2배=InterestExpense*2', 여러 번 지정 가능)")
+    p.add_argument('--preset', nargs='*', help='기본 시나리오 중 선택 (rates_up, margin_squeeze, leverage_up, recession)')
+    p.add_argument('--config', help='{"이름": ["충격", ...]} JSON')
+    p.add_argument('--csv', help='스냅샷 대신 이 CSV 사용')
+    p.add_argument('--code', help='종목별 시나리오 점수')
+    p.add_argument('-n', type=int, default=5, help='시나리오별 하락 상위 종목 수')
+    p.add_argument('-o', '--output', help='종목별 시나리오 점수 CSV 저장 경로')
+    p.set_defaults(func=cmd_scenario)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        import profiling
+
+        profiling.enable(args.profile_modes)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
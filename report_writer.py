@@ -0,0 +1,189 @@
+"""
+리포트 출력 모듈
+
+점수 산출 결과를 행 단위(iterrows + f-string)가 아니라 컬럼 단위로 포맷해서
+청크 단위로 파일/표준출력에 스트리밍한다. 같은 데이터프레임에서
+text / markdown / html / xlsx 네 가지 형식을 만든다.
+
+    columns = [Column('Rank', 'Rank', '<4'), Column('Quality_Score', 'Score', '>6.1f'), ...]
+    write_report(df, columns, 'quality_analysis_full_list.txt', fmt='text')
+"""
+
+import html
+import sys
+from collections import namedtuple
+
+import pandas as pd
+
+# name: 데이터프레임 컬럼, header: 출력 헤더, spec: format spec (정렬/폭/소수점),
+# max_len: 문자열 자르기, suffix: 값 뒤에 붙일 문자 (예: '%'), ellipsis: 잘린 문자열 뒤에 붙일 문자
+Column = namedtuple('Column', ['name', 'header', 'spec', 'max_len', 'suffix', 'ellipsis'], defaults=[None, '', '..'])
+
+FORMATS = ('text', 'markdown', 'html', 'xlsx')
+CHUNK_SIZE = 5000
+
+
+def _width(spec):
+    digits = ''.join(ch for ch in spec.split('.')[0] if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def _truncate(values, max_len, ellipsis='..'):
+    """name[:max_len] + ellipsis (기본 '..': generate_final_table.py 의 종목명 자르기 규칙)"""
+    return [v if len(v) <= max_len else v[:max_len] + ellipsis for v in values]
+
+
+def format_column(series, column, pad=True):
+    """
+    컬럼 하나를 문자열 리스트로 변환 (행 루프 없이 컬럼 전체를 한 번에 처리)
+
+    Args:
+        series: 데이터프레임 컬럼
+        column: Column
+        pad: False 면 정렬/폭 없이 값만 포맷 (markdown / html 용)
+    """
+    spec = column.spec if pad else column.spec.lstrip('<>^').lstrip('0123456789')
+    suffix = column.suffix
+    values = series.tolist()
+    if spec[-1:] in ('f', 'd', '%', 'e', 'g'):
+        blank = format('', _pad_spec(spec, pad)) + ' ' * len(suffix) if pad else ''
+        return [format(v, spec) + suffix if v is not None and v == v else blank for v in values]
+    values = ['' if v is None or v != v else str(v) for v in values]
+    if column.max_len:
+        values = _truncate(values, column.max_len, column.ellipsis)
+    return [format(v, spec) + suffix for v in values] if spec or suffix else values
+
+
+def _pad_spec(spec, pad):
+    """결측치를 숫자 컬럼 폭에 맞춰 빈칸으로 출력하기 위한 spec"""
+    if not pad:
+        return ''
+    align = spec[0] if spec and spec[0] in '<>^' else '>'
+    return f'{align}{_width(spec)}'
+
+
+# ---------------------------------------------------------
+# 형식별 출력 (청크 단위)
+# ---------------------------------------------------------
+def _text_lines(chunk, columns):
+    cols = [format_column(chunk[c.name], c) for c in columns]
+    return [' | '.join(row) for row in zip(*cols)]
+
+
+def _text_header(columns):
+    return ' | '.join(format(c.header, f'<{_width(c.spec)}') for c in columns)
+
+
+def _markdown_lines(chunk, columns):
+    cols = [format_column(chunk[c.name], c, pad=False) for c in columns]
+    return ['| ' + ' | '.join(v.replace('|', '\\|') for v in row) + ' |' for row in zip(*cols)]
+
+
+def _markdown_header(columns):
+    aligns = ['---:' if c.spec.startswith('>') else '---' for c in columns]
+    return ['| ' + ' | '.join(c.header for c in columns) + ' |', '| ' + ' | '.join(aligns) + ' |']
+
+
+def _html_lines(chunk, columns):
+    cols = [[html.escape(v) for v in format_column(chunk[c.name], c, pad=False)] for c in columns]
+    return ['<tr>' + ''.join(f'<td>{v}</td>' for v in row) + '</tr>' for row in zip(*cols)]
+
+
+def _html_header(columns):
+    return ['<table>', '<thead><tr>' + ''.join(f'<th>{html.escape(c.header)}</th>' for c in columns) + '</tr></thead>',
+            '<tbody>']
+
+
+def stream_lines(df, columns, fmt='text', chunk_size=CHUNK_SIZE, header_rule=None):
+    """
+    헤더 + 본문을 청크 단위 문자열 리스트로 생성 (text / markdown / html)
+
+    Args:
+        header_rule: text 형식에서 헤더 아래에 넣을 구분선 (예: '-' * 100)
+    """
+    if fmt == 'text':
+        yield [_text_header(columns)] + ([header_rule] if header_rule else [])
+        body = _text_lines
+    elif fmt == 'markdown':
+        yield _markdown_header(columns)
+        body = _markdown_lines
+    elif fmt == 'html':
+        yield _html_header(columns)
+        body = _html_lines
+    else:
+        raise ValueError(f"지원하지 않는 형식: {fmt} (text / markdown / html)")
+
+    for start in range(0, len(df), chunk_size):
+        yield body(df.iloc[start:start + chunk_size], columns)
+
+    if fmt == 'html':
+        yield ['</tbody>', '</table>']
+
+
+def _write_xlsx(sections, path):
+    """xlsx 는 스트리밍 대신 섹션마다 시트 하나로 저장 (openpyxl 필요)"""
+    with pd.ExcelWriter(path) as writer:
+        for i, (title_lines, df, columns) in enumerate(sections):
+            out = df[[c.name for c in columns]].copy()
+            out.columns = [c.header for c in columns]
+            # 시트 이름: '[...]' 로 시작하는 섹션 제목 우선 (엑셀 금지 문자 제거, 31자 제한)
+            titles = [line for line in title_lines if _title(line, 'markdown')]
+            titles = [line for line in titles if line.startswith('[')] or titles
+            sheet = ''.join(ch for ch in (titles[0] if titles else '') if ch not in '[]:*?/\\')[:31]
+            out.to_excel(writer, sheet_name=sheet or f'Sheet{i+1}', index=False)
+
+
+def _title(line, fmt):
+    if fmt == 'text':
+        return line
+    # 구분선(----, ====) / 빈 줄은 Markdown, HTML 에서 제외
+    if set(line) <= set('-= '):
+        return None
+    return f'<p>{html.escape(line)}</p>' if fmt == 'html' else line + '\n'
+
+
+def write_sections(sections, path=None, fmt='text', chunk_size=CHUNK_SIZE, header_rule=None):
+    """
+    여러 섹션(제목 + 표)을 하나의 리포트로 출력
+
+    Args:
+        sections: [(제목 줄 리스트, 데이터프레임, Column 리스트), ...]
+        path: 출력 파일 경로 (None 또는 '-' 이면 표준출력)
+        fmt: 'text' / 'markdown' / 'html' / 'xlsx'
+        header_rule: text 형식 헤더 아래 구분선
+    """
+    if fmt == 'xlsx':
+        if not path or path == '-':
+            raise ValueError("xlsx 형식은 파일 경로가 필요합니다")
+        _write_xlsx(sections, path)
+        return path
+
+    out = sys.stdout if not path or path == '-' else open(path, 'w', encoding='utf-8')
+    try:
+        if fmt == 'html':
+            out.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head><body>\n')
+        for title_lines, df, columns in sections:
+            for line in title_lines:
+                line = _title(line, fmt)
+                if line is not None:
+                    out.write(line + '\n')
+            for lines in stream_lines(df, columns, fmt, chunk_size, header_rule):
+                out.write('\n'.join(lines))
+                out.write('\n')
+        if fmt == 'html':
+            out.write('</body></html>\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return path
+
+
+def write_report(df, columns, path=None, fmt='text', title_lines=(), chunk_size=CHUNK_SIZE, header_rule=None):
+    """표 하나짜리 리포트 출력 (write_sections 단축형)"""
+    return write_sections([(list(title_lines), df, columns)], path, fmt, chunk_size, header_rule)
+
+
+def format_from_path(path, default='text'):
+    """파일 확장자로 출력 형식 추정"""
+    ext = str(path).rsplit('.', 1)[-1].lower() if path and '.' in str(path) else ''
+    return {'md': 'markdown', 'html': 'html', 'htm': 'html', 'xlsx': 'xlsx', 'txt': 'text'}.get(ext, default)
@@ -0,0 +1,303 @@
+"""
+실행 기록 / 재생 (record / replay)
+
+기록: 수집 실행이 받은 FnGuide 응답, KRX 종목 목록, 읽은 분기 원장, 이어하기 CSV,
+일간 검사 기준 스냅샷과 요청별 시간을 압축 파일 하나(zip)에 담는다.
+재생: 그 파일만으로 네트워크 없이 같은 파이프라인을 다시 돌린다. 입력이 같으므로
+순위도 같고, 파서 / 점수 로직을 바꾼 뒤 어제 입력으로 A/B 비교할 수 있다.
+
+    python run_archive.py record                              # runs/run_YYYYMMDD_HHMMSS.zip
+    python run_archive.py replay runs/run_20251020_090000.zip -o replay.csv
+    python run_archive.py info runs/run_20251020_090000.zip
+    python score_diff.py --prev quality_analysis_all.csv --curr replay.csv
+
+archive 구성
+    manifest.json                      실행 정보, 단계별 시간, 요청별 (kind, code, 초, 바이트, 캐시, 오류)
+    pages/{kind}/{code}.html           fetch_page 응답
+    listings/{market}.csv              종목 목록
+    files/ledger/{variant}/{code}.csv  읽은 분기 원장 (재생 중에는 디스크 원장을 읽지도 쓰지도 않음)
+    files/resume.csv                   기록 시작 때 있던 이어하기 CSV
+    files/previous_snapshot.csv        일간 변화 검사 기준 스냅샷
+    files/smoothing_state.npz          평활 점수 직전 상태
+"""
+
+import argparse
+import json
+import os
+import platform
+import threading
+import time
+import zipfile
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+from data_sources import FnGuideSource
+from factor_store import list_snapshots, load_snapshot
+from score_smoothing import SmoothingState, latest_state_path
+
+RUNS_DIR = os.environ.get('QUILTY_RUNS_DIR', 'runs')
+FORMAT_VERSION = 1
+
+
+def run_path(run_time=None):
+    return os.path.join(RUNS_DIR, f"run_{(run_time or datetime.now()).strftime('%Y%m%d_%H%M%S')}.zip")
+
+
+class ArchiveMiss(KeyError):
+    """재생 중 기록에 없는 요청 (기록 이후 파이프라인이 다른 페이지를 읽으려 함)"""
+
+
+class RunArchive:
+    """
+    실행 하나의 입력 기록 / 재생
+
+    with RunArchive(path, 'record'): ...  동안 data_cache.ARCHIVE 로 등록되어
+    fetch_page / get_stock_listing / load_ledger 가 이 객체를 거쳐 간다.
+    """
+
+    def __init__(self, path, mode='replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"알 수 없는 모드: {mode}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        if mode == 'record':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._zip = zipfile.ZipFile(path + '.tmp', 'w', zipfile.ZIP_DEFLATED)
+            self.manifest = {'version': FORMAT_VERSION, 'created': datetime.now().isoformat(timespec='seconds'),
+                             'python': platform.python_version(), 'pandas': pd.__version__,
+                             'settings': {}, 'stages': {}, 'requests': [], 'errors': {}, 'missing': []}
+        else:
+            self._zip = zipfile.ZipFile(path)
+            self.manifest = json.loads(self._zip.read('manifest.json'))
+            if self.manifest.get('version') != FORMAT_VERSION:
+                raise ValueError(f"지원하지 않는 기록 형식: {self.manifest.get('version')}")
+        self._names = set(self._zip.namelist())
+        self._previous = None
+
+    @property
+    def replaying(self):
+        return self.mode == 'replay'
+
+    def __enter__(self):
+        self._previous, data_cache.ARCHIVE = data_cache.ARCHIVE, self
+        return self
+
+    def __exit__(self, *exc):
+        data_cache.ARCHIVE = self._previous
+        self.close()
+
+    def close(self):
+        if self._zip is None:
+            return
+        if self.mode == 'record':
+            self.manifest['finished'] = datetime.now().isoformat(timespec='seconds')
+            self._zip.writestr('manifest.json', json.dumps(self.manifest, ensure_ascii=False, indent=1))
+            self._zip.close()
+            os.replace(self.path + '.tmp', self.path)
+        else:
+            self._zip.close()
+        self._zip = None
+
+    # ---------------------------------------------------------
+    # 기록 / 재생 공통 진입점
+    # ---------------------------------------------------------
+    def _write(self, name, data):
+        with self.lock:
+            # 같은 실행에서 같은 입력을 두 번 읽으면 처음 것만 (재생도 처음 것을 돌려줌)
+            if name not in self._names:
+                self._zip.writestr(name, data)
+                self._names.add(name)
+
+    def _read(self, name):
+        if name in self.manifest['errors']:
+            raise RuntimeError(self.manifest['errors'][name])
+        if name not in self._names:
+            raise ArchiveMiss(name)
+        with self.lock:
+            return self._zip.read(name)
+
+    def _record(self, name, fetch):
+        """fetch() 결과(바이트)를 name 으로 저장, 예외도 그대로 기록 후 다시 발생 -> (바이트, 초)"""
+        start = time.perf_counter()
+        try:
+            data = fetch()
+        except Exception as e:
+            with self.lock:
+                self.manifest['errors'][name] = f'{type(e).__name__}: {e}'
+            raise
+        seconds = time.perf_counter() - start
+        self._write(name, data)
+        return data, seconds
+
+    def page(self, kind, code, fetch):
+        """fetch_page 응답 (HTML 문자열)"""
+        name = f'pages/{kind}/{code}.html'
+        if self.replaying:
+            return self._read(name).decode('utf-8')
+        cached = os.path.exists(data_cache.page_path(kind, code))
+        try:
+            data, seconds = self._record(name, lambda: fetch().encode('utf-8'))
+        except Exception:
+            with self.lock:
+                self.manifest['requests'].append([kind, code, None, 0, cached, True])
+            raise
+        with self.lock:
+            self.manifest['requests'].append([kind, code, round(seconds, 4), len(data), cached, False])
+        return data.decode('utf-8')
+
+    def listing(self, market, fetch):
+        """종목 목록 CSV 바이트"""
+        name = f'listings/{market}.csv'
+        return self._read(name) if self.replaying else self._record(name, fetch)[0]
+
+    def file(self, name, path):
+        """실행 중 읽는 로컬 파일 바이트 (없으면 None)"""
+        name = f'files/{name}'
+        if self.replaying:
+            return None if name in self.manifest['missing'] else self._read(name)
+        if not os.path.exists(path):
+            with self.lock:
+                self.manifest['missing'].append(name)
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        self._write(name, data)
+        return data
+
+
+class ReplaySource(FnGuideSource):
+    """기록된 FnGuide 응답을 읽는 소스 (네트워크가 아니므로 요청 간격 / 동시 요청 조절 없음)"""
+
+    network = False
+
+
+# ---------------------------------------------------------
+# 기록 / 재생 실행
+# ---------------------------------------------------------
+def _previous_snapshot_path(before):
+    candidates = [p for d, p in list_snapshots() if d < pd.Timestamp(before)]
+    return candidates[-1] if candidates else ''
+
+
+def record_run(output_file="quality_analysis_all.csv", max_concurrency=None, path=None, max_failure_rate=None):
+    """
+    quality_analysis_ttm.main() 과 같은 수집 + 점수 산출을 실행하면서 입력을 기록
+
+    Returns:
+        (기록 파일 경로, 점수 데이터프레임)
+    """
+    import quality_analysis_ttm as qa
+
+    path = path or run_path()
+    max_concurrency = max_concurrency or qa.MAX_CONCURRENCY
+    max_failure_rate = qa.MAX_FAILURE_RATE if max_failure_rate is None else max_failure_rate
+    print(f"● 실행 기록: {path}")
+    df = None
+    with RunArchive(path, 'record') as archive:
+        archive.manifest['settings'] = {'output_file': output_file, 'max_failure_rate': max_failure_rate,
+                                        'max_concurrency': max_concurrency, 'host': data_cache.FNGUIDE_HOST}
+        archive.file('resume.csv', output_file)
+        # 점수 산출 때 gate 가 읽을 직전 스냅샷 (오늘 이전)
+        archive.file('previous_snapshot.csv', _previous_snapshot_path(datetime.now().date()))
+        archive.file('smoothing_state.npz', latest_state_path(datetime.now().date()))
+        stages = archive.manifest['stages']
+        try:
+            start = time.perf_counter()
+            df_universe = qa.build_universe()
+            stages['universe'] = round(time.perf_counter() - start, 3)
+            start = time.perf_counter()
+            qa.collect(df_universe, output_file, 'fnguide', max_concurrency)
+            stages['collect'] = round(time.perf_counter() - start, 3)
+            start = time.perf_counter()
+            df = qa.score(output_file, max_failure_rate)
+            stages['score'] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            archive.manifest['failed'] = f'{type(e).__name__}: {e}'
+            raise
+    print(f"✅ 실행 기록 저장: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return path, df
+
+
+def replay_run(path, output_file='replay.csv'):
+    """
+    기록만으로 수집 + 점수 산출을 다시 실행 (네트워크 / 디스크 원장 / 히스토리 사용 안 함)
+
+    output_file 은 기록 시작 때의 이어하기 CSV 로 덮어쓴 뒤 이어서 채운다.
+    """
+    import quality_analysis_ttm as qa
+
+    with RunArchive(path, 'replay') as archive:
+        settings = archive.manifest['settings']
+        resume = archive.file('resume.csv', None)
+        if resume is not None:
+            with open(output_file, 'wb') as f:
+                f.write(resume)
+        elif os.path.exists(output_file):
+            os.remove(output_file)
+        previous = archive.file('previous_snapshot.csv', None)
+        previous = load_snapshot(BytesIO(previous)) if previous is not None else None
+        smoothing = archive.file('smoothing_state.npz', None)
+        smoothing = SmoothingState.load(BytesIO(smoothing)) if smoothing is not None else None
+
+        stages = {}
+        start = time.perf_counter()
+        df_universe = qa.build_universe()
+        stages['universe'] = time.perf_counter() - start
+        start = time.perf_counter()
+        qa.collect(df_universe, output_file, ReplaySource())
+        stages['collect'] = time.perf_counter() - start
+        start = time.perf_counter()
+        df = qa.score(output_file, settings['max_failure_rate'], previous=previous, save=False, smoothing=smoothing)
+        stages['score'] = time.perf_counter() - start
+
+    print(f"\n[재생 시간 (기록 당시)]")
+    for name, seconds in stages.items():
+        recorded = archive.manifest['stages'].get(name)
+        print(f"  {name:<10} {seconds:>8.2f} s  ({recorded if recorded is not None else '-'} s)")
+    return df
+
+
+def print_info(path):
+    with RunArchive(path, 'replay') as archive:
+        m = archive.manifest
+        requests = m['requests']
+    fetched = [r for r in requests if not r[4] and not r[5]]
+    latencies = np.array([r[2] for r in fetched]) if fetched else np.array([0.0])
+    print(f"[실행 기록] {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"  시작 / 종료: {m['created']} / {m.get('finished', '-')}  (Python {m['python']}, pandas {m['pandas']})")
+    if m.get('failed'):
+        print(f"  실패: {m['failed']}")
+    print(f"  단계별 시간: {', '.join(f'{k} {v:.1f}s' for k, v in m['stages'].items()) or '-'}")
+    print(f"  페이지: {len(requests):,}개 (네트워크 {len(fetched):,} / 캐시 {sum(r[4] for r in requests):,} / "
+          f"실패 {sum(r[5] for r in requests):,}), {sum(r[3] for r in requests) / 1e6:.1f} MB")
+    print(f"  요청 시간: p50 {np.percentile(latencies, 50):.2f}s / p95 {np.percentile(latencies, 95):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='실행 기록 / 재생')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('record', help='수집 + 점수 산출을 실행하면서 입력 기록')
+    p.add_argument('-o', '--output', default='quality_analysis_all.csv')
+    p.add_argument('--archive', help='기록 파일 경로 (기본: runs/run_YYYYMMDD_HHMMSS.zip)')
+    p = sub.add_parser('replay', help='기록으로 네트워크 없이 다시 실행')
+    p.add_argument('archive')
+    p.add_argument('-o', '--output', default='replay.csv')
+    p = sub.add_parser('info', help='기록 요약')
+    p.add_argument('archive')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_run(args.output, path=args.archive)
+    elif args.command == 'replay':
+        replay_run(args.archive, args.output)
+    else:
+        print_info(args.archive)
+
+
+if __name__ == "__main__":
+    main()
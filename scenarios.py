@@ -0,0 +1,342 @@
+"""
+시나리오 / 스트레스 재계산
+
+스냅샷에 저장된 재무 항목(Item_* : TTM 손익, 최근 분기말 잔액)에 충격을 주고
+영향을 받는 디스크립터를 전 종목 벡터 연산으로 다시 계산한 뒤, 기준 + 시나리오 전체를
+(시나리오, 종목, 지표) 텐서 하나로 score_matrix 에 넣어 순위 변화를 본다.
+
+    python scenarios.py                                   # 기본 시나리오 전체 (최근 스냅샷)
+    python scenarios.py -s "금리2배=InterestExpense*2" -s "마진압박=OpProfit-2pp"
+    python scenarios.py --preset rates_up --code 005930
+    python scenarios.py --config scenarios.json -o scenario_scores.csv
+
+충격 표기 (쉼표로 여러 개, 왼쪽부터 차례로 적용)
+    Item*2        2배
+    Item-10%      10% 감소 (+ 는 증가)
+    Item-2pp      매출액의 2%p 만큼 감소 (이익률 변화)
+    Item+500      500억원 증가
+
+연쇄 반영 (나머지 항목은 그대로)
+    Revenue           COGS 같은 비율 (매출총이익률 유지), 영업이익은 매출총이익 변화만큼 (판관비 고정)
+    COGS              영업이익 반대로
+    OpProfit          순이익 (1 - 법인세율)
+    InterestExpense   순이익 반대로 (1 - 법인세율)
+    TotalLiabilities  자산총계 같은 금액 (자본 유지)
+    TotalEquity       자산총계 같은 금액
+
+안정성 / 개선 / 이익 평활도처럼 연간 추이나 원장으로 계산하는 지표는 바꾸지 않는다.
+Item_* 컬럼이 없는 종목(재무 항목 저장 이전 스냅샷)은 모든 시나리오에서 기준 값 그대로다.
+"""
+
+import argparse
+import json
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from data_sources import SCENARIO_ITEMS
+from factor_store import list_snapshots, load_snapshot
+from profiling import profiled
+from scoring import CATEGORY_COLS, DESCRIPTOR_COLS, category_matrix, score_matrix, weight_vector
+
+TAX_RATE = 0.25  # compute_factors 의 NOPAT 가정과 같음
+TOP_PCT = 10     # 상위 구간 교체율 기준 (%)
+
+# 기본 시나리오 (이름 -> 충격 목록)
+PRESETS = {
+    'rates_up': ['InterestExpense*2'],                  # 금리 상승: 이자비용 2배
+    'margin_squeeze': ['OpProfit-2pp'],                 # 전 종목 영업이익률 2%p 하락
+    'leverage_up': ['TotalLiabilities+20%'],            # 부채 20% 증가 (차입으로 자산 증가)
+    'recession': ['Revenue-10%', 'InterestExpense*1.5'],  # 매출 10% 감소 + 이자비용 1.5배
+}
+
+Shock = namedtuple('Shock', ['item', 'op', 'value'])
+
+SHOCK_PATTERN = re.compile(r'^\s*(\w+)\s*([*+-])\s*([\d.]+)\s*(%|pp)?\s*$')
+
+# 충격받은 항목 -> [(같이 바뀌는 항목, 변화량 배수)] (변화량 = 충격 후 - 충격 전)
+PROPAGATION = {
+    'COGS': [('OpProfit', -1.0)],
+    'OpProfit': [('NetIncome', 1 - TAX_RATE)],
+    'InterestExpense': [('NetIncome', -(1 - TAX_RATE))],
+    'TotalLiabilities': [('TotalAssets', 1.0)],
+    'TotalEquity': [('TotalAssets', 1.0)],
+}
+
+# 재무 항목으로 다시 계산하는 디스크립터
+AFFECTED_COLS = ['ROE', 'ROA', 'ROIC', 'Operating_Margin', 'Gross_Margin', 'Debt_Ratio', 'Interest_Coverage',
+                 'Current_Ratio', 'Equity_Ratio', 'Accruals', 'Net_Operating_Assets']
+
+
+def parse_shock(text):
+    """'InterestExpense*2' -> Shock (잘못된 표기 / 항목은 ValueError)"""
+    m = SHOCK_PATTERN.match(text)
+    if not m:
+        raise ValueError(f"충격 표기를 읽을 수 없습니다: {text!r} (예: InterestExpense*2, OpProfit-2pp, Revenue-10%)")
+    item, sign, value, unit = m.groups()
+    if item not in SCENARIO_ITEMS:
+        raise ValueError(f"알 수 없는 재무 항목: {item} (사용 가능: {', '.join(SCENARIO_ITEMS)})")
+    value = float(value)
+    if sign == '*':
+        if unit:
+            raise ValueError(f"배수에는 단위를 붙이지 않습니다: {text!r}")
+        return Shock(item, 'scale', value)
+    value = value if sign == '+' else -value
+    if unit == '%':
+        return Shock(item, 'scale', 1 + value / 100)
+    if unit == 'pp':
+        return Shock(item, 'revenue_pp', value)
+    return Shock(item, 'add', value)
+
+
+def parse_scenario(text):
+    """'이름=충격,충격' -> (이름, [Shock, ...])"""
+    name, sep, shocks = text.partition('=')
+    if not sep or not name.strip():
+        raise ValueError(f"시나리오는 '이름=충격,충격' 형식입니다: {text!r}")
+    return name.strip(), [parse_shock(s) for s in shocks.split(',') if s.strip()]
+
+
+def load_scenarios(path):
+    """{"이름": ["충격", ...]} JSON -> {이름: [Shock, ...]}"""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    return {name: [parse_shock(s) for s in shocks] for name, shocks in config.items()}
+
+
+# ---------------------------------------------------------
+# 충격 적용 / 디스크립터 재계산 (전 종목 벡터 연산)
+# ---------------------------------------------------------
+def item_matrix(df):
+    """Item_* 컬럼 -> {항목: (종목 수,) 배열} (컬럼이 없으면 NaN)"""
+    return {item: pd.to_numeric(df[f'Item_{item}'], errors='coerce').to_numpy(dtype=float)
+            if f'Item_{item}' in df.columns else np.full(len(df), np.nan) for item in SCENARIO_ITEMS}
+
+
+def _change(items, item, delta):
+    """item 을 delta 만큼 바꾸고 PROPAGATION 대로 연쇄 반영 (NaN 변화량은 0)"""
+    delta = np.nan_to_num(delta)
+    items[item] = items[item] + delta
+    for target, ratio in PROPAGATION.get(item, []):
+        _change(items, target, delta * ratio)
+
+
+def apply_shocks(items, shocks):
+    """충격을 차례로 적용한 새 항목 dict (items 는 그대로)"""
+    items = dict(items)
+    for shock in shocks:
+        before = items[shock.item]
+        if shock.op == 'scale':
+            after = before * shock.value
+        elif shock.op == 'revenue_pp':
+            after = before + items['Revenue'] * shock.value / 100
+        else:
+            after = before + shock.value
+        if shock.item == 'Revenue':
+            # 매출총이익률 유지, 판관비 고정 -> 매출총이익 변화가 그대로 영업이익으로
+            ratio = np.where(before != 0, after / before, 1.0)
+            gross_before = before - items['COGS']
+            items['COGS'] = items['COGS'] * ratio
+            _change(items, 'OpProfit', gross_before * ratio - gross_before)
+            items['Revenue'] = after
+        else:
+            _change(items, shock.item, after - before)
+    return items
+
+
+def _ok(*values):
+    """compute_factors 의 `if a and b` 와 같은 조건 (값이 있고 0 이 아님)"""
+    mask = np.ones(np.shape(values[0]), dtype=bool)
+    for v in values:
+        mask &= ~np.isnan(v) & (v != 0)
+    return mask
+
+
+def recompute_descriptors(items, base):
+    """
+    충격 후 재무 항목으로 AFFECTED_COLS 다시 계산 (compute_factors 와 같은 식)
+
+    Args:
+        items: apply_shocks() 결과
+        base: 기준 디스크립터 {컬럼: 배열} (식에 필요한 항목이 없으면 이 값 유지)
+
+    Returns:
+        {컬럼: 배열}
+    """
+    rev, cogs, op, ni = items['Revenue'], items['COGS'], items['OpProfit'], items['NetIncome']
+    ie, ocf, cash = items['InterestExpense'], items['OperatingCF'], np.nan_to_num(items['Cash'])
+    ta, eq, td = items['TotalAssets'], items['TotalEquity'], items['TotalLiabilities']
+    ca, cl = items['CurrentAssets'], items['CurrentLiabilities']
+    out = {}
+    with np.errstate(all='ignore'):
+        out['ROE'] = np.where(_ok(ni, eq), ni / eq * 100, base['ROE'])
+        out['ROA'] = np.where(_ok(ni, ta), ni / ta * 100, base['ROA'])
+        out['ROIC'] = np.where(_ok(op, eq, td), op * 0.75 / (eq + td) * 100, base['ROIC'])
+        out['Operating_Margin'] = np.where(_ok(op, rev), op / rev * 100, base['Operating_Margin'])
+        out['Gross_Margin'] = np.where(_ok(rev, cogs), (rev - cogs) / rev * 100, base['Gross_Margin'])
+        out['Debt_Ratio'] = np.where(_ok(td, eq), td / eq * 100, base['Debt_Ratio'])
+        out['Interest_Coverage'] = np.where(_ok(op, ie) & (ie > 0), op / ie, base['Interest_Coverage'])
+        out['Current_Ratio'] = np.where(_ok(ca, cl), ca / cl * 100, base['Current_Ratio'])
+        out['Equity_Ratio'] = np.where(_ok(eq, ta), eq / ta * 100, base['Equity_Ratio'])
+        out['Accruals'] = np.where(_ok(ni, ocf), np.abs(ni - ocf) / (np.abs(ni) + 1), base['Accruals'])
+        out['Net_Operating_Assets'] = np.where(_ok(ta, eq, td), ((ta - cash) - ((ta - eq) - td)) / ta,
+                                               base['Net_Operating_Assets'])
+    return out
+
+
+# ---------------------------------------------------------
+# 일괄 재계산
+# ---------------------------------------------------------
+ScenarioResult = namedtuple('ScenarioResult', ['names', 'shocks', 'codes', 'labels', 'totals', 'percentiles',
+                                               'categories', 'coverage'])
+
+
+@profiled('scenarios')
+def run_scenarios(df, scenarios, weights=None):
+    """
+    기준 + 시나리오 전체를 한 번에 재계산
+
+    Args:
+        df: 스냅샷 (Code, 21개 디스크립터, Item_* 컬럼)
+        scenarios: {이름: [Shock, ...]}
+        weights: 카테고리 가중치 dict (기본: scoring.WEIGHTS)
+
+    Returns:
+        ScenarioResult - names[0] 은 'base', totals / percentiles 는 (시나리오 수 + 1, 종목 수)
+    """
+    df = df.drop_duplicates(subset=['Code']).reset_index(drop=True)
+    base = df.reindex(columns=DESCRIPTOR_COLS).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    base_cols = {col: base[:, j] for j, col in enumerate(DESCRIPTOR_COLS)}
+    items = item_matrix(df)
+
+    names = ['base'] + list(scenarios)
+    affected = [DESCRIPTOR_COLS.index(col) for col in AFFECTED_COLS]
+    values = np.repeat(base[None, :, affected], len(names), axis=0)
+    for s, name in enumerate(names[1:], start=1):
+        shocked = recompute_descriptors(apply_shocks(items, scenarios[name]), base_cols)
+        values[s] = np.column_stack([shocked[col] for col in AFFECTED_COLS])
+
+    # 바뀌는 지표만 (시나리오, 종목, 지표) 텐서로 한 번에 표준화, 나머지는 기준 점수 한 번만
+    base_scores, _ = score_matrix(base)
+    shocked_scores, _ = score_matrix(values, AFFECTED_COLS)
+    descriptor_scores = np.repeat(base_scores[None], len(names), axis=0)
+    descriptor_scores[..., affected] = shocked_scores
+    categories = category_matrix(descriptor_scores)
+    totals = categories @ weight_vector(weights)
+    percentiles = pd.DataFrame(totals.T).rank(pct=True).to_numpy().T * 100
+    labels = df['Name'].astype(str).to_numpy() if 'Name' in df.columns else df['Code'].to_numpy()
+    coverage = float(np.mean(~np.isnan(items['OpProfit']) & ~np.isnan(items['TotalEquity'])))
+    return ScenarioResult(names, [[]] + [scenarios[n] for n in names[1:]], df['Code'].to_numpy(), labels,
+                          totals, percentiles, categories, coverage)
+
+
+def format_shocks(shocks):
+    units = {'scale': lambda v: f'*{v:g}', 'revenue_pp': lambda v: f'{v:+g}pp', 'add': lambda v: f'{v:+g}'}
+    return ', '.join(f'{s.item}{units[s.op](s.value)}' for s in shocks) or '-'
+
+
+def summary(result, top_pct=TOP_PCT):
+    """시나리오별 순위 변화 요약 (평균 백분위 변화, 순위 상관, 상위 구간 교체율, 최대 하락 종목)"""
+    base = result.percentiles[0]
+    base_top = base > 100 - top_pct
+    rows = []
+    for s, name in enumerate(result.names[1:], start=1):
+        pct = result.percentiles[s]
+        delta = pct - base
+        worst = int(np.nanargmin(delta))
+        rows.append({
+            'Scenario': name,
+            'Shocks': format_shocks(result.shocks[s]),
+            'Mean_Abs_Shift': float(np.nanmean(np.abs(delta))),
+            'Rank_Corr': float(pd.Series(pct).corr(pd.Series(base))),
+            'Top_Turnover': float((base_top & ~(pct > 100 - top_pct)).sum() / max(base_top.sum(), 1)),
+            'Worst': f'{result.labels[worst]}({result.codes[worst]}) {delta[worst]:+.1f}',
+        })
+    return pd.DataFrame(rows)
+
+
+def stock_frame(result):
+    """종목별 기준 / 시나리오 Quality_Score 와 변화 (기준 점수 내림차순)"""
+    out = pd.DataFrame({'Code': result.codes, 'Name': result.labels, 'Quality_Score': result.percentiles[0]})
+    for s, name in enumerate(result.names[1:], start=1):
+        out[f'{name}_Score'] = result.percentiles[s]
+        out[f'{name}_Delta'] = result.percentiles[s] - result.percentiles[0]
+    return out.sort_values('Quality_Score', ascending=False).reset_index(drop=True)
+
+
+def print_summary(result, n=5):
+    print(f"[시나리오 분석] {len(result.codes):,}종목, 재무 항목 보유 {result.coverage:.0%}, 시나리오 {len(result.names) - 1}개")
+    table = summary(result)
+    print("-" * 100)
+    print(f"{'시나리오':<16} {'충격':<36} {'평균변화':>8} {'순위상관':>8} {f'상위{TOP_PCT}%교체':>10}  최대 하락")
+    for row in table.itertuples():
+        print(f"{row.Scenario:<16} {row.Shocks:<36} {row.Mean_Abs_Shift:>8.1f} {row.Rank_Corr:>8.3f} "
+              f"{row.Top_Turnover:>10.1%}  {row.Worst}")
+    if n:
+        frame = stock_frame(result)
+        for name in result.names[1:]:
+            losers = frame.nsmallest(n, f'{name}_Delta')
+            print(f"\n  [{name}] 하락 상위 {n}: " + ', '.join(
+                f"{r.Name}({r.Code}) {getattr(r, name + '_Delta'):+.1f}" for r in losers.itertuples()))
+
+
+def print_stock(result, code):
+    rows = np.flatnonzero(result.codes == code)
+    if not len(rows):
+        print(f"{code}: 스냅샷에 없는 종목")
+        return
+    i = rows[0]
+    print(f"\n[{result.labels[i]}({code}) 시나리오별 점수]")
+    print(f"{'시나리오':<16} {'점수':>6} {'변화':>6}  " + ' '.join(f'{c[:-6]:>13}' for c in CATEGORY_COLS))
+    for s, name in enumerate(result.names):
+        delta = result.percentiles[s, i] - result.percentiles[0, i]
+        print(f"{name:<16} {result.percentiles[s, i]:>6.1f} {delta:>+6.1f}  "
+              + ' '.join(f'{v:>13.2f}' for v in result.categories[s, i]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='시나리오 / 스트레스 재계산')
+    parser.add_argument('--csv', help='점수 산출 결과 CSV (기본: 가장 최근 스냅샷)')
+    parser.add_argument('-s', '--scenario', action='append', default=[], metavar='NAME=SHOCKS',
+                        help="시나리오 (예: '금리2배=InterestExpense*2', 여러 번 지정 가능)")
+    parser.add_argument('--preset', nargs='*', choices=list(PRESETS), help='기본 시나리오 중 선택')
+    parser.add_argument('--config', help='{"이름": ["충격", ...]} JSON')
+    parser.add_argument('--code', help='종목별 시나리오 점수')
+    parser.add_argument('-n', type=int, default=5, help='시나리오별 하락 상위 종목 수')
+    parser.add_argument('-o', '--output', help='종목별 시나리오 점수 CSV 저장 경로')
+    args = parser.parse_args(argv)
+
+    try:
+        scenarios = load_scenarios(args.config) if args.config else {}
+        scenarios.update(parse_scenario(text) for text in args.scenario)
+    except ValueError as e:
+        parser.error(str(e))
+    presets = args.preset if args.preset is not None else ([] if scenarios else list(PRESETS))
+    scenarios = {**{name: [parse_shock(s) for s in PRESETS[name]] for name in presets}, **scenarios}
+    if not scenarios:
+        parser.error("시나리오가 없습니다 (-s / --preset / --config)")
+
+    if args.csv:
+        df = load_snapshot(args.csv)
+    else:
+        snapshots = list_snapshots()
+        if not snapshots:
+            parser.error("스냅샷이 없습니다 (--csv 지정 가능)")
+        df = load_snapshot(snapshots[-1][1])
+
+    result = run_scenarios(df, scenarios)
+    if result.coverage == 0:
+        print("⚠ Item_* 재무 항목이 없는 스냅샷입니다 (재수집 후 점수 산출하면 저장됨), 모든 시나리오 = 기준")
+    print_summary(result, args.n)
+    if args.code:
+        print_stock(result, args.code.zfill(6))
+    if args.output:
+        stock_frame(result).to_csv(args.output, index=False, encoding='utf-8-sig')
+        print(f"\n✅ 종목별 시나리오 점수 저장: {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
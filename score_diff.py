@@ -0,0 +1,287 @@
+"""
+실행 간 점수 변화 분석 (run-to-run diff / attribution)
+
+오늘과 직전 스냅샷을 종목코드로 맞춰서 Quality_Score_Total 변화를
+카테고리 / 디스크립터별 기여도로 나누고, 각 기여도를 다시
+
+    원본 데이터 변화  : 오늘 값을 어제의 평균 / 표준편차로 표준화했을 때의 변화
+    재표준화 효과     : 유니버스 평균 / 표준편차(중앙값 대체 포함)가 바뀌어서 생긴 변화
+
+로 분리한다. 종합 점수 = sum(카테고리 가중치 x 카테고리 내 Score_* 평균) 이므로
+디스크립터 기여도 = 가중치 / 카테고리 지표 수 x Score_* 변화 이고, 합하면 정확히
+Quality_Score_Total 변화가 된다. 신규 편입 / 제외 종목과 순위 급변 종목도 뽑는다.
+
+(종목, 지표) 배열 연산만 사용해서 2,600종목 기준 수 ms 로 끝나므로 업로드 직전
+게이트로 쓴다 (급변 종목 비율이 max_mover_rate 를 넘으면 ScoreDiffError).
+
+    python score_diff.py                 # 최근 스냅샷 두 개 비교
+    python score_diff.py --code 005930   # 종목별 디스크립터 기여도
+"""
+
+import argparse
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scoring import CATEGORIES, CATEGORY_COLS, DESCRIPTOR_COLS, WEIGHTS, fill_matrix, weight_vector
+from factor_store import HISTORY_DIR, list_snapshots, load_latest_snapshot, load_snapshot, normalize_codes
+from profiling import profiled
+
+DIFF_DIR = os.path.join(HISTORY_DIR, 'diff')
+
+MOVER_POINTS = 30.0    # 순위 급변 기준 (Quality_Score 백분위 변화, %p)
+MAX_MOVER_RATE = 0.2   # 급변 종목 비율 상한 (넘으면 업로드 중단)
+MAX_EXIT_RATE = 0.1    # 제외 종목 비율 상한 (직전 유니버스 대비)
+
+# 디스크립터별 부호 / 가중치 / 카테고리 지표 수 -> 기여도 계수 (DESCRIPTOR_COLS 순서)
+_SIGN = np.array([sign for _, cols, sign in CATEGORIES for _ in cols], dtype=float)
+_CATEGORY_INDEX = np.array([j for j, (_, cols, _) in enumerate(CATEGORIES) for _ in cols])
+_CATEGORY_SIZE = np.array([len(cols) for _, cols, _ in CATEGORIES for _ in cols], dtype=float)
+# (21, 5) 소속 행렬: Score_* @ _MEMBERSHIP = 카테고리 합, / 지표 수 = 카테고리 점수
+_MEMBERSHIP = np.eye(len(CATEGORIES))[_CATEGORY_INDEX]
+_CATEGORY_MEAN = _MEMBERSHIP / _CATEGORY_SIZE[:, None]
+
+ScoreDiff = namedtuple('ScoreDiff', ['frame', 'entries', 'exits', 'prev_values', 'curr_values',
+                                     'raw_effect', 'restd_effect'])
+
+
+class ScoreDiffError(RuntimeError):
+    """급변 / 제외 종목 비율 초과 (업로드 중단)"""
+
+    def __init__(self, message, diff):
+        super().__init__(message)
+        self.diff = diff
+
+
+# ---------------------------------------------------------
+# 계산
+# ---------------------------------------------------------
+def _values(df):
+    """(종목, 21) float 배열 (숫자 컬럼만이면 apply 없이 바로 변환)"""
+    frame = df.reindex(columns=DESCRIPTOR_COLS)
+    if not all(dtype.kind in 'fiub' for dtype in frame.dtypes):
+        frame = frame.apply(pd.to_numeric, errors='coerce')
+    return frame.to_numpy(dtype=float)
+
+
+def _standardize(filled, mean, std):
+    """부호 포함 Z-Score (표준편차 0 / NaN 이면 0, scoring._fill_and_standardize 와 같은 규칙)"""
+    with np.errstate(all='ignore'):
+        z = (filled - mean) / std * _SIGN
+    return np.where((std > 0) & np.isfinite(z), z, 0.0)
+
+
+def _universe(values, weights=None):
+    """스냅샷 하나의 (대체된 지표 행렬, 평균, 표준편차, 종합 점수, 백분위)"""
+    filled = fill_matrix(values)
+    with np.errstate(all='ignore'):
+        mean = filled.mean(axis=0)
+        std = filled.std(axis=0, ddof=1) if len(filled) > 1 else np.zeros(filled.shape[1])
+    total = _standardize(filled, mean, std) @ _CATEGORY_MEAN @ weight_vector(weights)
+    percentile = pd.Series(total).rank(pct=True).to_numpy() * 100  # calculate_scores 의 Quality_Score
+    return filled, mean, std, total, percentile
+
+
+def diff_scores(prev, curr, weights=None):
+    """
+    두 실행 결과 비교
+
+    Args:
+        prev: 직전 스냅샷 (Code + 21개 지표)
+        curr: 오늘 결과 (Code + 21개 지표)
+        weights: 카테고리 가중치 dict (기본: WEIGHTS)
+
+    Returns:
+        ScoreDiff
+        - frame: 양쪽에 모두 있는 종목별 점수 변화 / 카테고리 기여도 / 원본·재표준화 효과
+        - entries, exits: 신규 편입 / 제외 종목 (Code, Name, Quality_Score)
+        - prev_values, curr_values: (종목, 21) 원본 지표 (frame 행 순서)
+        - raw_effect, restd_effect: (종목, 21) 디스크립터별 기여도 (합 = Delta_Total)
+    """
+    prev = prev.assign(Code=normalize_codes(prev['Code'])).drop_duplicates(subset=['Code']).reset_index(drop=True)
+    curr = curr.assign(Code=normalize_codes(curr['Code'])).drop_duplicates(subset=['Code']).reset_index(drop=True)
+    prev_values, curr_values = _values(prev), _values(curr)
+    prev_filled, prev_mean, prev_std, prev_total, prev_pct = _universe(prev_values, weights)
+    curr_filled, curr_mean, curr_std, curr_total, curr_pct = _universe(curr_values, weights)
+
+    # 종목코드로 정렬 (벡터화 조인)
+    prev_pos = pd.Index(prev['Code']).get_indexer(curr['Code'])
+    common = np.flatnonzero(prev_pos >= 0)
+    p, c = prev_pos[common], common
+
+    # 디스크립터 기여도 계수 = 카테고리 가중치 / 카테고리 지표 수
+    coef = weight_vector(weights or WEIGHTS)[_CATEGORY_INDEX] / _CATEGORY_SIZE
+    z_prev = _standardize(prev_filled[p], prev_mean, prev_std)
+    z_mid = _standardize(curr_filled[c], prev_mean, prev_std)   # 오늘 값, 어제 기준
+    z_curr = _standardize(curr_filled[c], curr_mean, curr_std)
+    raw_effect = (z_mid - z_prev) * coef
+    restd_effect = (z_curr - z_mid) * coef
+
+    by_category = (raw_effect + restd_effect) @ _MEMBERSHIP
+
+    frame = pd.DataFrame({
+        'Code': curr['Code'].values[c],
+        'Quality_Score_Prev': prev_pct[p],
+        'Quality_Score': curr_pct[c],
+        'Delta_Score': curr_pct[c] - prev_pct[p],
+        'Total_Prev': prev_total[p],
+        'Total': curr_total[c],
+        'Delta_Total': curr_total[c] - prev_total[p],
+        'Raw_Effect': raw_effect.sum(axis=1),
+        'Restd_Effect': restd_effect.sum(axis=1),
+    })
+    for j, cat in enumerate(CATEGORY_COLS):
+        frame[f'Delta_{cat}'] = by_category[:, j]
+    if 'Name' in curr.columns:
+        frame.insert(1, 'Name', curr['Name'].values[c])
+
+    def _side(df, rows, pct):
+        out = pd.DataFrame({'Code': df['Code'].values[rows], 'Quality_Score': pct[rows]})
+        if 'Name' in df.columns:
+            out.insert(1, 'Name', df['Name'].values[rows])
+        return out.sort_values('Quality_Score', ascending=False).reset_index(drop=True)
+
+    entries = _side(curr, np.flatnonzero(prev_pos < 0), curr_pct)
+    in_curr = np.zeros(len(prev), dtype=bool)
+    in_curr[p] = True
+    exits = _side(prev, np.flatnonzero(~in_curr), prev_pct)
+
+    return ScoreDiff(frame, entries, exits, prev_values[p], curr_values[c], raw_effect, restd_effect)
+
+
+def movers(diff, n=20, threshold=0.0):
+    """Quality_Score 변화 절대값 상위 n개 (threshold 이상만)"""
+    delta = diff.frame['Delta_Score'].abs()
+    order = np.argsort(-delta.to_numpy(), kind='stable')
+    out = diff.frame.iloc[order]
+    return out[out['Delta_Score'].abs() >= threshold].head(n)
+
+
+def descriptor_attribution(diff, code):
+    """
+    종목 하나의 디스크립터별 기여도 (기여도 절대값 내림차순)
+
+    Returns:
+        Descriptor, Prev, Curr, Raw_Effect, Restd_Effect, Contribution 데이터프레임
+    """
+    code = str(code).zfill(6)
+    rows = np.flatnonzero(diff.frame['Code'].values == code)
+    if not len(rows):
+        raise KeyError(f"양쪽 스냅샷에 모두 있는 종목이 아닙니다: {code}")
+    i = rows[0]
+    out = pd.DataFrame({
+        'Descriptor': DESCRIPTOR_COLS,
+        'Category': [CATEGORY_COLS[j] for j in _CATEGORY_INDEX],
+        'Prev': diff.prev_values[i],
+        'Curr': diff.curr_values[i],
+        'Raw_Effect': diff.raw_effect[i],
+        'Restd_Effect': diff.restd_effect[i],
+    })
+    out['Contribution'] = out['Raw_Effect'] + out['Restd_Effect']
+    order = np.argsort(-out['Contribution'].abs().to_numpy(), kind='stable')
+    return out.iloc[order].reset_index(drop=True)
+
+
+# ---------------------------------------------------------
+# 요약 / 게이트
+# ---------------------------------------------------------
+def mover_rate(diff, threshold=MOVER_POINTS):
+    return float((diff.frame['Delta_Score'].abs() >= threshold).mean()) if len(diff.frame) else 0.0
+
+
+def exit_rate(diff):
+    total = len(diff.frame) + len(diff.exits)
+    return len(diff.exits) / total if total else 0.0
+
+
+def print_summary(diff, n=10, threshold=MOVER_POINTS):
+    frame = diff.frame
+    print(f"[점수 변화] 공통 {len(frame)}개 종목, 신규 {len(diff.entries)}개, 제외 {len(diff.exits)}개, "
+          f"{threshold:.0f}%p 이상 변화 {mover_rate(diff, threshold):.1%}")
+    if len(frame):
+        raw, restd = frame['Raw_Effect'].abs().sum(), frame['Restd_Effect'].abs().sum()
+        if raw + restd > 0:
+            share = raw / (raw + restd)
+            print(f"  총점 변화 중 원본 데이터 변화 {share:.0%} / 재표준화 효과 {1 - share:.0%} (절대값 합 기준)")
+        top = movers(diff, n)
+        cols = [c for c in ['Code', 'Name', 'Quality_Score_Prev', 'Quality_Score', 'Delta_Score',
+                            'Raw_Effect', 'Restd_Effect'] if c in top.columns]
+        print(top[cols].round(2).to_string(index=False))
+    for label, side in (('신규', diff.entries), ('제외', diff.exits)):
+        if len(side):
+            print(f"  {label}: " + ', '.join(side['Code'].head(n)) + (' ...' if len(side) > n else ''))
+
+
+def diff_path(run_date=None):
+    return os.path.join(DIFF_DIR, f"diff_{(run_date or datetime.now()).strftime('%Y%m%d')}.csv")
+
+
+@profiled('score_diff')
+def diff_against_latest(curr, save=True):
+    """
+    오늘 결과를 오늘 이전 최근 스냅샷과 비교 (스냅샷이 없으면 None)
+
+    save 면 history/diff/diff_YYYYMMDD.csv 로 종목별 변화 저장
+    """
+    prev_date, prev = load_latest_snapshot(before=pd.Timestamp(datetime.now().date()))
+    if prev is None:
+        return None
+    diff = diff_scores(prev, curr)
+    print(f"  (비교 기준: {prev_date:%Y-%m-%d} 스냅샷)")
+    if save:
+        os.makedirs(DIFF_DIR, exist_ok=True)
+        movers(diff, len(diff.frame)).round(4).to_csv(diff_path(), index=False, encoding='utf-8-sig')
+    return diff
+
+
+def check_changes(curr, max_mover_rate=MAX_MOVER_RATE, max_exit_rate=MAX_EXIT_RATE, threshold=MOVER_POINTS):
+    """
+    직전 스냅샷 대비 변화 검사 (급변 / 제외 종목 비율이 상한을 넘으면 ScoreDiffError)
+
+    Returns:
+        ScoreDiff (비교할 스냅샷이 없으면 None)
+    """
+    diff = diff_against_latest(curr)
+    if diff is None:
+        return None
+    print_summary(diff, threshold=threshold)
+    if mover_rate(diff, threshold) > max_mover_rate:
+        raise ScoreDiffError(f"{threshold:.0f}%p 이상 변화 종목 {mover_rate(diff, threshold):.1%} > "
+                             f"허용 {max_mover_rate:.1%}", diff)
+    if exit_rate(diff) > max_exit_rate:
+        raise ScoreDiffError(f"제외 종목 {exit_rate(diff):.1%} > 허용 {max_exit_rate:.1%}", diff)
+    return diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='실행 간 점수 변화 분석')
+    parser.add_argument('--prev', help='직전 결과 CSV (기본: 두 번째로 최근 스냅샷)')
+    parser.add_argument('--curr', help='오늘 결과 CSV (기본: 가장 최근 스냅샷)')
+    parser.add_argument('--code', help='종목별 디스크립터 기여도')
+    parser.add_argument('-n', type=int, default=20, help='급변 종목 표시 수')
+    parser.add_argument('-o', '--output', help='종목별 변화 CSV 저장 경로')
+    args = parser.parse_args(argv)
+
+    snapshots = list_snapshots()
+    if not args.curr and not snapshots or not args.prev and len(snapshots) < 2:
+        parser.error("비교할 스냅샷이 두 개 이상 필요합니다 (--prev / --curr 지정 가능)")
+    curr = load_snapshot(args.curr or snapshots[-1][1])
+    prev = load_snapshot(args.prev or snapshots[-2][1])
+
+    from data_cache import attach_names
+
+    diff = diff_scores(attach_names(prev), attach_names(curr))
+    if args.code:
+        print(descriptor_attribution(diff, args.code).round(3).to_string(index=False))
+        return diff
+    print_summary(diff, args.n)
+    if args.output:
+        movers(diff, len(diff.frame)).round(4).to_csv(args.output, index=False, encoding='utf-8-sig')
+    return diff
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+점수 조회 API 서버 (읽기 전용, asyncio)
+
+가장 최근 스냅샷을 한 번 메모리에 올리고 아래 인덱스를 만들어 둔다.
+
+    - 종목코드 -> 행 번호 (dict)
+    - 종목명 정렬 목록 (접두어 검색, bisect)
+    - 업종별 행 마스크
+    - 종합 / 카테고리 점수별 내림차순 정렬 배열 (top-N, 스크리닝 정렬)
+    - 행별 JSON (응답 시 직렬화 없이 이어 붙이기만 함)
+
+새 스냅샷이 생기면 백그라운드에서 새 인덱스를 만든 뒤 참조 하나만 바꿔서
+(원자적 교체) 요청 처리 중에 반쯤 바뀐 데이터가 보이지 않게 한다.
+
+    python score_server.py --port 8050
+
+    GET /stock/005930
+    GET /search?prefix=삼성&limit=20
+    GET /top?by=Profitability_Score&n=20&sector=반도체 제조업
+    GET /top?by=Smoothed_Quality_Score&n=50
+    GET /screen?min_ROIC=15&max_Debt_Ratio=100&sort=Quality_Score&limit=50
+    GET /peers/005930?k=10&metric=cosine
+    GET /sectors
+    GET /health
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from scoring import CATEGORY_COLS, DESCRIPTOR_COLS
+from factor_store import list_snapshots, load_snapshot, normalize_codes
+from data_cache import attach_names, attach_sectors
+from peers import METRICS, PeerIndex
+
+RANK_COLS = ['Quality_Score', 'Smoothed_Quality_Score'] + CATEGORY_COLS
+ROW_COLS = (['Code', 'Name', 'Sector', 'Rank', 'Quality_Score', 'Smoothed_Quality_Score', 'Smoothing_Runs']
+            + CATEGORY_COLS + DESCRIPTOR_COLS)
+RELOAD_INTERVAL = 30   # 새 스냅샷 확인 주기 (초)
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 5000
+
+
+def _name_key(name):
+    return str(name).replace(' ', '').lower()
+
+
+class ScoreIndex:
+    """스냅샷 하나에 대한 읽기 전용 인덱스 (만든 뒤에는 바꾸지 않음)"""
+
+    def __init__(self, df, source=None):
+        df = df.drop_duplicates(subset=['Code']).reset_index(drop=True)
+        df['Code'] = normalize_codes(df['Code'])
+        if 'Name' not in df.columns:
+            df['Name'] = df['Code']
+        if 'Sector' not in df.columns:
+            df['Sector'] = None
+        if 'Quality_Score' in df.columns:
+            df['Rank'] = df['Quality_Score'].rank(ascending=False, method='min').astype('Int64')
+
+        self.source = source
+        self.loaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.size = len(df)
+        self.codes = df['Code'].tolist()
+
+        # 숫자 컬럼 (스크리닝 / 정렬용)
+        self.values = {col: df[col].to_numpy(dtype=float, na_value=np.nan)
+                       for col in df.select_dtypes(include=['number', 'bool']).columns}
+
+        # 행별 JSON (NaN -> null)
+        cols = [c for c in ROW_COLS if c in df.columns]
+        lines = df[cols].to_json(orient='records', lines=True, force_ascii=False).splitlines()
+        self.rows = [line.encode('utf-8') for line in lines]
+
+        self.by_code = {code: i for i, code in enumerate(self.codes)}
+
+        names = [_name_key(n) for n in df['Name']]
+        order = sorted(range(len(names)), key=names.__getitem__)
+        self.name_keys = [names[i] for i in order]
+        self.name_rows = order
+
+        sectors = df['Sector'].fillna('').astype(str).to_numpy()
+        self.sectors = {s: sectors == s for s in sorted(set(sectors)) if s}
+
+        # NaN 은 argsort 에서 맨 뒤로 간다
+        self.order = {col: np.argsort(-self.values[col], kind='stable') for col in RANK_COLS if col in self.values}
+
+        # 유사 종목 검색 (Score_* 가 있는 스냅샷만)
+        self.peers = PeerIndex.from_frame(df, source) if any(c.startswith('Score_') for c in df.columns) else None
+
+    # ---------------------------------------------------------
+    # 조회
+    # ---------------------------------------------------------
+    def lookup(self, code):
+        i = self.by_code.get(str(code).zfill(6))
+        return None if i is None else self.rows[i]
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        key = _name_key(prefix)
+        start = bisect_left(self.name_keys, key)
+        found = []
+        for pos in range(start, len(self.name_keys)):
+            if not self.name_keys[pos].startswith(key) or len(found) >= limit:
+                break
+            found.append(self.name_rows[pos])
+        return found
+
+    def _sector_mask(self, sector):
+        if sector not in self.sectors:
+            raise KeyError(f"업종 없음: {sector}")
+        return self.sectors[sector]
+
+    def top(self, by='Quality_Score', n=DEFAULT_LIMIT, sector=None):
+        if by not in self.order:
+            raise ValueError(f"정렬 기준은 {list(self.order)} 중 하나")
+        order = self.order[by]
+        if sector:
+            order = order[self._sector_mask(sector)[order]]
+        return order[:n]
+
+    def screen(self, filters, sort='Quality_Score', limit=DEFAULT_LIMIT, sector=None):
+        """
+        Args:
+            filters: [(컬럼, 최소, 최대), ...] (None 이면 해당 쪽 제한 없음)
+
+        Returns:
+            (조건 만족 종목 수, 정렬된 상위 limit 개 행 번호)
+        """
+        if sort not in self.order:
+            raise ValueError(f"정렬 기준은 {list(self.order)} 중 하나")
+        mask = np.ones(self.size, dtype=bool) if not sector else self._sector_mask(sector).copy()
+        with np.errstate(invalid='ignore'):
+            for col, lo, hi in filters:
+                if col not in self.values:
+                    raise ValueError(f"알 수 없는 컬럼: {col}")
+                if lo is not None:
+                    mask &= self.values[col] >= lo
+                if hi is not None:
+                    mask &= self.values[col] <= hi
+        order = self.order[sort]
+        matched = order[mask[order]]
+        return len(matched), matched[:limit]
+
+    def payload(self, rows, **meta):
+        head = json.dumps(meta, ensure_ascii=False)[:-1].encode('utf-8')
+        return head + (b', ' if meta else b'') + b'"items": [' + b', '.join(self.rows[i] for i in rows) + b']}'
+
+
+# ---------------------------------------------------------
+# 데이터 원본 (최근 스냅샷 또는 CSV 파일)
+# ---------------------------------------------------------
+class SnapshotSource:
+    """
+    Args:
+        csv_path: 지정하면 이 파일, 없으면 history/ 의 가장 최근 스냅샷
+    """
+
+    def __init__(self, csv_path=None):
+        self.csv_path = csv_path
+
+    def _path(self):
+        if self.csv_path:
+            return self.csv_path
+        snapshots = list_snapshots()
+        if not snapshots:
+            raise FileNotFoundError("저장된 스냅샷이 없습니다 (history/quality_YYYYMMDD.csv)")
+        return snapshots[-1][1]
+
+    def signature(self):
+        path = self._path()
+        return path, os.path.getmtime(path)
+
+    def load(self):
+        path = self._path()
+        df = load_snapshot(path)
+        df = attach_sectors(attach_names(df))
+        return ScoreIndex(df, source=os.path.basename(path))
+
+
+# ---------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def _error(status, message):
+    return status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+
+
+def _int(query, name, default):
+    value = int(query.get(name, [default])[0])
+    return max(0, min(value, MAX_LIMIT))
+
+
+def _filters(query):
+    filters = {}
+    for key, values in query.items():
+        for prefix, pos in (('min_', 1), ('max_', 2)):
+            if key.startswith(prefix):
+                bounds = filters.setdefault(key[len(prefix):], [None, None])
+                bounds[pos - 1] = float(values[0])
+    return [(col, lo, hi) for col, (lo, hi) in filters.items()]
+
+
+def route(index, target):
+    """요청 경로 -> (상태 코드, JSON 바이트)"""
+    url = urlsplit(target)
+    path = unquote(url.path).rstrip('/')
+    query = parse_qs(url.query)
+    try:
+        if path.startswith('/stock/'):
+            row = index.lookup(path[len('/stock/'):])
+            return (200, row) if row is not None else _error(404, '종목 없음')
+        if path == '/search':
+            rows = index.search(query.get('prefix', [''])[0], _int(query, 'limit', DEFAULT_LIMIT))
+            return 200, index.payload(rows, count=len(rows))
+        if path == '/top':
+            by = query.get('by', ['Quality_Score'])[0]
+            rows = index.top(by, _int(query, 'n', DEFAULT_LIMIT), query.get('sector', [None])[0])
+            return 200, index.payload(rows, by=by, count=len(rows))
+        if path == '/screen':
+            total, rows = index.screen(_filters(query), query.get('sort', ['Quality_Score'])[0],
+                                       _int(query, 'limit', DEFAULT_LIMIT), query.get('sector', [None])[0])
+            return 200, index.payload(rows, matched=total, count=len(rows))
+        if path.startswith('/peers/'):
+            if index.peers is None:
+                return _error(404, 'Score_* 컬럼이 없는 스냅샷')
+            metric = query.get('metric', ['cosine'])[0]
+            if metric not in METRICS:
+                raise ValueError(f"metric 은 {METRICS} 중 하나")
+            rows, similarity = index.peers.query(path[len('/peers/'):], k=_int(query, 'k', 10), metric=metric)
+            # peer 인덱스와 ScoreIndex 는 같은 데이터프레임 순서
+            return 200, index.payload(rows, metric=metric, similarity=np.round(similarity, 4).tolist())
+        if path == '/sectors':
+            counts = {s: int(m.sum()) for s, m in index.sectors.items()}
+            return 200, json.dumps(counts, ensure_ascii=False).encode('utf-8')
+        if path == '/health':
+            return 200, json.dumps({'source': index.source, 'stocks': index.size,
+                                    'loaded_at': index.loaded_at}, ensure_ascii=False).encode('utf-8')
+    except KeyError as e:
+        return _error(404, str(e.args[0]))
+    except ValueError as e:
+        return _error(400, str(e))
+    return _error(404, '알 수 없는 경로')
+
+
+class ScoreServer:
+    """
+    Args:
+        source: SnapshotSource (reload_interval 마다 변경 확인)
+        index: 이미 만든 ScoreIndex (source 없이 넘기면 재로딩 없음)
+    """
+
+    def __init__(self, source=None, index=None, host='127.0.0.1', port=8050, reload_interval=RELOAD_INTERVAL):
+        self.source = source
+        self.index = index if index is not None else source.load()
+        self.signature = source.signature() if source else None
+        self.host, self.port = host, port
+        self.reload_interval = reload_interval
+        self._server = None
+        self._watcher = None
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                method, target, version = request_line.decode('latin-1').split()
+                if int(headers.get('content-length') or 0):
+                    await reader.readexactly(int(headers['content-length']))
+
+                # 요청 하나는 처음 잡은 인덱스로 끝까지 처리 (재로딩 중에도 일관성 유지)
+                status, body = route(self.index, target) if method == 'GET' else _error(405, 'GET 만 지원')
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(b'HTTP/1.1 %d %s\r\nContent-Type: application/json; charset=utf-8\r\n'
+                             b'Content-Length: %d\r\nConnection: %s\r\n\r\n'
+                             % (status, STATUS[status].encode(), len(body), b'keep-alive' if keep_alive else b'close'))
+                writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                signature = self.source.signature()
+                if signature == self.signature:
+                    continue
+                # 인덱스 생성은 이벤트 루프 밖에서, 교체는 참조 대입 한 번
+                index = await loop.run_in_executor(None, self.source.load)
+                self.index, self.signature = index, signature
+                print(f"✓ 재로딩: {index.source} ({index.size}개 종목)")
+            except Exception as e:
+                print(f"⚠ 재로딩 실패 (기존 인덱스 유지): {e}")
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.source and self.reload_interval:
+            self._watcher = asyncio.get_running_loop().create_task(self._watch())
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"점수 조회 서버: http://{self.host}:{self.port}/ ({self.index.source}, {self.index.size}개 종목)")
+        async with self._server:
+            await self._server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='점수 조회 API 서버 (읽기 전용)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--csv', help='스냅샷 대신 이 CSV 사용')
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL, help='새 스냅샷 확인 주기 (초, 0 이면 끔)')
+    args = parser.parse_args(argv)
+
+    server = ScoreServer(SnapshotSource(args.csv), host=args.host, port=args.port, reload_interval=args.reload_interval)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
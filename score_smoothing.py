@@ -0,0 +1,211 @@
+"""
+실행 간 점수 평활 (Smoothed Quality Score)
+
+Quality_Score 는 매일 유니버스 전체로 다시 표준화하므로 구성이 조금만 바뀌어도 흔들린다.
+카테고리 점수(z-score 평균)를 실행마다 지수 가중 평균(ewma) 또는 최근 N회 평균(mean)으로
+누적하고, 그 가중 합의 백분위를 Smoothed_Quality_Score 로 원래 점수 옆에 붙인다.
+
+직전 상태 파일(history/smoothing/state_YYYYMMDD.npz) 하나만 읽고 갱신하므로
+히스토리 길이와 관계없이 실행당 O(종목 수) (mean 은 O(종목 수 x N)).
+
+    QUILTY_SMOOTHING_SPAN=5       # 기본 5, 0 이면 끔 (ewma 는 alpha = 2 / (span + 1))
+    QUILTY_SMOOTHING_MODE=mean    # 기본 ewma
+
+같은 날 다시 실행하면 오늘 이전 상태에서 다시 계산하므로 두 번 누적되지 않는다.
+한동안 유니버스에서 빠진 종목은 상태를 그대로 두었다가 STALE_RUNS 회 넘게 없으면 버린다.
+"""
+
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from factor_store import HISTORY_DIR, normalize_codes
+from profiling import profiled
+from scoring import CATEGORY_COLS, weight_vector
+
+SMOOTHING_DIR = os.path.join(HISTORY_DIR, 'smoothing')
+SMOOTHING_SPAN = int(os.environ.get('QUILTY_SMOOTHING_SPAN', '5'))
+SMOOTHING_MODE = os.environ.get('QUILTY_SMOOTHING_MODE', 'ewma')
+MODES = ('ewma', 'mean')
+STALE_RUNS = 20     # 이 횟수보다 오래 빠진 종목은 상태에서 제거
+KEEP_STATES = 5     # 남겨둘 날짜별 상태 파일 수
+
+SMOOTHED_COLS = ['Smoothed_Quality_Score_Total', 'Smoothed_Quality_Score', 'Smoothing_Runs']
+
+STATE_PATTERN = re.compile(r'^state_(\d{8})\.npz$')
+
+
+class SmoothingState:
+    """
+    종목별 평활 상태
+
+    Args:
+        mode: 'ewma' 또는 'mean'
+        span: ewma 기간 / mean 창 크기 (실행 횟수)
+        codes: 종목코드 (N,)
+        level: ewma 는 가중 합 (1, N, K), mean 은 최근 span 회 값 (span, N, K, 없으면 NaN)
+        weight: ewma 가중치 합 (N, K) (mean 은 사용 안 함)
+        runs: 종목별 누적 실행 수 (N,)
+        missed: 종목별 연속 누락 실행 수 (N,)
+    """
+
+    def __init__(self, mode=SMOOTHING_MODE, span=SMOOTHING_SPAN, codes=(), level=None, weight=None,
+                 runs=None, missed=None, date=None):
+        if mode not in MODES:
+            raise ValueError(f"알 수 없는 평활 방식: {mode} (사용 가능: {', '.join(MODES)})")
+        if span < 1:
+            raise ValueError(f"평활 기간은 1 이상이어야 합니다: {span}")
+        n, k = len(codes), len(CATEGORY_COLS)
+        self.mode = mode
+        self.span = int(span)
+        self.codes = np.asarray(codes).astype(str)
+        depth = 1 if mode == 'ewma' else self.span
+        self.level = np.zeros((depth, n, k)) if level is None else np.asarray(level, dtype=float)
+        if mode == 'mean' and level is None:
+            self.level[:] = np.nan
+        self.weight = np.zeros((n, k)) if weight is None else np.asarray(weight, dtype=float)
+        self.runs = np.zeros(n, dtype=int) if runs is None else np.asarray(runs, dtype=int)
+        self.missed = np.zeros(n, dtype=int) if missed is None else np.asarray(missed, dtype=int)
+        self.date = date
+
+    # ---------------------------------------------------------
+    # 저장 / 로드
+    # ---------------------------------------------------------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, mode=np.array(self.mode), span=np.array(self.span), codes=self.codes,
+                            level=self.level, weight=self.weight, runs=self.runs, missed=self.missed,
+                            date=np.array(self.date or ''), categories=np.array(CATEGORY_COLS))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """경로 또는 파일 객체 (실행 기록의 바이트 재생용)"""
+        data = np.load(path)
+        if data['categories'].tolist() != CATEGORY_COLS:
+            raise ValueError("카테고리 구성이 바뀐 평활 상태입니다")
+        return cls(str(data['mode']), int(data['span']), data['codes'], data['level'], data['weight'],
+                   data['runs'], data['missed'], str(data['date']) or None)
+
+    # ---------------------------------------------------------
+    # 갱신
+    # ---------------------------------------------------------
+    def update(self, codes, scores, date=None):
+        """
+        오늘 카테고리 점수를 반영한 새 상태 (self 는 그대로)
+
+        Args:
+            codes: 오늘 종목코드 (M,)
+            scores: 카테고리 점수 (M, K), CATEGORY_COLS 순서
+
+        Returns:
+            새 SmoothingState (앞 M개 행이 오늘 종목, 같은 순서)
+        """
+        codes = pd.Index(np.asarray(codes).astype(str))
+        scores = np.asarray(scores, dtype=float)
+        # 오늘 종목 먼저, 그 뒤에 상태에만 있는 종목
+        union = codes.append(pd.Index(self.codes).difference(codes))
+        old = pd.Index(self.codes).get_indexer(union)
+        present = np.arange(len(union)) < len(codes)
+        prev_runs = np.append(self.runs, 0)[old]
+
+        # 새 종목은 끝에 붙인 빈 행(-1)을 가져감
+        empty = 0.0 if self.mode == 'ewma' else np.nan
+        level = np.concatenate([self.level, np.full((len(self.level), 1, len(CATEGORY_COLS)), empty)], axis=1)[:, old]
+        weight = np.concatenate([self.weight, np.zeros((1, len(CATEGORY_COLS)))])[old]
+        observed = ~np.isnan(scores)
+        today = np.nan_to_num(scores)
+        if self.mode == 'ewma':
+            # 조정 ewma (pandas adjust=True): 가중 합 / 가중치 합, 첫 값은 그대로
+            decay = 1 - 2 / (self.span + 1)
+            level[0, :len(codes)] = np.where(observed, level[0, :len(codes)] * decay + today, level[0, :len(codes)])
+            weight[:len(codes)] = np.where(observed, weight[:len(codes)] * decay + 1, weight[:len(codes)])
+        else:
+            # 종목별 순환 버퍼 (그 종목이 나온 실행 기준 최근 span 회)
+            level[prev_runs[:len(codes)] % self.span, np.arange(len(codes))] = scores
+
+        runs = prev_runs + present
+        missed = np.where(present, 0, np.append(self.missed, 0)[old] + 1)
+        keep = missed <= STALE_RUNS
+        return SmoothingState(self.mode, self.span, union[keep], level[:, keep], weight[keep],
+                              runs[keep], missed[keep], date)
+
+    def smoothed(self, n):
+        """앞 n개 종목의 평활 카테고리 점수 (n, K)"""
+        with np.errstate(all='ignore'):
+            if self.mode == 'ewma':
+                return np.where(self.weight[:n] > 0, self.level[0, :n] / self.weight[:n], np.nan)
+            window = self.level[:, :n]
+            count = (~np.isnan(window)).sum(axis=0)
+            return np.where(count > 0, np.nansum(window, axis=0) / np.maximum(count, 1), np.nan)
+
+
+# ---------------------------------------------------------
+# 날짜별 상태 파일
+# ---------------------------------------------------------
+def state_path(run_date):
+    return os.path.join(SMOOTHING_DIR, f"state_{pd.Timestamp(run_date).strftime('%Y%m%d')}.npz")
+
+
+def list_states():
+    """저장된 상태 파일 [(날짜, 경로), ...] (날짜 오름차순)"""
+    if not os.path.isdir(SMOOTHING_DIR):
+        return []
+    states = []
+    for fname in os.listdir(SMOOTHING_DIR):
+        m = STATE_PATTERN.match(fname)
+        if m:
+            states.append((pd.Timestamp(m.group(1)), os.path.join(SMOOTHING_DIR, fname)))
+    return sorted(states)
+
+
+def latest_state_path(before):
+    """before 이전 가장 최근 상태 파일 경로 (없으면 '')"""
+    candidates = [p for d, p in list_states() if d < pd.Timestamp(before)]
+    return candidates[-1] if candidates else ''
+
+
+def _prune_states():
+    for _, path in list_states()[:-KEEP_STATES]:
+        os.remove(path)
+
+
+@profiled('smoothing')
+def smooth_scores(df, state='latest', save=True, run_date=None, weights=None,
+                  mode=SMOOTHING_MODE, span=SMOOTHING_SPAN):
+    """
+    calculate_scores() 결과에 Smoothed_Quality_Score_Total / Smoothed_Quality_Score / Smoothing_Runs 추가
+
+    Args:
+        state: 직전 SmoothingState, 'latest' 면 run_date 이전 최근 상태 파일, None 이면 처음부터
+        save: 갱신한 상태를 history/smoothing/state_YYYYMMDD.npz 로 저장
+        mode, span: 평활 방식 / 기간 (span 이 0 이면 아무것도 하지 않음)
+    """
+    if not span:
+        return df
+    run_date = pd.Timestamp(run_date or datetime.now().date())
+    if isinstance(state, str):
+        path = latest_state_path(run_date)
+        state = SmoothingState.load(path) if path else None
+    if state is None or state.mode != mode or state.span != span:
+        if state is not None:
+            print(f"⚠ 평활 설정 변경 ({state.mode}/{state.span} -> {mode}/{span}), 처음부터 다시 누적")
+        state = SmoothingState(mode, span)
+
+    codes = normalize_codes(df['Code'])
+    scores = df.reindex(columns=CATEGORY_COLS).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    state = state.update(codes, scores, run_date.strftime('%Y-%m-%d'))
+    smoothed = state.smoothed(len(df))
+
+    df['Smoothed_Quality_Score_Total'] = np.nan_to_num(smoothed) @ weight_vector(weights)
+    df['Smoothed_Quality_Score'] = df['Smoothed_Quality_Score_Total'].rank(pct=True) * 100
+    df['Smoothing_Runs'] = state.runs[:len(df)]
+    if save:
+        state.save(state_path(run_date))
+        _prune_states()
+    return df
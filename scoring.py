@@ -0,0 +1,160 @@
+"""
+신영증권 방식 퀄리티 점수 계산 (STEP 4 공통 모듈)
+
+quality_analysis_ttm.py 의 STEP 4 와 동일한 규칙으로 21개 디스크립터를
+Z-Score 표준화하고 5개 카테고리 점수 및 종합 점수를 계산한다.
+numpy 배열 버전(score_matrix)은 (시나리오/날짜, 종목, 지표) 형태의
+텐서를 한 번에 처리할 수 있어 가중치 최적화, 시나리오 분석 등에서 재사용한다.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from profiling import profiled
+
+# (카테고리 점수 컬럼, [(디스크립터, 결측치 대체 규칙)], 부호)
+# 결측치 대체 규칙: 'median' = 중앙값, 숫자 = 해당 값으로 대체
+CATEGORIES = [
+    ('Profitability_Score', [('ROE', 'median'), ('ROA', 'median'), ('ROIC', 'median'),
+                             ('Operating_Margin', 'median'), ('Gross_Margin', 'median')], 1),
+    ('Stability_Score', [('Revenue_Stability', 0), ('OpProfit_Stability', 0), ('NetIncome_Stability', 0),
+                         ('EPS_Stability', 0), ('Dividend_Stability', 0)], 1),
+    ('Capital_Score', [('Debt_Ratio', 100), ('Interest_Coverage', 'median'),
+                       ('Current_Ratio', 'median'), ('Equity_Ratio', 'median')], 1),
+    ('Improvement_Score', [('ROE_Improvement', 0), ('ROA_Improvement', 0),
+                           ('Operating_Margin_Improvement', 0), ('Gross_Margin_Improvement', 0)], 1),
+    ('Accounting_Score', [('Accruals', 0), ('Net_Operating_Assets', 0), ('Earnings_Smoothness', 0)], -1),
+]
+
+# 신영증권 방식 가중치
+WEIGHTS = {
+    'Profitability_Score': 0.30,
+    'Stability_Score': 0.25,
+    'Capital_Score': 0.20,
+    'Improvement_Score': 0.15,
+    'Accounting_Score': 0.10,
+}
+
+CATEGORY_COLS = [cat for cat, _, _ in CATEGORIES]
+DESCRIPTOR_COLS = [col for _, cols, _ in CATEGORIES for col, _ in cols]
+SCORE_COLS = [f'Score_{col}' for col in DESCRIPTOR_COLS]
+
+
+def _nanmedian(values):
+    """마지막 축 NaN 제외 중앙값 (np.nanmedian 과 같음, 여러 행이어도 정렬 한 번)"""
+    ordered = np.sort(values, axis=-1)  # NaN 은 뒤로
+    count = (~np.isnan(values)).sum(axis=-1, keepdims=True)
+    lo = np.take_along_axis(ordered, np.maximum(count - 1, 0) // 2, axis=-1)
+    hi = np.take_along_axis(ordered, np.minimum(count // 2, max(values.shape[-1] - 1, 0)), axis=-1)
+    return np.where(count > 0, (lo + hi) / 2, np.nan)
+
+
+def _fill(values, fill):
+    """결측치 대체 (마지막 축 = 종목, 'median' 이면 종목 중앙값)"""
+    if fill == 'median':
+        if not values.shape[-1]:
+            return values
+        return np.where(np.isnan(values), _nanmedian(values), values)
+    return np.where(np.isnan(values), float(fill), values)
+
+
+def fill_matrix(values, descriptors=None):
+    """
+    (..., 종목 수, 디스크립터 수) 텐서의 결측치를 CATEGORIES 규칙으로 대체
+
+    표준화 직전 값 (Z-Score 의 평균 / 표준편차 기준)
+    """
+    descriptors = list(descriptors or DESCRIPTOR_COLS)
+    fills = {col: fill for _, cols, _ in CATEGORIES for col, fill in cols}
+    values = np.array(values, dtype=float)
+    for i, col in enumerate(descriptors):
+        if col in fills:
+            values[..., i] = _fill(values[..., i], fills[col])
+    return values
+
+
+def _fill_and_standardize(values, fill):
+    """결측치 대체 후 마지막 축(종목)으로 표준화 (pandas z_score 와 동일, ddof=1)"""
+    with np.errstate(all='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        values = _fill(values, fill)
+
+        mean = values.mean(axis=-1, keepdims=True)
+        std = values.std(axis=-1, ddof=1, keepdims=True)
+        z = (values - mean) / std
+    return np.where(std == 0, 0.0, z)
+
+
+def score_matrix(values, descriptors=None):
+    """
+    디스크립터 텐서를 카테고리 점수 텐서로 변환
+
+    Args:
+        values: (..., 종목 수, 디스크립터 수) 배열
+        descriptors: values 마지막 축의 컬럼 이름 (기본: DESCRIPTOR_COLS)
+
+    Returns:
+        (descriptor_scores, category_scores)
+        - descriptor_scores: values 와 같은 shape 의 Score_* 텐서
+        - category_scores: (..., 종목 수, 5) 카테고리 점수 텐서 (CATEGORY_COLS 순서)
+    """
+    descriptors = list(descriptors or DESCRIPTOR_COLS)
+    values = np.asarray(values, dtype=float)
+
+    descriptor_scores = np.full(values.shape, np.nan)
+    for cat, cols, sign in CATEGORIES:
+        for col, fill in cols:
+            if col in descriptors:
+                i = descriptors.index(col)
+                descriptor_scores[..., i] = _fill_and_standardize(values[..., i], fill) * sign
+    return descriptor_scores, category_matrix(descriptor_scores, descriptors)
+
+
+def category_matrix(descriptor_scores, descriptors=None):
+    """
+    Score_* 텐서 (..., 종목 수, 디스크립터 수) -> 카테고리 점수 텐서 (..., 종목 수, 5)
+
+    카테고리에 속한 디스크립터 점수의 평균 (디스크립터가 하나도 없으면 0)
+    """
+    descriptors = list(descriptors or DESCRIPTOR_COLS)
+    category_scores = []
+    for cat, cols, sign in CATEGORIES:
+        idxs = [descriptors.index(col) for col, _ in cols if col in descriptors]
+        if idxs:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                category_scores.append(np.nanmean(descriptor_scores[..., idxs], axis=-1))
+        else:
+            category_scores.append(np.zeros(descriptor_scores.shape[:-1]))
+    return np.stack(category_scores, axis=-1)
+
+
+def weight_vector(weights=None):
+    """가중치 dict 를 CATEGORY_COLS 순서의 배열로 변환"""
+    weights = weights or WEIGHTS
+    return np.array([weights.get(cat, 0.0) for cat in CATEGORY_COLS], dtype=float)
+
+
+@profiled()
+def calculate_scores(df, weights=None):
+    """
+    데이터프레임에 Score_* / 카테고리 점수 / 종합 점수 컬럼 추가
+
+    Args:
+        df: 21개 디스크립터를 포함한 데이터프레임
+        weights: 카테고리 가중치 dict (기본: 신영증권 방식 WEIGHTS)
+    """
+    present = [col for col in DESCRIPTOR_COLS if col in df.columns]
+    values = df[present].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    descriptor_scores, category_scores = score_matrix(values, present)
+
+    for i, col in enumerate(present):
+        df[f'Score_{col}'] = descriptor_scores[:, i]
+    for j, cat in enumerate(CATEGORY_COLS):
+        df[cat] = category_scores[:, j]
+
+    df['Quality_Score_Total'] = category_scores @ weight_vector(weights)
+    df['Quality_Score'] = df['Quality_Score_Total'].rank(pct=True) * 100
+    return df
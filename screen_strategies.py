@@ -1,22 +1,18 @@
 import pandas as pd
-import FinanceDataReader as fdr
-import sys
 
-def screen_strategies():
-    try:
-        df = pd.read_csv('c:/Users/User/고니/quality_analysis_all.csv')
-    except Exception as e:
-        print(f"Error reading CSV: {e}")
-        return
+from data_cache import attach_names
+from report_writer import Column, write_sections, format_from_path
+
+NAME_COLUMN = Column('Name', 'Name', '<15', max_len=13, ellipsis='')  # 스크리닝 출력은 [:13] 그대로
+CODE_COLUMN = Column('Code', 'Code', '<8')
 
-    # Merge Names if missing
-    if 'Name' not in df.columns:
-        try:
-            df_krx = fdr.StockListing('KRX')
-            df = pd.merge(df, df_krx[['Code', 'Name']], on='Code', how='left')
-        except:
-            df['Name'] = df['Code']
+def strategy_screens(df):
+    """
+    세 가지 전략 스크리닝 결과 (전체 목록, 상위 10개 제한 없음)
 
+    Returns:
+        [(탭 이름, 제목 줄 리스트, 데이터프레임, Column 리스트), ...]
+    """
     # Recalculate Scores (Ensure we have z-scores)
     def z_score(x): 
         if x.std() == 0: return pd.Series([0] * len(x), index=x.index)
@@ -46,42 +42,53 @@ def screen_strategies():
     imp_cols = ['ROE_Improvement', 'ROA_Improvement', 'Operating_Margin_Improvement', 'Gross_Margin_Improvement']
     df['Improvement_Score'] = calc_sub_score(df, imp_cols)
 
-    # Save to file
-    with open('c:/Users/User/고니/strategy_results_utf8.txt', 'w', encoding='utf-8') as f:
-        sys.stdout = f
-        print(f"Analyzed Universe: {len(df)} stocks")
-        print("="*80)
+    # Strategy 1: The Compounders
+    compounders = df[(df['Profitability_Score'] > 1.0) & (df['Stability_Score'] > 0.5)].sort_values('Profitability_Score', ascending=False)
+    # Strategy 2: Turnaround Candidates
+    turnarounds = df[(df['Profitability_Score'] < 0.5) & (df['Improvement_Score'] > 1.5)].sort_values('Improvement_Score', ascending=False)
+    if 'Operating_Margin_Improvement' not in turnarounds.columns:
+        turnarounds = turnarounds.assign(Operating_Margin_Improvement=0)
+    # Strategy 3: Hidden Gems
+    hidden_gems = df[(df['ROIC'] > 15) & (df['Debt_Ratio'] < 100) & (df['Interest_Coverage'] > 10)].sort_values('ROIC', ascending=False)
 
-        # Strategy 1: The Compounders
-        compounders = df[(df['Profitability_Score'] > 1.0) & (df['Stability_Score'] > 0.5)].sort_values('Profitability_Score', ascending=False)
-        print(f"\n[Strategy 1: Compounders (꾸준한 우량주)] - {len(compounders)} stocks")
-        print("조건: 수익성 상위 16% & 이익안정성 상위 30%")
-        print("-" * 80)
-        print(f"{'Name':<15} | {'Code':<8} | {'Prof':<5} | {'Stab':<5} | {'ROE':<5}")
-        for _, row in compounders.head(10).iterrows():
-            print(f"{row['Name'][:13]:<15} | {row['Code']:<8} | {row['Profitability_Score']:>5.1f} | {row['Stability_Score']:>5.1f} | {row['ROE']:>5.1f}%")
+    return [
+        ('Compounders', [f"Analyzed Universe: {len(df)} stocks", "=" * 80, "",
+          f"[Strategy 1: Compounders (꾸준한 우량주)] - {len(compounders)} stocks",
+          "조건: 수익성 상위 16% & 이익안정성 상위 30%", "-" * 80],
+         compounders, [NAME_COLUMN, CODE_COLUMN,
+                       Column('Profitability_Score', 'Prof', '>5.1f'),
+                       Column('Stability_Score', 'Stab', '>5.1f'),
+                       Column('ROE', 'ROE', '>5.1f', suffix='%')]),
+        ('Turnaround', ["", f"[Strategy 2: Turnaround (실적 턴어라운드)] - {len(turnarounds)} stocks",
+          "조건: 수익성 평균 이하 & 개선강도 최상위권", "-" * 80],
+         turnarounds, [NAME_COLUMN, CODE_COLUMN,
+                       Column('Profitability_Score', 'Prof', '>5.1f'),
+                       Column('Improvement_Score', 'Imp', '>5.1f'),
+                       Column('Operating_Margin_Improvement', 'OpMargin Imp', '>5.1f', suffix='%')]),
+        ('Hidden Gems', ["", f"[Strategy 3: Hidden Gems (재무 우량 + 고수익)] - {len(hidden_gems)} stocks",
+          "조건: ROIC > 15% & 부채비율 < 100% & 이자보상배율 > 10배", "-" * 80],
+         hidden_gems, [NAME_COLUMN, CODE_COLUMN,
+                       Column('ROIC', 'ROIC', '>5.1f', suffix='%'),
+                       Column('Debt_Ratio', 'Debt', '>5.0f', suffix='%'),
+                       Column('Interest_Coverage', 'IntCov', '>5.1f')]),
+    ]
+
+def screen_strategies(csv_path='c:/Users/User/고니/quality_analysis_all.csv',
+                      output_path='c:/Users/User/고니/strategy_results_utf8.txt', fmt=None):
+    try:
+        df = pd.read_csv(csv_path)
+    except Exception as e:
+        print(f"Error reading CSV: {e}")
+        return
 
-        # Strategy 2: Turnaround Candidates
-        turnarounds = df[(df['Profitability_Score'] < 0.5) & (df['Improvement_Score'] > 1.5)].sort_values('Improvement_Score', ascending=False)
-        print(f"\n[Strategy 2: Turnaround (실적 턴어라운드)] - {len(turnarounds)} stocks")
-        print("조건: 수익성 평균 이하 & 개선강도 최상위권")
-        print("-" * 80)
-        print(f"{'Name':<15} | {'Code':<8} | {'Prof':<5} | {'Imp':<5} | {'OpMargin Imp':<5}")
-        for _, row in turnarounds.head(10).iterrows():
-            op_imp = row.get('Operating_Margin_Improvement', 0)
-            print(f"{row['Name'][:13]:<15} | {row['Code']:<8} | {row['Profitability_Score']:>5.1f} | {row['Improvement_Score']:>5.1f} | {op_imp:>5.1f}%")
+    # Merge Names if missing (KRX 종목 목록 캐시 사용)
+    df = attach_names(df)
+    sections = [(title_lines, frame.head(10), columns) for _, title_lines, frame, columns in strategy_screens(df)]
 
-        # Strategy 3: Hidden Gems
-        hidden_gems = df[(df['ROIC'] > 15) & (df['Debt_Ratio'] < 100) & (df['Interest_Coverage'] > 10)].sort_values('ROIC', ascending=False)
-        print(f"\n[Strategy 3: Hidden Gems (재무 우량 + 고수익)] - {len(hidden_gems)} stocks")
-        print("조건: ROIC > 15% & 부채비율 < 100% & 이자보상배율 > 10배")
-        print("-" * 80)
-        print(f"{'Name':<15} | {'Code':<8} | {'ROIC':<5} | {'Debt':<5} | {'IntCov':<5}")
-        for _, row in hidden_gems.head(10).iterrows():
-            print(f"{row['Name'][:13]:<15} | {row['Code']:<8} | {row['ROIC']:>5.1f}% | {row['Debt_Ratio']:>5.0f}% | {row['Interest_Coverage']:>5.1f}")
-            
-        sys.stdout = sys.__stdout__
-        print("Results saved to strategy_results_utf8.txt")
+    # Save to file (text / markdown / html / xlsx)
+    write_sections(sections, output_path, fmt=fmt or format_from_path(output_path))
+    if output_path not in (None, '-'):
+        print(f"Results saved to {output_path}")
 
 if __name__ == "__main__":
     screen_strategies()
@@ -0,0 +1,206 @@
+"""
+구글 시트 다중 탭 게시
+
+기존 upload_to_sheets() 는 호출마다 build('sheets', 'v4') 로 discovery 문서를
+받고, 탭 하나에 대해 메타데이터 조회 -> clear -> update 를 순서대로 보낸다.
+여기서는
+
+    1. discovery 문서를 cache/discovery/sheets_v4.json 에 보관 (프로세스 안에서는 서비스 객체 재사용)
+    2. 메타데이터 조회 1회 (기존 탭 이름 -> sheetId)
+    3. 모든 탭의 생성(addSheet) / clear / 크기 조정을 spreadsheets.batchUpdate 하나로,
+       모든 탭의 값을 values.batchUpdate 하나로 전송 (max_payload_bytes 를 넘으면 나눠서 전송)
+
+탭 수와 관계없이 보통 왕복 3회로 끝난다. 값은 셀 객체(updateCells) 대신
+2차원 배열로 보내서 요청 크기가 기존 values.update 와 같다.
+
+    tabs = {'Analysis': df_rank, 'Compounders': df_comp, 'History': df_hist}
+    publish_tabs(get_service(credentials), spreadsheet_id, tabs)
+"""
+
+import json
+import math
+import os
+import time
+
+from data_cache import CACHE_DIR
+
+DISCOVERY_URL = 'https://sheets.googleapis.com/$discovery/rest?version=v4'
+DISCOVERY_CACHE = os.path.join(CACHE_DIR, 'discovery', 'sheets_v4.json')
+DISCOVERY_MAX_AGE_DAYS = 7
+
+MAX_PAYLOAD_BYTES = 2_000_000  # 요청 하나의 본문 크기 상한 (Sheets API 권장치)
+ROWS_PER_RANGE = 5000          # ValueRange 하나에 넣을 행 수 (크기 상한에 맞춰 나누는 단위)
+
+_SERVICES = {}
+
+
+# ---------------------------------------------------------
+# discovery 문서 / 서비스 객체
+# ---------------------------------------------------------
+def load_discovery(max_age_days=DISCOVERY_MAX_AGE_DAYS):
+    """
+    Sheets v4 discovery 문서 (JSON 문자열)
+
+    캐시가 max_age_days 이내면 캐시, 아니면 새로 받아서 저장한다.
+    받기에 실패하면 오래된 캐시 -> google-api-python-client 내장 문서 순으로 사용.
+    """
+    fresh = os.path.exists(DISCOVERY_CACHE) and time.time() - os.path.getmtime(DISCOVERY_CACHE) < max_age_days * 86400
+    if fresh:
+        with open(DISCOVERY_CACHE, encoding='utf-8') as f:
+            return f.read()
+
+    try:
+        import requests
+
+        response = requests.get(DISCOVERY_URL, timeout=10)
+        response.raise_for_status()
+        doc = response.text
+    except Exception as e:
+        if os.path.exists(DISCOVERY_CACHE):
+            print(f"⚠ discovery 문서 갱신 실패 (기존 캐시 사용): {e}")
+            with open(DISCOVERY_CACHE, encoding='utf-8') as f:
+                return f.read()
+        from googleapiclient import discovery_cache
+
+        doc = discovery_cache.get_static_doc('sheets', 'v4')
+        if not doc:
+            raise
+
+    os.makedirs(os.path.dirname(DISCOVERY_CACHE), exist_ok=True)
+    tmp_path = DISCOVERY_CACHE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(doc)
+    os.replace(tmp_path, DISCOVERY_CACHE)
+    return doc
+
+
+def get_service(credentials=None, endpoint=None, http=None):
+    """
+    캐시된 discovery 문서로 Sheets 서비스 생성 (같은 endpoint 는 재사용)
+
+    Args:
+        credentials: google.auth 자격 증명 (http 를 넘기면 생략 가능)
+        endpoint: API 주소 (기본: https://sheets.googleapis.com/, 테스트용 가짜 서버 주소)
+        http: httplib2.Http (가짜 서버처럼 인증이 필요 없을 때)
+    """
+    key = (endpoint, id(credentials), id(http))
+    if key not in _SERVICES:
+        from googleapiclient.discovery import build_from_document
+
+        client_options = {'api_endpoint': endpoint} if endpoint else None
+        _SERVICES[key] = build_from_document(load_discovery(), credentials=None if http else credentials,
+                                             http=http, client_options=client_options)
+    return _SERVICES[key]
+
+
+# ---------------------------------------------------------
+# 데이터프레임 -> batchUpdate 요청
+# ---------------------------------------------------------
+def _a1(title, row):
+    """'탭 이름'!A{row} (탭 이름의 작은따옴표는 두 번 써서 이스케이프)"""
+    return "'{}'!A{}".format(title.replace("'", "''"), row)
+
+
+def frame_values(df):
+    """데이터프레임 -> 값 2차원 리스트 (헤더 포함, NaN / inf 는 빈 칸, 컬럼 단위 변환)"""
+    cols = []
+    for name in df.columns:
+        values = df[name].tolist()
+        if df[name].dtype.kind == 'f':
+            values = [v if math.isfinite(v) else None for v in values]
+        elif df[name].dtype.kind == 'O':
+            values = [None if v is None or v != v else v for v in values]
+        cols.append(values)
+    return [[str(name) for name in df.columns]] + [list(row) for row in zip(*cols)]
+
+
+def build_requests(tabs, existing):
+    """
+    탭 구조 요청 (spreadsheets.batchUpdate): 없는 탭은 생성, 있는 탭은 값 지우고 크기 조정
+
+    Args:
+        tabs: {탭 이름: 데이터프레임}
+        existing: {기존 탭 이름: sheetId}
+    """
+    requests = []
+    next_id = max(existing.values(), default=0) + 1
+    for title, df in tabs.items():
+        # 빈 탭도 헤더 아래 한 행을 남김 (모든 행을 고정하면 Sheets API 가 batchUpdate 전체를 거부)
+        grid = {'rowCount': max(len(df) + 1, 2), 'columnCount': max(len(df.columns), 1), 'frozenRowCount': 1}
+        if title in existing:
+            sheet_id = existing[title]
+            requests.append({'updateCells': {'range': {'sheetId': sheet_id}, 'fields': 'userEnteredValue'}})
+            requests.append({'updateSheetProperties': {
+                'properties': {'sheetId': sheet_id, 'gridProperties': grid},
+                'fields': 'gridProperties(rowCount,columnCount,frozenRowCount)'}})
+        else:
+            sheet_id, next_id = next_id, next_id + 1
+            requests.append({'addSheet': {'properties': {'sheetId': sheet_id, 'title': title, 'gridProperties': grid}}})
+    return requests
+
+
+def build_value_ranges(tabs, rows_per_range=ROWS_PER_RANGE):
+    """값 쓰기 요청 (values.batchUpdate 의 data): 탭마다 rows_per_range 행 단위 ValueRange"""
+    data = []
+    for title, df in tabs.items():
+        values = frame_values(df)
+        for start in range(0, len(values), rows_per_range):
+            data.append({'range': _a1(title, start + 1), 'values': values[start:start + rows_per_range]})
+    return data
+
+
+def pack_requests(items, max_payload_bytes=MAX_PAYLOAD_BYTES):
+    """순서를 유지하면서 요청 본문 크기가 max_payload_bytes 이하가 되도록 묶음"""
+    batches, batch, size = [], [], 0
+    for item in items:
+        item_size = _body_size(item) + 1
+        if batch and size + item_size > max_payload_bytes:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(item)
+        size += item_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _body_size(body):
+    return len(json.dumps(body).encode('utf-8'))  # googleapiclient 와 같은 직렬화 (ensure_ascii)
+
+
+def publish_tabs(service, spreadsheet_id, tabs, max_payload_bytes=MAX_PAYLOAD_BYTES):
+    """
+    여러 탭을 한 번에 게시 (없는 탭은 생성, 있는 탭은 지우고 덮어쓰기)
+
+    왕복: 메타데이터 조회 1회 + 구조 batchUpdate 1회 + 값 batchUpdate 1회
+    (값이 max_payload_bytes 를 넘으면 값 요청만 나눠서 전송)
+
+    Args:
+        service: get_service() 결과
+        spreadsheet_id: 구글 시트 ID
+        tabs: {탭 이름: 데이터프레임}
+        max_payload_bytes: 요청 하나의 본문 크기 상한
+
+    Returns:
+        {'round_trips', 'request_bytes', 'cells'}
+    """
+    sheets = service.spreadsheets()
+    metadata = sheets.get(spreadsheetId=spreadsheet_id, fields='sheets.properties(sheetId,title)').execute()
+    existing = {s['properties']['title']: s['properties']['sheetId'] for s in metadata.get('sheets', [])}
+    round_trips, request_bytes = 1, 0
+
+    # 1. 탭 생성 / clear / 크기 조정
+    body = {'requests': build_requests(tabs, existing)}
+    request_bytes += _body_size(body)
+    sheets.batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute()
+    round_trips += 1
+
+    # 2. 모든 탭 값 쓰기 (RAW: 종목코드 앞자리 0 유지)
+    for data in pack_requests(build_value_ranges(tabs), max_payload_bytes):
+        body = {'valueInputOption': 'RAW', 'data': data}
+        request_bytes += _body_size(body)
+        sheets.values().batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute()
+        round_trips += 1
+
+    cells = sum((len(df) + 1) * len(df.columns) for df in tabs.values())
+    return {'round_trips': round_trips, 'request_bytes': request_bytes, 'cells': cells}
@@ -0,0 +1,224 @@
+"""
+유니버스 프로필
+
+이름 붙인 종목 선정 규칙(시장별 시가총액 상위 N, 시가총액 / 거래대금 하한, 업종 / 금융업 제외,
+직접 지정 목록)으로 여러 유니버스를 나란히 돌린다.
+
+    python universes.py                                  # 프로필 목록, 종목 수, 프로필 간 겹치는 종목
+    python universes.py run default kosdaq_liquid konex  # 한 번 수집 -> 프로필별 점수 산출
+    python quiltystock.py collect --universe default --universe konex
+
+universes.json (QUILTY_UNIVERSES, 없으면 default 하나)
+    {
+      "kospi200": {"markets": {"KOSPI": 200}},
+      "kosdaq_liquid": {"markets": {"KOSDAQ": null}, "min_marcap": 1e11, "min_amount": 5e8,
+                        "exclude_financials": true},
+      "konex": {"markets": {"KONEX": null}},
+      "no_bio": {"markets": {"KOSPI": 500, "KOSDAQ": 200}, "exclude_sectors": ["의약품", "의료"]},
+      "watch": {"codes": ["005930", "000660", "278470"]}
+    }
+
+    markets             {시장: 시가총액 상위 N (null 이면 전체)}, 아래 필터를 먼저 적용
+    min_marcap          시가총액 하한 (원)
+    min_amount          거래대금 하한 (원, 종목 목록 기준일 하루)
+    exclude_financials  종목명으로 금융업 제외 (FINANCIAL_KEYWORDS)
+    exclude_sectors     업종명에 이 단어가 들어가면 제외 (KRX-DESC 업종)
+    codes               직접 지정 종목 (필터 적용 안 함, markets 와 함께 쓰면 합집합)
+
+같이 쓰는 것: 페이지 / 분기 원장 / 종목 목록 캐시(cache/). 수집은 프로필 합집합을 한 번만
+(SHARED_FACTORS, 이어하기) 하므로 겹치는 종목은 한 번만 받고 계산한다.
+프로필마다 따로: 점수 표준화(단면), 결과 CSV, 히스토리(스냅샷 / 변화 분석 / 알림 / 평활 / peer / 격리).
+default 는 기존과 같은 quality_analysis_all.csv + history/, 나머지는 quality_analysis_{이름}.csv +
+history/universes/{이름}/ (점수 산출을 QUILTY_HISTORY_DIR 만 바꿔서 따로 실행).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+from data_cache import attach_sectors, get_stock_listing
+from factor_store import HISTORY_DIR, normalize_codes
+
+UNIVERSES_CONFIG = os.environ.get('QUILTY_UNIVERSES', 'universes.json')
+DEFAULT_OUTPUT = 'quality_analysis_all.csv'
+SHARED_FACTORS = 'quality_factors_all.csv'  # 여러 프로필 수집 때 합집합 원본 지표
+QUILTYSTOCK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quiltystock.py')
+
+DEFAULT_PROFILE = {'markets': {'KOSPI': 500, 'KOSDAQ': 200}}
+PROFILE_KEYS = {'markets', 'codes', 'min_marcap', 'min_amount', 'exclude_financials', 'exclude_sectors'}
+
+FINANCIAL_KEYWORDS = ['은행', '보험', '증권', '금융', '캐피탈', '저축', '신용',
+                      '생명', '화재', '손해', '투자', '자산운용', '리츠', 'SPAC']
+
+
+def load_profiles(path=UNIVERSES_CONFIG):
+    """{이름: 프로필} (default 는 항상 있음, 설정 파일에서 덮어쓸 수 있음, 잘못된 설정은 ValueError)"""
+    profiles = {'default': DEFAULT_PROFILE}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            profiles.update(json.load(f))
+    for name, profile in profiles.items():
+        unknown = set(profile) - PROFILE_KEYS
+        if unknown:
+            raise ValueError(f"유니버스 {name}: 알 수 없는 설정 {', '.join(sorted(unknown))} "
+                             f"(사용 가능: {', '.join(sorted(PROFILE_KEYS))})")
+        if not profile.get('markets') and not profile.get('codes'):
+            raise ValueError(f"유니버스 {name}: markets 나 codes 가 필요합니다")
+    return profiles
+
+
+def describe(profile):
+    """'KOSPI 500위 + KOSDAQ 200위, 시총 1,000억원 이상' 형태 설명"""
+    parts = [f"{market} {f'{top}위' if top else '전체'}" for market, top in (profile.get('markets') or {}).items()]
+    if profile.get('codes'):
+        parts.append(f"지정 {len(profile['codes'])}종목")
+    filters = []
+    if profile.get('min_marcap'):
+        filters.append(f"시총 {profile['min_marcap'] / 1e8:,.0f}억원 이상")
+    if profile.get('min_amount'):
+        filters.append(f"거래대금 {profile['min_amount'] / 1e8:,.0f}억원 이상")
+    if profile.get('exclude_financials'):
+        filters.append("금융업 제외")
+    if profile.get('exclude_sectors'):
+        filters.append(f"{'/'.join(profile['exclude_sectors'])} 제외")
+    return ' + '.join(parts) + (f" ({', '.join(filters)})" if filters else '')
+
+
+# ---------------------------------------------------------
+# 종목 선정 (종목 목록 캐시에서 벡터 필터)
+# ---------------------------------------------------------
+def _filter(listing, profile):
+    keep = pd.Series(True, index=listing.index)
+    if profile.get('min_marcap'):
+        keep &= listing['Marcap'] >= profile['min_marcap']
+    if profile.get('min_amount'):
+        amount = listing['Amount'] if 'Amount' in listing.columns else listing['Close'] * listing['Volume']
+        keep &= amount >= profile['min_amount']
+    if profile.get('exclude_financials'):
+        keep &= ~listing['Name'].astype(str).str.contains('|'.join(FINANCIAL_KEYWORDS), regex=True)
+    if profile.get('exclude_sectors'):
+        sectors = attach_sectors(listing[['Code']].copy())['Sector'].fillna('').astype(str)
+        keep &= ~sectors.str.contains('|'.join(profile['exclude_sectors']), regex=True).to_numpy()
+    return listing[keep.to_numpy()]
+
+
+def build_universe(profile):
+    """
+    프로필 -> 유니버스 데이터프레임 (Code, Name, Market, Marcap, ...)
+
+    시장 순서대로, 시장 안에서는 시가총액 내림차순 (여러 시장에 걸친 종목은 처음 것만)
+    """
+    frames = []
+    for market, top in (profile.get('markets') or {}).items():
+        listing = get_stock_listing(market).copy()
+        listing['Code'] = normalize_codes(listing['Code'])
+        listing = _filter(listing, profile).sort_values('Marcap', ascending=False)
+        frames.append((listing.head(top) if top else listing).assign(Market=market))
+    if profile.get('codes'):
+        codes = pd.DataFrame({'Code': normalize_codes(pd.Series(profile['codes'], dtype=str))})
+        listing = get_stock_listing('KRX').copy()
+        listing['Code'] = normalize_codes(listing['Code'])
+        picked = codes.merge(listing.drop_duplicates(subset=['Code']), on='Code', how='left')
+        picked['Name'] = picked['Name'].fillna(picked['Code'])
+        frames.append(picked)
+    return pd.concat(frames).drop_duplicates(subset=['Code']).reset_index(drop=True)
+
+
+def profile_paths(name):
+    """(결과 CSV, 히스토리 폴더) - default 는 기존 경로 그대로"""
+    if name == 'default':
+        return DEFAULT_OUTPUT, HISTORY_DIR
+    return f'quality_analysis_{name}.csv', os.path.join(HISTORY_DIR, 'universes', name)
+
+
+# ---------------------------------------------------------
+# 여러 프로필 실행 (수집 한 번 -> 프로필별 점수 산출)
+# ---------------------------------------------------------
+def run_profiles(names, source='fnguide', max_concurrency=None, max_failure_rate=None, stdout=None):
+    """
+    프로필 합집합을 한 번 수집한 뒤 프로필마다 따로 점수 산출
+
+    Args:
+        stdout: 점수 산출 프로세스 출력 (subprocess.run 의 stdout, 기본: 그대로 출력)
+
+    Returns:
+        {프로필 이름: 점수 산출 종료 코드 (0 = 성공)}
+    """
+    import quality_analysis_ttm as qa
+
+    profiles = load_profiles()
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        raise ValueError(f"알 수 없는 유니버스: {', '.join(unknown)} (설정: {UNIVERSES_CONFIG})")
+    max_concurrency = max_concurrency or qa.MAX_CONCURRENCY
+    max_failure_rate = qa.MAX_FAILURE_RATE if max_failure_rate is None else max_failure_rate
+
+    print(f"1. 유니버스 구성 중... ({', '.join(names)})")
+    universes = {}
+    for name in names:
+        universes[name] = build_universe(profiles[name])
+        print(f"   [{name}] {len(universes[name]):,}개 - {describe(profiles[name])}")
+    union = pd.concat(universes.values()).drop_duplicates(subset=['Code']).reset_index(drop=True)
+    total = sum(len(u) for u in universes.values())
+    print(f"-> 고유 {len(union):,}개 수집 (프로필 합계 {total:,}개, 겹치는 {total - len(union):,}개는 한 번만)")
+    qa.collect(union, SHARED_FACTORS, source, max_concurrency)
+
+    raw = pd.read_csv(SHARED_FACTORS, dtype={'Code': str})
+    raw['Code'] = normalize_codes(raw['Code'])
+    results = {}
+    for name in names:
+        output_file, history_dir = profile_paths(name)
+        rows = raw[raw['Code'].isin(universes[name]['Code'])]
+        rows.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"\n===== [{name}] {len(rows):,}종목 점수 산출 -> {output_file} (히스토리 {history_dir}) =====")
+        # 히스토리 경로는 각 모듈이 import 때 정하므로 프로필마다 QUILTY_HISTORY_DIR 만 바꿔서 따로 실행
+        env = dict(os.environ, QUILTY_HISTORY_DIR=history_dir)
+        results[name] = subprocess.run([sys.executable, QUILTYSTOCK, 'score', '-i', output_file,
+                                        '--max-failure-rate', str(max_failure_rate)],
+                                       env=env, stdout=stdout).returncode
+
+    print("\n[유니버스별 결과]")
+    for name, code in results.items():
+        print(f"  {name:<16} {'✅ 완료' if code == 0 else f'❌ 실패 (종료 코드 {code})'}  {profile_paths(name)[0]}")
+    return results
+
+
+def print_profiles(names=None):
+    profiles = load_profiles()
+    names = names or list(profiles)
+    universes = {name: set(build_universe(profiles[name])['Code']) for name in names}
+    print(f"[유니버스 프로필] {UNIVERSES_CONFIG if os.path.exists(UNIVERSES_CONFIG) else '설정 파일 없음 (default 만)'}")
+    for name in names:
+        print(f"  {name:<16} {len(universes[name]):>6,}종목  {describe(profiles[name])}")
+    if len(names) > 1:
+        union = set().union(*universes.values())
+        print(f"\n  합집합 {len(union):,}종목 (프로필 합계 {sum(map(len, universes.values())):,})")
+        for i, a in enumerate(names):
+            for b in names[i + 1:]:
+                print(f"  {a} ∩ {b}: {len(universes[a] & universes[b]):,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='유니버스 프로필')
+    parser.add_argument('command', nargs='?', choices=['list', 'run'], default='list')
+    parser.add_argument('names', nargs='*', help='프로필 이름 (기본: list 는 전체, run 은 default)')
+    parser.add_argument('--source', choices=['fnguide', 'dart'], default='fnguide')
+    parser.add_argument('--max-concurrency', type=int)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'run':
+            results = run_profiles(args.names or ['default'], args.source, args.max_concurrency)
+            return 0 if not any(results.values()) else 1
+        print_profiles(args.names or None)
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
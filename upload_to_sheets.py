@@ -6,15 +6,26 @@ Google Sheets 업로드 스크립트 (GitHub Actions용)
 import os
 import json
 from datetime import datetime
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 import pandas as pd
 
+from data_cache import attach_names
+from data_quality import MAX_FAILURE_RATE, gate
+from factor_store import list_snapshots, load_snapshot
+from score_diff import MAX_MOVER_RATE, check_changes, movers
+from screen_strategies import strategy_screens
+from sheets_publisher import get_service, publish_tabs
+from profiling import profiled
+from scoring import calculate_scores
+
 # Google Sheets API 설정
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+HISTORY_DATES = 20  # History 탭에 표시할 최근 스냅샷 수
+MOVERS_ROWS = 100   # Movers 탭에 표시할 점수 변화 상위 종목 수
 
 def get_credentials():
     """GitHub Secrets에서 credentials 가져오기"""
+    from google.oauth2.service_account import Credentials
+    
     creds_json = os.environ.get('GOOGLE_SHEETS_CREDENTIALS')
     if not creds_json:
         raise ValueError("GOOGLE_SHEETS_CREDENTIALS 환경 변수가 설정되지 않았습니다")
@@ -25,147 +36,66 @@ def get_credentials():
 
 def upload_to_sheets(spreadsheet_id, df, sheet_name='Analysis'):
     """
-    데이터프레임을 구글 시트에 업로드 (덮어쓰기)
+    데이터프레임을 구글 시트 탭 하나에 업로드 (덮어쓰기, 탭이 없으면 생성)
     
     Args:
         spreadsheet_id: 구글 시트 ID
         df: 업로드할 데이터프레임
         sheet_name: 시트 탭 이름 (기본: 'Analysis')
     """
-    credentials = get_credentials()
-    service = build('sheets', 'v4', credentials=credentials)
-    
-    # 1. 기존 시트가 있는지 확인
-    try:
-        sheet_metadata = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
-        sheets = sheet_metadata.get('sheets', [])
-        
-        # 첫 번째 시트 사용 (또는 'Analysis' 시트 찾기)
-        target_sheet = None
-        for sheet in sheets:
-            if sheet['properties']['title'] == sheet_name:
-                target_sheet = sheet
-                break
-        
-        if not target_sheet:
-            # 'Analysis' 시트가 없으면 첫 번째 시트 사용
-            target_sheet = sheets[0]
-            sheet_name = target_sheet['properties']['title']
-            print(f"✓ 기존 시트 사용: {sheet_name}")
-        else:
-            print(f"✓ '{sheet_name}' 시트 발견")
-            
-    except Exception as e:
-        print(f"⚠ 시트 확인 오류: {e}")
-        sheet_name = 'Sheet1'  # Fallback
-    
-    # 2. 기존 데이터 전체 삭제 (A1부터 모든 내용)
-    try:
-        clear_request = service.spreadsheets().values().clear(
-            spreadsheetId=spreadsheet_id,
-            range=f"{sheet_name}!A1:ZZ100000",  # 충분히 큰 범위
-            body={}
-        ).execute()
-        print(f"✓ 기존 데이터 삭제 완료")
-    except Exception as e:
-        print(f"⚠ 데이터 삭제 중 오류 (무시 가능): {e}")
-    
-    # 3. 새 데이터 업로드
-    # JSON은 NaN/Infinity를 지원하지 않으므로 None으로 변환
-    import numpy as np
-    df_clean = df.replace([np.inf, -np.inf, np.nan], None)
-    
-    # 헤더 + 데이터
-    values = [df_clean.columns.tolist()] + df_clean.values.tolist()
-    
-    body = {
-        'values': values
-    }
-    
-    result = service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=f"{sheet_name}!A1",
-        valueInputOption='RAW',
-        body=body
-    ).execute()
-    
-    print(f"✓ {result.get('updatedCells')} 개 셀 업데이트 완료")
-    return result
+    return publish(spreadsheet_id, {sheet_name: df})
 
-def calculate_scores(df):
-    """
-    점수 계산 함수 (generate_final_table.py 로직 재사용)
+@profiled()
+def publish(spreadsheet_id, tabs):
     """
-    import numpy as np
-    
-    def z_score(series):
-        return (series - series.mean()) / (series.std() + 1e-10)
-    
-    # 1. 수익성 점수
-    profitability_cols = ['ROE', 'ROA', 'ROIC', 'Operating_Margin', 'Gross_Margin']
-    profitability_scores = []
-    for col in profitability_cols:
-        if col in df.columns:
-            df[f'Score_{col}'] = z_score(df[col].fillna(df[col].median()))
-            profitability_scores.append(f'Score_{col}')
-    df['Profitability_Score'] = df[profitability_scores].mean(axis=1) if profitability_scores else 0
-    
-    # 2. 안정성 점수
-    stability_cols = ['Revenue_Stability', 'OpProfit_Stability', 'NetIncome_Stability', 
-                      'EPS_Stability', 'Dividend_Stability']
-    stability_scores = []
-    for col in stability_cols:
-        if col in df.columns:
-            df[f'Score_{col}'] = z_score(df[col].fillna(0))
-            stability_scores.append(f'Score_{col}')
-    df['Stability_Score'] = df[stability_scores].mean(axis=1) if stability_scores else 0
+    여러 탭을 batchUpdate 로 한 번에 업로드 (sheets_publisher.py)
     
-    # 3. 자본구조 점수
-    df['Score_Debt_Ratio'] = z_score(df['Debt_Ratio'].fillna(100))
-    capital_scores = ['Score_Debt_Ratio']
-    for col in ['Interest_Coverage', 'Current_Ratio', 'Equity_Ratio']:
-        if col in df.columns:
-            df[f'Score_{col}'] = z_score(df[col].fillna(df[col].median()))
-            capital_scores.append(f'Score_{col}')
-    df['Capital_Score'] = df[capital_scores].mean(axis=1)
-    
-    # 4. 개선 점수
-    improvement_cols = ['ROE_Improvement', 'ROA_Improvement', 
-                        'Operating_Margin_Improvement', 'Gross_Margin_Improvement']
-    improvement_scores = []
-    for col in improvement_cols:
-        if col in df.columns:
-            df[f'Score_{col}'] = z_score(df[col].fillna(0))
-            improvement_scores.append(f'Score_{col}')
-    df['Improvement_Score'] = df[improvement_scores].mean(axis=1) if improvement_scores else 0
-    
-    # 5. 회계품질 점수
-    accounting_cols = ['Accruals', 'Net_Operating_Assets', 'Earnings_Smoothness']
-    accounting_scores = []
-    for col in accounting_cols:
-        if col in df.columns:
-            df[f'Score_{col}'] = z_score(df[col].fillna(0)) * -1
-            accounting_scores.append(f'Score_{col}')
-    df['Accounting_Score'] = df[accounting_scores].mean(axis=1) if accounting_scores else 0
-    
-    # 종합 점수 (가중 평균)
-    df['Quality_Score_Total'] = (
-        df['Profitability_Score'] * 0.30 +
-        df['Stability_Score'] * 0.25 +
-        df['Capital_Score'] * 0.20 +
-        df['Improvement_Score'] * 0.15 +
-        df['Accounting_Score'] * 0.10
-    )
-    
-    # 백분위로 환산 (0~100)
-    df['Quality_Score'] = df['Quality_Score_Total'].rank(pct=True) * 100
-    
-    return df
+    Args:
+        spreadsheet_id: 구글 시트 ID
+        tabs: {탭 이름: 데이터프레임}
+    """
+    service = get_service(get_credentials())
+    stats = publish_tabs(service, spreadsheet_id, tabs)
+    print(f"✓ {len(tabs)}개 탭, {stats['cells']} 개 셀 업데이트 완료 "
+          f"(API 왕복 {stats['round_trips']}회, {stats['request_bytes'] / 1024:.0f} KB)")
+    return stats
 
-def main():
-    """메인 실행 함수"""
-    import FinanceDataReader as fdr
-    
+def strategy_tabs(df):
+    """전략 스크리닝 결과 탭 {탭 이름: 데이터프레임} (screen_strategies.py 조건, 전체 목록)"""
+    tabs = {}
+    for title, _, frame, columns in strategy_screens(df.copy()):
+        tab = frame[[c.name for c in columns]].copy()
+        tab.columns = [c.header for c in columns]
+        tabs[title] = tab.round(2)
+    return tabs
+
+def history_tab(n_dates=HISTORY_DATES):
+    """최근 n_dates 개 스냅샷의 종합점수 추이 (행: 종목, 열: 날짜)"""
+    snapshots = list_snapshots()[-n_dates:]
+    if not snapshots:
+        return None
+    frames = []
+    for date, path in snapshots:
+        snap = load_snapshot(path)
+        if 'Quality_Score' in snap.columns:
+            frames.append(snap.set_index('Code')['Quality_Score'].rename(date.strftime('%Y-%m-%d')))
+    if not frames:
+        return None
+    history = pd.concat(frames, axis=1)
+    history = history[history.columns[::-1]]  # 최신 날짜가 왼쪽
+    history = history.sort_values(history.columns[0], ascending=False).round(1)
+    return history.rename_axis('종목코드').reset_index()
+
+def movers_tab(diff, n_rows=MOVERS_ROWS):
+    """직전 스냅샷 대비 점수 변화 상위 종목 + 카테고리 기여도 (score_diff.py)"""
+    tab = movers(diff, n_rows).round(2)
+    return tab.rename(columns={'Code': '종목코드', 'Name': '종목명', 'Quality_Score_Prev': '이전점수',
+                               'Quality_Score': '종합점수', 'Delta_Score': '점수변화',
+                               'Raw_Effect': '데이터변화효과', 'Restd_Effect': '재표준화효과'})
+
+@profiled('upload')
+def main(csv_path='quality_analysis_all.csv', max_failure_rate=MAX_FAILURE_RATE, max_mover_rate=MAX_MOVER_RATE):
+    """메인 실행 함수 (데이터 품질 게이트 / 점수 변화 검사 실패 시 업로드하지 않음)"""
     print("=" * 60)
     print("Google Sheets 업로드 시작")
     print("=" * 60)
@@ -176,22 +106,29 @@ def main():
         raise ValueError("GOOGLE_SHEET_ID 환경 변수가 설정되지 않았습니다")
     
     # CSV 파일 읽기
-    csv_path = 'quality_analysis_all.csv'
     if not os.path.exists(csv_path):
         raise FileNotFoundError(f"{csv_path} 파일을 찾을 수 없습니다")
     
     df = pd.read_csv(csv_path)
     print(f"✓ 원본 데이터 로드: {len(df)} 개 종목")
     
-    # 점수 계산
+    # 데이터 품질 게이트 (격리 비율 초과 시 DataQualityError -> 업로드 중단)
+    df = gate(df, max_failure_rate)
+    print(f"✓ 데이터 품질 검사 통과: {len(df)} 개 종목")
+    
+    # 점수 계산 (scoring.py - CSV / 스냅샷 / 서버와 같은 규칙)
     df = calculate_scores(df)
     print(f"✓ 점수 계산 완료")
     
-    # 종목명 추가
-    df_krx = fdr.StockListing('KRX')
-    df = df.merge(df_krx[['Code', 'Name']], on='Code', how='left')
+    # 종목명 추가 (KRX 종목 목록 캐시 사용)
+    df = attach_names(df)
     print(f"✓ 종목명 추가 완료")
     
+    # 직전 스냅샷 대비 점수 변화 (급변 종목 비율 초과 시 ScoreDiffError -> 업로드 중단)
+    diff = check_changes(df, max_mover_rate)
+    if diff is not None:
+        print(f"✓ 점수 변화 검사 통과")
+    
     # 순위 추가
     df['Rank'] = df['Quality_Score'].rank(ascending=False, method='min').astype(int)
     df = df.sort_values('Rank')
@@ -200,7 +137,7 @@ def main():
     # 업로드용 컬럼 선택 및 순서 정리 (모든 지표 포함)
     upload_cols = [
         # 기본 정보 & 순위
-        'Rank', 'Code', 'Name', 'Quality_Score',
+        'Rank', 'Code', 'Name', 'Quality_Score', 'Smoothed_Quality_Score',
         # 카테고리별 점수
         'Profitability_Score', 'Stability_Score', 'Capital_Score', 
         'Improvement_Score', 'Accounting_Score',
@@ -228,6 +165,7 @@ def main():
         'Code': '종목코드',
         'Name': '종목명',
         'Quality_Score': '종합점수',
+        'Smoothed_Quality_Score': '평활점수',
         'Profitability_Score': '수익성점수',
         'Stability_Score': '안정성점수',
         'Capital_Score': '자본구조점수',
@@ -264,16 +202,22 @@ def main():
     
     print(f"✓ 최종 컬럼 수: {len(upload_cols)}개")
     
-    # 고정된 시트 이름 사용 (날짜별 탭 생성하지 않음)
-    sheet_name = 'Analysis'
+    # 탭 구성: 전체 순위 + 전략별 스크리닝 + 점수 추이
+    tabs = {'Analysis': df_upload}
+    tabs.update(strategy_tabs(df))
+    history = history_tab()
+    if history is not None:
+        tabs['History'] = history
+    if diff is not None:
+        tabs['Movers'] = movers_tab(diff)
     
-    # 업로드 실행
-    upload_to_sheets(spreadsheet_id, df_upload, sheet_name)
+    # 업로드 실행 (메타데이터 조회 1회 + batchUpdate)
+    publish(spreadsheet_id, tabs)
     
     print("=" * 60)
     print(f"✓ 업로드 완료!")
     print(f"  종목 수: {len(df_upload)}개")
-    print(f"  시트명: {sheet_name}")
+    print(f"  탭: {', '.join(tabs)}")
     print(f"  업데이트 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"  URL: https://docs.google.com/spreadsheets/d/{spreadsheet_id}")
     print("=" * 60)